@@ -0,0 +1,114 @@
+"""Alert coalescing columns, boolean is_resolved and unresolved partial index
+
+Upgrades an alerts table created by ``Base.metadata.create_all`` before
+Alembic managed the schema.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _columns(table: str) -> dict:
+    inspector = sa.inspect(op.get_bind())
+    return {c["name"]: c for c in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    columns = _columns("alerts")
+    if op.get_bind().dialect.name == "sqlite":
+        _upgrade_sqlite(columns)
+    else:
+        _upgrade_postgresql(columns)
+
+    op.create_index(
+        "ix_alerts_plant_unresolved",
+        "alerts",
+        ["plant_id", "created_at"],
+        postgresql_where=sa.text("NOT is_resolved"),
+        sqlite_where=sa.text("is_resolved = 0"),
+        if_not_exists=True,
+    )
+
+
+def _upgrade_postgresql(columns: dict) -> None:
+    # Coalescing columns
+    if "parameter" not in columns:
+        op.add_column("alerts", sa.Column("parameter", sa.String(50), nullable=True))
+    if "occurrence_count" not in columns:
+        op.add_column(
+            "alerts",
+            sa.Column("occurrence_count", sa.Integer(), nullable=False, server_default="1"),
+        )
+    if "last_seen_at" not in columns:
+        op.add_column(
+            "alerts",
+            sa.Column("last_seen_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.execute("UPDATE alerts SET last_seen_at = created_at")
+
+    # is_resolved: String(10) "true"/"false" -> BOOLEAN NOT NULL
+    if not isinstance(columns["is_resolved"]["type"], sa.Boolean):
+        op.execute("UPDATE alerts SET is_resolved = 'false' WHERE is_resolved IS NULL")
+        op.alter_column("alerts", "is_resolved", server_default=None)
+        op.alter_column(
+            "alerts",
+            "is_resolved",
+            type_=sa.Boolean(),
+            existing_type=sa.String(10),
+            nullable=False,
+            postgresql_using="is_resolved = 'true'",
+        )
+        op.alter_column("alerts", "is_resolved", server_default=sa.false())
+
+
+def _upgrade_sqlite(columns: dict) -> None:
+    # SQLite can neither ALTER a column nor ADD one with a CURRENT_TIMESTAMP
+    # default, so the table is rebuilt once with every change
+    to_boolean = not isinstance(columns["is_resolved"]["type"], sa.Boolean)
+    if to_boolean:
+        op.execute("UPDATE alerts SET is_resolved = CASE WHEN is_resolved = 'true' THEN 1 ELSE 0 END")
+    with op.batch_alter_table("alerts", recreate="always") as batch:
+        if "parameter" not in columns:
+            batch.add_column(sa.Column("parameter", sa.String(50), nullable=True))
+        if "occurrence_count" not in columns:
+            batch.add_column(sa.Column("occurrence_count", sa.Integer(), nullable=False, server_default="1"))
+        if "last_seen_at" not in columns:
+            batch.add_column(sa.Column("last_seen_at", sa.DateTime(timezone=True), server_default=sa.func.now()))
+        if to_boolean:
+            batch.alter_column(
+                "is_resolved",
+                type_=sa.Boolean(),
+                existing_type=sa.String(10),
+                nullable=False,
+                server_default=sa.false(),
+            )
+    if "last_seen_at" not in columns:
+        op.execute("UPDATE alerts SET last_seen_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alerts_plant_unresolved", table_name="alerts")
+
+    op.alter_column("alerts", "is_resolved", server_default=None)
+    op.alter_column(
+        "alerts",
+        "is_resolved",
+        type_=sa.String(10),
+        existing_type=sa.Boolean(),
+        nullable=True,
+        postgresql_using="CASE WHEN is_resolved THEN 'true' ELSE 'false' END",
+    )
+    op.alter_column("alerts", "is_resolved", server_default="false")
+
+    op.drop_column("alerts", "last_seen_at")
+    op.drop_column("alerts", "occurrence_count")
+    op.drop_column("alerts", "parameter")
@@ -0,0 +1,27 @@
+"""Per-plant data version for read-endpoint ETags
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("plants")}
+    if "data_version" not in columns:
+        op.add_column(
+            "plants",
+            sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("plants", "data_version")
@@ -0,0 +1,44 @@
+"""Precomputed KPI snapshots
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Skip if init_db's create_all already built it
+    if sa.inspect(op.get_bind()).has_table("kpi_snapshots"):
+        return
+
+    op.create_table(
+        "kpi_snapshots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("period_days", sa.Integer(), nullable=False),
+        sa.Column("window_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("total_measurements", sa.Integer(), nullable=False),
+        sa.Column("validated_count", sa.Integer(), nullable=False),
+        sa.Column("caudal_sum", sa.Numeric(16, 3), nullable=False),
+        sa.Column("caudal_count", sa.Integer(), nullable=False),
+        sa.Column("ph_sum", sa.Numeric(16, 3), nullable=False),
+        sa.Column("ph_count", sa.Integer(), nullable=False),
+        sa.Column("chlorine_sum", sa.Numeric(16, 3), nullable=False),
+        sa.Column("chlorine_count", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("plant_id", "period_days", name="uq_kpi_snapshots_plant_period"),
+    )
+    op.create_index("ix_kpi_snapshots_id", "kpi_snapshots", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_kpi_snapshots_id", table_name="kpi_snapshots")
+    op.drop_table("kpi_snapshots")
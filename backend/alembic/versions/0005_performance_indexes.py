@@ -0,0 +1,55 @@
+"""Composite indexes for per-plant measurement, alert and equipment-hours queries
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL so the upgrade does not
+block writes to large tables.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("idx_measurements_plant_timestamp", "measurements", ["plant_id", sa.text("timestamp DESC")]),
+    ("idx_alerts_plant_resolved", "alerts", ["plant_id", "is_resolved", sa.text("created_at DESC")]),
+    ("idx_equipment_hours_equipment_date", "equipment_hours", ["equipment_id", "date"]),
+)
+
+
+def _invalid(name: str) -> bool:
+    """True if a previous concurrent build of this index failed half-way."""
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).first() is not None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+        return
+
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if _invalid(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=concurrently, if_exists=True)
@@ -0,0 +1,66 @@
+"""Daily equipment_hours keyed on a unique (equipment_id, date) for idempotent upserts
+
+``equipment_hours.date`` becomes a DATE: readings of the same day sent with
+different times or offsets are the same row. Duplicate days left by the old
+check-then-insert path are removed first, keeping the most recent row. The
+type change rewrites the table (ACCESS EXCLUSIVE on PostgreSQL), so there is
+no point building the unique index concurrently; it replaces the plain
+index from 0005.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = "uq_equipment_hours_equipment_date"
+OLD_INDEX = "idx_equipment_hours_equipment_date"
+
+
+def _has_constraint() -> bool:
+    """True if init_db's create_all already built the final table."""
+    constraints = sa.inspect(op.get_bind()).get_unique_constraints("equipment_hours")
+    return any(constraint["name"] == CONSTRAINT for constraint in constraints)
+
+
+def upgrade() -> None:
+    if _has_constraint():
+        return
+
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    day = "date::date" if postgresql else "date(date)"
+    op.execute(
+        "DELETE FROM equipment_hours WHERE id NOT IN "
+        f"(SELECT MAX(id) FROM equipment_hours GROUP BY equipment_id, {day})"
+    )
+    op.drop_index(OLD_INDEX, table_name="equipment_hours", if_exists=True)
+
+    if postgresql:
+        op.alter_column(
+            "equipment_hours", "date",
+            type_=sa.Date(), existing_nullable=False, postgresql_using="date::date",
+        )
+        op.create_unique_constraint(CONSTRAINT, "equipment_hours", ["equipment_id", "date"])
+        return
+
+    # SQLite stores both types as text, which the Date type reads back once
+    # only the day is left; the declared type is kept because batch mode
+    # would CAST the values to a number
+    op.execute("UPDATE equipment_hours SET date = date(date)")
+    with op.batch_alter_table("equipment_hours") as batch:
+        batch.create_unique_constraint(CONSTRAINT, ["equipment_id", "date"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("equipment_hours") as batch:
+        batch.drop_constraint(CONSTRAINT, type_="unique")
+        if op.get_bind().dialect.name == "postgresql":
+            batch.alter_column("date", type_=sa.DateTime(timezone=True), existing_nullable=False)
+    op.create_index(OLD_INDEX, "equipment_hours", ["equipment_id", "date"], if_not_exists=True)
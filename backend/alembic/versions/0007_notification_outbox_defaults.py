@@ -0,0 +1,43 @@
+"""Server defaults for notification_outbox.status and attempts
+
+0002 created both columns NOT NULL without a server default, so inserts
+that bypass the ORM defaults failed. Databases created by init_db's
+create_all already have the defaults and are left alone.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+DEFAULTS = {"status": "pending", "attempts": "0"}
+
+
+def _missing_defaults() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("notification_outbox")
+    return any(column["default"] is None for column in columns if column["name"] in DEFAULTS)
+
+
+def upgrade() -> None:
+    if not _missing_defaults():
+        return
+
+    # SQLite can only change a default by rebuilding the table
+    with op.batch_alter_table("notification_outbox", recreate="auto") as batch:
+        batch.alter_column("status", existing_type=sa.String(20), existing_nullable=False,
+                           server_default=DEFAULTS["status"])
+        batch.alter_column("attempts", existing_type=sa.Integer(), existing_nullable=False,
+                           server_default=DEFAULTS["attempts"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("notification_outbox") as batch:
+        batch.alter_column("status", existing_type=sa.String(20), existing_nullable=False, server_default=None)
+        batch.alter_column("attempts", existing_type=sa.Integer(), existing_nullable=False, server_default=None)
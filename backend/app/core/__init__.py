@@ -1,5 +1,5 @@
 from app.core.config import settings
-from app.core.database import Base, engine, get_db, init_db
+from app.core.database import Base, engine, async_engine, get_db, get_read_db, init_db
 from app.core.security import (
     verify_password,
     get_password_hash,
@@ -8,13 +8,16 @@ from app.core.security import (
     decode_token,
     get_current_user,
     require_role,
+    Principal,
 )
 
 __all__ = [
     "settings",
     "Base",
     "engine",
+    "async_engine",
     "get_db",
+    "get_read_db",
     "init_db",
     "verify_password",
     "get_password_hash",
@@ -23,4 +26,5 @@ __all__ = [
     "decode_token",
     "get_current_user",
     "require_role",
+    "Principal",
 ]
@@ -0,0 +1,219 @@
+"""
+Admission control: per-user rate limits and load shedding for analytics.
+
+Every API request spends tokens from its caller's token bucket (the JWT
+subject, or the client address for anonymous requests). Heavy analytics
+routes (HEAVY_ROUTES) cost more the longer their ``days`` window, also
+spend from a bucket per caller and route, and share a per-worker
+concurrency limit, so one user pulling years of trends cannot starve the
+rest. Rejections fail fast instead of queueing until a timeout:
+
+- 429 when the caller's bucket is empty or the caller already has
+  HEAVY_CONCURRENCY_PER_USER analytics requests running
+- 503 when the worker already runs HEAVY_CONCURRENCY analytics requests
+
+Both carry ``Retry-After``. State is per worker process, so rates and bursts
+are divided by WEB_CONCURRENCY. All state is only touched from the event
+loop.
+"""
+from typing import Callable, Dict, Optional, Tuple
+from collections import defaultdict
+import json
+import math
+import time
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_template
+from app.core.security import decode_token
+
+IDLE_BUCKET_SECONDS = 300  # Buckets untouched this long are full again and dropped
+SWEEP_SECONDS = 60
+
+RouteKey = Tuple[str, str]
+Rejection = Tuple[int, int, str]  # (status, Retry-After seconds, detail)
+
+
+def _window_cost(params: QueryParams) -> float:
+    """One token per 30 days of data scanned (trends for 365 days cost ~12)."""
+    try:
+        days = int(params.get("days", 30))
+    except ValueError:
+        days = 30
+    return max(1.0, days / 30)
+
+
+# Analytics routes and their cost in tokens; every other route costs 1
+HEAVY_ROUTES: Dict[RouteKey, Callable[[QueryParams], float]] = {
+    ("GET", "/api/v1/dashboard/trends"): _window_cost,
+    ("GET", "/api/v1/dashboard/kpis"): _window_cost,
+    ("GET", "/api/v1/dashboard/overview"): lambda params: 2 * _window_cost(params),  # Every plant
+    ("GET", "/api/v1/measurements/stats"): _window_cost,
+    ("GET", "/api/v1/alerts/stats/plants"): lambda params: 2.0,
+}
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until ``cost`` tokens are available (0 if they are now)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+
+class AdmissionController:
+    """Token buckets per caller and per caller/route, plus heavy-route slots."""
+
+    def __init__(
+        self,
+        user_rate: float,
+        user_burst: float,
+        heavy_rate: float,
+        heavy_burst: float,
+        heavy_concurrency: int,
+        heavy_per_user: int,
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.heavy_rate = heavy_rate
+        self.heavy_burst = heavy_burst
+        self.heavy_concurrency = heavy_concurrency
+        self.heavy_per_user = heavy_per_user
+        self.heavy_in_flight = 0
+        self.rejected: Dict[Tuple[str, str, int], int] = defaultdict(int)  # (method, route, status) -> count
+        self._heavy_by_caller: Dict[str, int] = defaultdict(int)
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+
+    def _bucket(self, key: tuple, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        return bucket
+
+    def _sweep(self, now: float) -> None:
+        if now - self._last_sweep < SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        for key in [k for k, b in self._buckets.items() if now - b.updated > IDLE_BUCKET_SECONDS]:
+            del self._buckets[key]
+
+    def admit(self, caller: str, route: RouteKey, params: QueryParams) -> Optional[Rejection]:
+        """Spend the request's tokens and take a heavy slot, or say why not."""
+        now = time.monotonic()
+        self._sweep(now)
+        cost_of = HEAVY_ROUTES.get(route)
+        heavy = cost_of is not None
+        cost = cost_of(params) if heavy else 1.0
+
+        buckets = [self._bucket(("user", caller), self.user_rate, self.user_burst, now)]
+        if heavy:
+            buckets.append(self._bucket(("route", caller, route), self.heavy_rate, self.heavy_burst, now))
+        # A request larger than the burst would never fit; it drains a full bucket instead
+        waits = [bucket.wait_time(min(cost, bucket.burst), now) for bucket in buckets]
+        if max(waits) > 0:
+            return self._reject(route, 429, max(waits), "Demasiadas solicitudes, intente nuevamente más tarde")
+        if heavy and self._heavy_by_caller[caller] >= self.heavy_per_user:
+            return self._reject(route, 429, 1, "Demasiadas consultas de análisis simultáneas")
+        if heavy and self.heavy_in_flight >= self.heavy_concurrency:
+            return self._reject(route, 503, 1, "Servidor ocupado con consultas de análisis, intente nuevamente")
+
+        for bucket in buckets:
+            bucket.take(min(cost, bucket.burst))
+        if heavy:
+            self.heavy_in_flight += 1
+            self._heavy_by_caller[caller] += 1
+        return None
+
+    def release(self, caller: str, route: RouteKey) -> None:
+        """Free the heavy slot taken by an admitted request."""
+        if route not in HEAVY_ROUTES:
+            return
+        self.heavy_in_flight -= 1
+        self._heavy_by_caller[caller] -= 1
+        if not self._heavy_by_caller[caller]:
+            del self._heavy_by_caller[caller]
+
+    def _reject(self, route: RouteKey, status: int, wait: float, detail: str) -> Rejection:
+        self.rejected[(*route, status)] += 1
+        return status, max(1, math.ceil(wait)), detail
+
+
+def caller_key(scope: Scope) -> str:
+    """The JWT subject if the request carries a valid token, else the client address."""
+    authorization = Headers(scope=scope).get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        payload = decode_token(authorization[7:])
+        if payload and payload.get("sub") is not None:
+            return f"user:{payload['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class AdmissionMiddleware:
+    """Apply the admission controller to /api requests."""
+
+    def __init__(self, app: ASGIApp, controller: "AdmissionController" = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.RATE_LIMIT_ENABLED
+            or not scope["path"].startswith("/api/")
+            or scope["method"] == "OPTIONS"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        caller = caller_key(scope)
+        route = (scope["method"], route_template(scope))
+        rejection = self.controller.admit(caller, route, QueryParams(scope["query_string"]))
+        if rejection is not None:
+            status, retry_after, detail = rejection
+            body = json.dumps({"detail": detail}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(caller, route)
+
+
+_workers = max(settings.WEB_CONCURRENCY, 1)
+
+# Singleton instance
+admission_controller = AdmissionController(
+    user_rate=settings.RATE_LIMIT_USER_RATE / _workers,
+    user_burst=settings.RATE_LIMIT_USER_BURST / _workers,
+    heavy_rate=settings.RATE_LIMIT_HEAVY_RATE / _workers,
+    heavy_burst=settings.RATE_LIMIT_HEAVY_BURST / _workers,
+    heavy_concurrency=settings.HEAVY_CONCURRENCY,
+    heavy_per_user=settings.HEAVY_CONCURRENCY_PER_USER,
+)
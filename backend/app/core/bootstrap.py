@@ -0,0 +1,74 @@
+"""
+One-time startup work: schema migration and default data.
+
+Every uvicorn worker runs the application lifespan, so this work is
+serialized with a PostgreSQL advisory lock: the first worker migrates and
+seeds while the others wait, then find the schema at head and the data in
+place. With ``DB_AUTO_MIGRATE=false`` the schema step is skipped and left to
+the deploy (``alembic upgrade head``).
+"""
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal, advisory_lock, init_db
+from app.core.metrics import startup_metrics
+
+# Arbitrary app-wide key for pg_advisory_lock
+STARTUP_LOCK_KEY = 0x50544153  # "PTAS"
+
+
+def seed_default_data() -> None:
+    """Create the demo plant and default admin on an empty database."""
+    from app.models.user import User
+    from app.models.plant import Plant
+    from app.core.security import get_password_hash
+
+    db = SessionLocal()
+    try:
+        # Check if admin exists
+        admin = db.query(User).filter(User.username == "admin").first()
+        if not admin:
+            # Create default plant first
+            plant = Plant(
+                name="PTAS demo",
+                code="PTAS-001",
+                address="Demo",
+                region="Metropolitana",
+                capacity_m3d=500,
+                population_equiv=2000,
+                treatment_type="Lodos Activados",
+                status="active"
+            )
+            db.add(plant)
+            db.flush()  # Get plant.id
+
+            # Create default admin
+            admin = User(
+                email="admin@ptas.cl",
+                username="admin",
+                password_hash=get_password_hash("admin123"),
+                full_name="Administrador PTAS",
+                role="administrador",
+                is_active=True,
+                plant_id=plant.id
+            )
+            db.add(admin)
+            db.commit()
+            print("✅ Default admin user created: admin / admin123")
+    except Exception as e:
+        print(f"⚠️ Error creating default data: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def bootstrap() -> None:
+    """Migrate (unless disabled) and seed, once across all workers."""
+    waiting = time.perf_counter()
+    with advisory_lock(STARTUP_LOCK_KEY):
+        startup_metrics.phases["lock_wait"] = time.perf_counter() - waiting
+        if settings.DB_AUTO_MIGRATE:
+            with startup_metrics.phase("schema"):
+                init_db()
+        with startup_metrics.phase("seed"):
+            seed_default_data()
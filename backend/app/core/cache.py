@@ -0,0 +1,98 @@
+"""
+In-process caching utilities.
+
+Each worker has its own caches; writes invalidate them on all workers
+through app.core.invalidation.
+"""
+from typing import Any, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry expiry.
+
+    Every invalidation bumps the key's generation. Readers that compute a
+    value take ``generation(key)`` first and pass it to ``set``; the value
+    is dropped if a write invalidated the key in between, so a slow reader
+    never re-caches data older than the write.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0  # Bumped by clear()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def generation(self, key: Hashable) -> Tuple[int, int]:
+        """Current invalidation generation of a key."""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[Tuple[int, int]] = None) -> bool:
+        """Store a value. Returns False if the key was invalidated since ``generation``."""
+        if self.ttl_seconds <= 0:
+            return False
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key, 0)):
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key and bump its generation."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+
+# Per-plant dashboard summary snapshots: (data version, pre-serialized JSON)
+dashboard_cache = TTLCache(ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+# Authenticated principals by user id (see core.security.get_current_user)
+principal_cache = TTLCache(ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS, max_size=10000)
+
+
+invalidation_bus.register("dashboard", dashboard_cache)
+invalidation_bus.register("principal", principal_cache)
+
+
+def invalidate_plant(plant_id: int) -> None:
+    """Invalidate cached read models after a write to a plant's data.
+
+    Called by the measurement, alert, equipment and plant write paths.
+    Evicts on every worker through the invalidation bus.
+    """
+    invalidation_bus.publish("dashboard", plant_id)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user's cached principal on every worker after the user changed."""
+    invalidation_bus.publish("principal", user_id)
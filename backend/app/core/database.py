@@ -1,17 +1,79 @@
 """
 Database connection and session management.
+
+Request handlers use the async engine (asyncpg / aiosqlite) through
+``get_db``. Read-only endpoints use ``get_read_db``, which routes to a read
+replica when ``DATABASE_REPLICA_URLS`` is set. The sync engine serves startup
+tasks and background jobs, which run in worker threads.
+
+``QueryCancellationMiddleware`` bounds request queries: every transaction
+opened while serving a route starts with ``SET LOCAL statement_timeout``
+(see app.core.statement_timeouts), and read-only requests are cancelled,
+queries included, when the client disconnects before the response starts.
 """
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import AsyncAdaptedQueuePool, QueuePool, create_engine, event, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import UNACCOUNTED, instrumented_pool, route_metrics, route_template
+from app.core.statement_timeouts import statement_timeout_ms
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Sync URL scheme -> async driver
+ASYNC_DRIVERS = (
+    ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+    ("sqlite://", "sqlite+aiosqlite://"),
+)
+
+
+def async_database_url(url: str) -> str:
+    """Async-driver equivalent of a sync database URL."""
+    for sync_prefix, async_prefix in ASYNC_DRIVERS:
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def pool_limits() -> Tuple[int, int]:
+    """(pool_size, max_overflow) for the request pools of this worker.
+
+    With DB_MAX_CONNECTIONS set, the configured sizes are capped so that
+    WEB_CONCURRENCY workers, each also holding its sync pool, fit in it.
+    """
+    size, overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS > 0:
+        budget = settings.DB_MAX_CONNECTIONS // max(settings.WEB_CONCURRENCY, 1)
+        budget -= settings.DB_SYNC_POOL_SIZE + settings.DB_SYNC_MAX_OVERFLOW
+        size = max(min(size, budget), 1)
+        overflow = max(min(overflow, budget - size), 0)
+    return size, overflow
+
 
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=instrumented_pool(QueuePool, "sync"),
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.DB_SYNC_POOL_SIZE,
+    max_overflow=settings.DB_SYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE
 )
 
 # Session factory
@@ -21,20 +83,258 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+
+def _create_async_engine(url: str, name: str):
+    # The pool class is explicit because aiosqlite would otherwise default to
+    # NullPool (a connection per request).
+    pool_size, max_overflow = pool_limits()
+    return create_async_engine(
+        async_database_url(url),
+        poolclass=instrumented_pool(AsyncAdaptedQueuePool, name),
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE
+    )
+
+
+# Async engine for request handlers
+async_engine = _create_async_engine(settings.DATABASE_URL, "primary")
+
+# Async engines for read replicas, picked round-robin by get_read_db
+replica_engines = [
+    _create_async_engine(url, f"replica-{index}")
+    for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+_replica_cycle = itertools.cycle(replica_engines)
+
+# Statement timeout (ms) of the request being served; None outside requests
+_statement_timeout: ContextVar[Optional[int]] = ContextVar("statement_timeout", default=None)
+
+# SQLSTATE of a statement cancelled by statement_timeout (or pg_cancel_backend)
+QUERY_CANCELED = "57014"
+
+# Cookie marking a client that wrote recently (see ReadYourWritesMiddleware)
+READ_YOUR_WRITES_COOKIE = "ptas_rw"
+
+# Async session factory; objects stay loaded after commit (no lazy reloads)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether get_read_db serves this request from the primary."""
+    return not replica_engines or READ_YOUR_WRITES_COOKIE in request.cookies
+
+
+async def get_read_db(request: Request):
+    """Dependency to get an async session for read-only endpoints.
+
+    Uses a replica unless none is configured or the client wrote recently,
+    in which case it reads from the primary so it sees its own changes.
+    """
+    if reads_from_primary(request):
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    async with AsyncSessionLocal(bind=next(_replica_cycle)) as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """Pin a client to the primary for a short while after it writes.
+
+    Successful non-GET requests set a short-lived cookie that get_read_db
+    honours, so replica lag never hides the client's own changes. The state
+    lives in the client, so it works across workers.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: int = settings.READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replica_engines or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}=1; Max-Age={self.max_age}; Path=/api; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session, transaction, connection) -> None:
+    # SET LOCAL lasts until the transaction ends, so it is issued again for
+    # every transaction of the request and never leaks to the next checkout.
+    timeout = _statement_timeout.get()
+    if timeout and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {int(timeout)}", execution_options=UNACCOUNTED
+        )
+
+
+class QueryCancellationMiddleware:
+    """Apply per-route statement timeouts and cancel abandoned reads.
+
+    For GET/HEAD requests the handler runs in its own task while the client
+    connection is watched; a disconnect before the response starts cancels
+    the task, which makes asyncpg cancel the running query on the server and
+    returns the connection to the pool. Writes always run to completion.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        route = (scope["method"], route_template(scope))
+        token = _statement_timeout.set(statement_timeout_ms(route))
+        try:
+            if scope["method"] in ("GET", "HEAD"):
+                await self._run_until_disconnect(route, scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            _statement_timeout.reset(token)
+
+    async def _run_until_disconnect(self, route: Tuple[str, str], scope: Scope, receive: Receive, send: Send) -> None:
+        messages: asyncio.Queue = asyncio.Queue()
+        response_started = False
+
+        async def watch() -> None:
+            # Sole reader of the connection; the handler reads from the queue
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self.app(scope, messages.get, send_wrapper))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await asyncio.wait((handler, watcher), return_when=asyncio.FIRST_COMPLETED)
+            if not handler.done() and not response_started:
+                handler.cancel()
+                try:
+                    await handler
+                except asyncio.CancelledError:
+                    pass
+                route_metrics.cancelled[route] = route_metrics.cancelled.get(route, 0) + 1
+                # Recorded by MetricsMiddleware as 499; the server drops it
+                await send({"type": "http.response.start", "status": 499, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await handler
+        finally:
+            handler.cancel()
+            watcher.cancel()
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    """Whether a database error is a statement cancelled by statement_timeout."""
+    orig = getattr(exc, "orig", None)
+    return (getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)) == QUERY_CANCELED
+
+
+async def database_timeout_handler(request: Request, exc: Exception) -> JSONResponse:
+    """503 for statements over their timeout and exhausted connection pools."""
+    if isinstance(exc, DBAPIError):
+        if not is_statement_timeout(exc):
+            raise exc
+        route_metrics.statement_timeouts += 1
+        detail, retry_after = "La consulta excedió el tiempo máximo, acote el período o intente más tarde", 10
+    else:
+        detail, retry_after = "Base de datos ocupada, intente nuevamente", 1
+    return JSONResponse(
+        status_code=503,
+        content={"detail": detail},
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
+async def dispose_engines():
+    """Close the primary and replica async pools."""
+    await async_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
+
+@contextmanager
+def advisory_lock(key: int) -> Iterator[None]:
+    """Run the block in one process at a time across all workers and hosts.
+
+    Uses a PostgreSQL session advisory lock on a dedicated autocommit
+    connection, so it holds no snapshot that could block concurrent index
+    builds. Other databases (SQLite in development) have a single process and
+    just run the block.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+
+
+def dialect_insert(db):
+    """Dialect-specific INSERT construct (supports ON CONFLICT upserts)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
 
 
 def init_db():
-    """Initialize database tables."""
-    from app.models import user, plant, measurement, equipment, alert
-    Base.metadata.create_all(bind=engine)
+    """Bring the schema to the latest Alembic revision.
+
+    An empty database is built from the models (which always match the latest
+    migration) and stamped at head. Anything else, including databases created
+    with ``create_all`` before Alembic owned the schema, is upgraded through
+    the migrations, so indexes added later reach existing installations too.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from app.models import user, plant, measurement, equipment, alert, notification, kpi
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False  # Keep the app's logging setup
+    if inspect(engine).get_table_names():
+        command.upgrade(config, "head")
+    else:
+        Base.metadata.create_all(bind=engine)
+        command.stamp(config, "head")
@@ -0,0 +1,225 @@
+"""
+Cross-worker cache invalidation bus.
+
+In-process caches (app.core.cache) register here under a name. A write calls
+``invalidation_bus.publish(cache, key)``: the key is evicted locally at once
+and the event is broadcast so every other worker and replica evicts it too.
+
+Transports:
+
+- ``PostgresTransport``: LISTEN/NOTIFY on ``CACHE_INVALIDATION_CHANNEL`` over
+  a dedicated asyncpg connection (outside the request pools). Events missed
+  while the connection is down cannot be replayed, so every registered cache
+  is cleared after a reconnect.
+- ``MemoryTransport``: fan-out between buses attached to the same
+  ``MemoryHub`` in this process; single-process deployments (SQLite) and
+  tests, where several buses with their own caches stand in for workers.
+
+``publish`` is safe from any thread (request handlers, commit hooks and
+background jobs); before ``start`` or without a running transport it only
+evicts locally.
+"""
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+import asyncio
+import json
+import logging
+import threading
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_SECONDS = (1, 2, 5, 10, 30)  # Backoff between listener reconnects
+KEEPALIVE_SECONDS = 5  # Idle listener pings to notice a dropped connection
+ALL_KEYS = None  # Key of an event that clears the whole cache
+
+Deliver = Callable[[str], None]
+
+
+class MemoryHub:
+    """Connects the memory transports of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._transports: Set["MemoryTransport"] = set()
+
+    def attach(self, transport: "MemoryTransport") -> None:
+        with self._lock:
+            self._transports.add(transport)
+
+    def detach(self, transport: "MemoryTransport") -> None:
+        with self._lock:
+            self._transports.discard(transport)
+
+    def broadcast(self, sender: "MemoryTransport", payload: str) -> None:
+        with self._lock:
+            receivers = [t for t in self._transports if t is not sender]
+        for transport in receivers:
+            transport.deliver(payload)
+
+
+class MemoryTransport:
+    """In-process transport; delivers synchronously to the other buses on the hub."""
+
+    def __init__(self, hub: MemoryHub):
+        self.hub = hub
+        self.deliver: Deliver = lambda payload: None
+
+    async def start(self, deliver: Deliver, on_reconnect: Callable[[], None]) -> None:
+        self.deliver = deliver
+        self.hub.attach(self)
+
+    def send(self, payload: str) -> None:
+        self.hub.broadcast(self, payload)
+
+    async def stop(self) -> None:
+        self.hub.detach(self)
+
+
+class PostgresTransport:
+    """LISTEN/NOTIFY over one dedicated asyncpg connection per worker."""
+
+    def __init__(self, url: str, channel: str):
+        # asyncpg takes a plain libpq-style URL
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver, on_reconnect: Callable[[], None]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._outbox = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(deliver, on_reconnect))
+
+    def send(self, payload: str) -> None:
+        """Queue a NOTIFY; callable from any thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._outbox.put_nowait, payload)
+
+    async def _run(self, deliver: Deliver, on_reconnect: Callable[[], None]) -> None:
+        import asyncpg
+
+        attempt = 0
+        pending: Optional[str] = None  # Kept across reconnects if sending it failed
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                own_pid = conn.get_server_pid()
+
+                def listener(connection, pid, channel, payload) -> None:
+                    if pid != own_pid:  # Our own events were already applied locally
+                        deliver(payload)
+
+                await conn.add_listener(self.channel, listener)
+                if attempt:
+                    logger.warning("Cache invalidation listener reconnected; clearing caches")
+                    on_reconnect()
+                attempt = 0
+                while True:
+                    if pending is None:
+                        try:
+                            pending = await asyncio.wait_for(self._outbox.get(), KEEPALIVE_SECONDS)
+                        except asyncio.TimeoutError:
+                            await conn.execute("SELECT 1")
+                            continue
+                    await conn.execute("SELECT pg_notify($1, $2)", self.channel, pending)
+                    pending = None
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                delay = RECONNECT_SECONDS[min(attempt, len(RECONNECT_SECONDS) - 1)]
+                logger.exception("Cache invalidation listener failed; retrying in %ss", delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+
+class InvalidationBus:
+    """Evicts cache keys locally and on every other worker."""
+
+    def __init__(self, transport=None):
+        self.transport = transport
+        self._caches: Dict[str, Any] = {}
+        self._running = False
+        self.published = 0
+        self.received = 0
+
+    def register(self, name: str, cache: Any) -> None:
+        """Attach a cache with ``invalidate(key)`` and ``clear()`` under a name.
+
+        Keys travel as JSON, so they must be ints or strings.
+        """
+        self._caches[name] = cache
+
+    def publish(self, name: str, key: Optional[Hashable] = ALL_KEYS) -> None:
+        """Evict ``key`` (or everything) from the named cache on all workers."""
+        self._apply(name, key)
+        self.published += 1
+        if self._running:
+            self.transport.send(json.dumps({"cache": name, "key": key}))
+
+    def _apply(self, name: str, key: Optional[Hashable]) -> None:
+        cache = self._caches.get(name)
+        if cache is None:
+            return
+        if key is ALL_KEYS:
+            cache.clear()
+        else:
+            cache.invalidate(key)
+
+    def _receive(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            self._apply(event["cache"], event["key"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed cache invalidation event: %r", payload)
+            return
+        self.received += 1
+
+    def clear_all(self) -> None:
+        """Clear every registered cache (e.g. after missing events)."""
+        for cache in self._caches.values():
+            cache.clear()
+
+    async def start(self) -> None:
+        if self.transport is None:
+            self.transport = default_transport()
+        if not self._running:
+            await self.transport.start(self._receive, self.clear_all)
+            self._running = True
+
+    async def stop(self) -> None:
+        if self._running:
+            self._running = False
+            await self.transport.stop()
+
+
+def default_transport():
+    """Transport selected by CACHE_INVALIDATION_BACKEND (auto: by DATABASE_URL)."""
+    backend = settings.CACHE_INVALIDATION_BACKEND
+    if backend == "auto":
+        backend = "postgres" if settings.DATABASE_URL.startswith("postgresql") else "memory"
+    if backend == "postgres":
+        return PostgresTransport(settings.DATABASE_URL, settings.CACHE_INVALIDATION_CHANNEL)
+    return MemoryTransport(memory_hub)
+
+
+# Singleton instances
+memory_hub = MemoryHub()
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,460 @@
+"""
+Runtime metrics: HTTP requests, database queries and connection pools.
+
+``MetricsMiddleware`` records per-route latency, status counts and in-flight
+requests. Cursor hooks on every engine count queries and DB time against the
+request being served (tracked in a context variable, which follows the
+request through AsyncSession and run_sync), enforce per-route query budgets
+(see app.core.query_budgets) and log slow queries. Each engine
+also gets a pool subclass that times checkouts (the wait for a free
+connection, which is where requests stall when a pool is undersized) and
+tracks connection ages. ``render_metrics`` writes everything in the
+Prometheus text format, along with ``startup_metrics``, the cold-start
+timeline of the worker (import, schema, seed and time to first request).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.query_budgets import QUERY_BUDGETS
+
+logger = logging.getLogger(__name__)
+
+# Checkout wait buckets (seconds)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Request latency and per-request DB time buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Queries per request buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Execution options for session housekeeping statements (e.g. SET LOCAL),
+# which are neither counted nor held against query budgets
+UNACCOUNTED = {"unaccounted": True}
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds (Prometheus style)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"buckets": buckets, "sum": total, "count": count}
+
+
+class PoolStats:
+    """Checkout waits, timeouts and live connection ages for one pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.timeouts = 0
+        self.connected_at: Dict[int, float] = {}
+
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connected_at[id(connection_record)] = time.monotonic()
+
+    def on_close(self, dbapi_connection, connection_record) -> None:
+        self.connected_at.pop(id(connection_record), None)
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        now = time.monotonic()
+        ages = [now - started for started in list(self.connected_at.values())]
+        return {
+            "pool": self.name,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "timeouts": self.timeouts,
+            "connections": len(ages),
+            "connection_age_max_seconds": round(max(ages), 1) if ages else 0.0,
+            "connection_age_avg_seconds": round(sum(ages) / len(ages), 1) if ages else 0.0,
+            "checkout_wait_seconds": self.wait.snapshot(),
+        }
+
+
+class QueryBudgetExceeded(Exception):
+    """A request (or counted block) issued more SQL statements than its budget."""
+
+
+class RequestStats:
+    """Queries issued and DB time spent while serving one request."""
+
+    __slots__ = ("route", "queries", "db_time", "budget", "strict")
+
+    def __init__(self, route: str, budget: Optional[int] = None, strict: bool = False):
+        self.route = route
+        self.queries = 0
+        self.db_time = 0.0
+        self.budget = budget
+        self.strict = strict  # Fail the statement that goes over budget
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class RouteMetrics:
+    """Per-route request metrics, keyed by (method, route template)."""
+
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        self.over_budget: Dict[Tuple[str, str], int] = {}
+        self.cancelled: Dict[Tuple[str, str], int] = {}  # Client disconnected mid-request
+        self.slow_queries = 0
+        self.statement_timeouts = 0
+        self._lock = threading.Lock()
+
+    def _histogram(self, family: Dict, key: Tuple[str, str], buckets: Sequence[float]) -> Histogram:
+        histogram = family.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = family.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def started(self, key: Tuple[str, str]) -> None:
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finished(self, key: Tuple[str, str], status: int, elapsed: float, stats: RequestStats) -> None:
+        self.in_flight[key] -= 1
+        status_key = (*key, str(status))
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+        self._histogram(self.latency, key, LATENCY_BUCKETS).observe(elapsed)
+        self._histogram(self.queries, key, QUERY_COUNT_BUCKETS).observe(stats.queries)
+        self._histogram(self.db_time, key, LATENCY_BUCKETS).observe(stats.db_time)
+        if stats.budget is not None and stats.queries > stats.budget:
+            self.over_budget[key] = self.over_budget.get(key, 0) + 1
+            logger.warning("%s issued %d queries (budget %d)", stats.route, stats.queries, stats.budget)
+
+
+# Singleton instance
+route_metrics = RouteMetrics()
+
+
+class StartupMetrics:
+    """Cold-start timeline of this worker process.
+
+    ``began`` is reset by app.main before its first import; ``phase`` times
+    the startup steps and the first response served closes the timeline.
+    """
+
+    def __init__(self):
+        self.began = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.first_request: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def request_finished(self) -> None:
+        if self.first_request is not None:
+            return
+        self.first_request = time.perf_counter() - self.began
+        steps = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        print(f"⏱️  First request served {self.first_request:.2f}s after start ({steps})")
+
+
+# Singleton instance
+startup_metrics = StartupMetrics()
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route a request will hit (low-cardinality label)."""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Record latency, status, in-flight count and DB usage per route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["method"], route_template(scope))
+        mode = settings.QUERY_BUDGET_MODE
+        stats = RequestStats(
+            " ".join(key),
+            budget=QUERY_BUDGETS.get(key) if mode != "off" else None,
+            strict=mode == "raise",
+        )
+        token = _current_request.set(stats)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        route_metrics.started(key)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route_metrics.finished(key, status, time.perf_counter() - started, stats)
+            startup_metrics.request_finished()
+            _current_request.reset(token)
+
+
+@contextmanager
+def count_queries(budget: Optional[int] = None, label: str = "block") -> Iterator[RequestStats]:
+    """Count the SQL statements issued inside the block.
+
+    With a budget, the statement that exceeds it raises QueryBudgetExceeded::
+
+        with count_queries(budget=2) as stats:
+            await db.execute(...)
+    """
+    stats = RequestStats(label, budget=budget, strict=budget is not None)
+    token = _current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_request.reset(token)
+
+
+def missing_query_budgets(routes: Sequence) -> List[str]:
+    """API routes (as "METHOD /path") that have no declared query budget."""
+    missing = []
+    for route in routes:
+        for method in sorted(getattr(route, "methods", None) or ()):
+            if isinstance(route, APIRoute) and (method, route.path) not in QUERY_BUDGETS:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current_request.get()
+    if context is not None and context.execution_options.get("unaccounted"):
+        stats = None
+    if stats is not None and stats.strict and stats.budget is not None and stats.queries >= stats.budget:
+        raise QueryBudgetExceeded(
+            f"{stats.route} exceeded its budget of {stats.budget} queries: {' '.join(statement.split())[:200]}"
+        )
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current_request.get()
+    if stats is not None and not (context is not None and context.execution_options.get("unaccounted")):
+        stats.queries += 1
+        stats.db_time += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        route_metrics.slow_queries += 1
+        logger.warning(
+            "Slow query (%.0f ms) in %s: %s",
+            elapsed * 1000,
+            stats.route if stats is not None else "background job",
+            " ".join(statement.split())[:1000],
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not run for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+# Instrumented pools by name
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def instrumented_pool(pool_class: type, name: str) -> type:
+    """Subclass of pool_class that reports to a PoolStats registered as name.
+
+    The stats hang off the class, so they survive ``engine.dispose()``,
+    which recreates the pool from the same class.
+    """
+    stats = PoolStats(name)
+    pool_stats[name] = stats
+
+    class InstrumentedPool(pool_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # Listeners carry over when dispose() recreates the pool
+            for identifier, listener in (
+                ("connect", stats.on_connect),
+                ("close", stats.on_close),
+                ("detach", stats.on_close),
+            ):
+                if not event.contains(self, identifier, listener):
+                    event.listen(self, identifier, listener)
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                stats.timeouts += 1
+                raise
+            finally:
+                stats.wait.observe(time.perf_counter() - started)
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    InstrumentedPool.stats = stats
+    return InstrumentedPool
+
+
+def pool_metrics(engines: Sequence) -> List[Dict[str, Any]]:
+    """Snapshot of every instrumented pool among the given engines."""
+    snapshots = []
+    for engine in engines:
+        pool = getattr(engine, "sync_engine", engine).pool
+        stats = getattr(type(pool), "stats", None)
+        if stats is not None:
+            snapshots.append(stats.snapshot(pool))
+    return snapshots
+
+
+def _labels(**labels: str) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, labels: Dict[str, str], histogram: Histogram) -> List[str]:
+    snapshot = histogram.snapshot()
+    lines = [f"{name}_bucket{_labels(**labels, le=bound)} {count}" for bound, count in snapshot["buckets"].items()]
+    lines.append(f"{name}_sum{_labels(**labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(**labels)} {snapshot['count']}")
+    return lines
+
+
+def render_metrics(engines: Sequence) -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    family("ptas_http_requests_total", "counter", "HTTP responses by route and status.")
+    for (method, route, status), count in sorted(route_metrics.responses.items()):
+        lines.append(f"ptas_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    family("ptas_http_requests_in_flight", "gauge", "Requests being served by route.")
+    for (method, route), count in sorted(route_metrics.in_flight.items()):
+        lines.append(f"ptas_http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+    for name, source, help_text in (
+        ("ptas_http_request_duration_seconds", route_metrics.latency, "Request latency by route."),
+        ("ptas_db_queries_per_request", route_metrics.queries, "Database queries issued per request."),
+        ("ptas_db_time_per_request_seconds", route_metrics.db_time, "Time spent in database queries per request."),
+    ):
+        family(name, "histogram", help_text)
+        for (method, route), histogram in sorted(source.items()):
+            lines.extend(_histogram_lines(name, {"method": method, "route": route}, histogram))
+
+    family("ptas_startup_seconds", "gauge", "Duration of each startup phase of this worker.")
+    for phase, seconds in startup_metrics.phases.items():
+        lines.append(f"ptas_startup_seconds{_labels(phase=phase)} {seconds:.6f}")
+    if startup_metrics.first_request is not None:
+        family("ptas_startup_first_request_seconds", "gauge", "Time from process start to the first response served.")
+        lines.append(f"ptas_startup_first_request_seconds {startup_metrics.first_request:.6f}")
+
+    family("ptas_cache_invalidations_total", "counter", "Cache invalidation events sent and received by this worker.")
+    lines.append(f"ptas_cache_invalidations_total{_labels(direction='published')} {invalidation_bus.published}")
+    lines.append(f"ptas_cache_invalidations_total{_labels(direction='received')} {invalidation_bus.received}")
+
+    family("ptas_db_query_budget_exceeded_total", "counter", "Requests that issued more queries than their budget.")
+    for (method, route), count in sorted(route_metrics.over_budget.items()):
+        lines.append(f"ptas_db_query_budget_exceeded_total{_labels(method=method, route=route)} {count}")
+
+    from app.core.admission import admission_controller  # Imports this module
+
+    family("ptas_admission_rejected_total", "counter", "Requests rejected by admission control by route and status.")
+    for (method, route, status), count in sorted(admission_controller.rejected.items()):
+        lines.append(f"ptas_admission_rejected_total{_labels(method=method, route=route, status=status)} {count}")
+    family("ptas_admission_heavy_in_flight", "gauge", "Analytics requests holding an admission slot.")
+    lines.append(f"ptas_admission_heavy_in_flight {admission_controller.heavy_in_flight}")
+
+    family("ptas_db_slow_queries_total", "counter", "Queries slower than SLOW_QUERY_MS.")
+    lines.append(f"ptas_db_slow_queries_total {route_metrics.slow_queries}")
+
+    family("ptas_db_statement_timeouts_total", "counter", "Requests that failed with 503 on a statement timeout.")
+    lines.append(f"ptas_db_statement_timeouts_total {route_metrics.statement_timeouts}")
+
+    family("ptas_http_requests_cancelled_total", "counter", "Read requests cancelled because the client disconnected.")
+    for (method, route), count in sorted(route_metrics.cancelled.items()):
+        lines.append(f"ptas_http_requests_cancelled_total{_labels(method=method, route=route)} {count}")
+
+    pools = pool_metrics(engines)
+    for key, kind, help_text in (
+        ("size", "gauge", "Configured pool size."),
+        ("checked_out", "gauge", "Connections checked out of the pool."),
+        ("overflow", "gauge", "Overflow connections in use."),
+        ("connections", "gauge", "Open connections."),
+        ("connection_age_max_seconds", "gauge", "Age of the oldest open connection."),
+        ("timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+    ):
+        name = f"ptas_db_pool_{key}" + ("_total" if kind == "counter" else "")
+        family(name, kind, help_text)
+        for snapshot in pools:
+            lines.append(f"{name}{_labels(pool=snapshot['pool'])} {snapshot[key]}")
+
+    family("ptas_db_pool_checkout_wait_seconds", "histogram", "Time waited for a pooled connection.")
+    for engine in engines:
+        stats = getattr(type(getattr(engine, "sync_engine", engine).pool), "stats", None)
+        if stats is not None:
+            lines.extend(_histogram_lines("ptas_db_pool_checkout_wait_seconds", {"pool": stats.name}, stats.wait))
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,60 @@
+"""
+Per-route SQL statement budgets.
+
+The maximum number of statements each route may issue per request, counted
+with cold caches (principal cache miss, no dashboard snapshot). A request
+that goes over its budget usually means a new N+1 (e.g. touching a lazy
+relationship in a loop) or a lost cache. Every API route must be listed;
+``QUERY_BUDGET_MODE=raise`` refuses to start when one is missing.
+"""
+from typing import Dict, Tuple
+
+QUERY_BUDGETS: Dict[Tuple[str, str], int] = {
+    # Service endpoints
+    ("GET", "/"): 0,
+    ("GET", "/health"): 0,
+    ("GET", "/metrics"): 0,
+    ("GET", "/metrics/pool"): 0,
+    # Auth
+    ("POST", "/api/v1/auth/login"): 2,  # Lookup + hash upgrade
+    ("POST", "/api/v1/auth/token"): 2,
+    ("POST", "/api/v1/auth/refresh"): 1,
+    ("POST", "/api/v1/auth/register"): 4,
+    ("GET", "/api/v1/auth/me"): 2,
+    # Plants
+    ("GET", "/api/v1/plants"): 2,
+    ("GET", "/api/v1/plants/{plant_id}"): 2,
+    ("POST", "/api/v1/plants"): 4,
+    ("PUT", "/api/v1/plants/{plant_id}"): 5,
+    ("DELETE", "/api/v1/plants/{plant_id}"): 4,
+    # Measurements
+    ("GET", "/api/v1/measurements"): 2,
+    ("GET", "/api/v1/measurements/stats"): 3,
+    ("GET", "/api/v1/measurements/{measurement_id}"): 2,
+    ("POST", "/api/v1/measurements"): 5,
+    ("PUT", "/api/v1/measurements/{measurement_id}"): 7,
+    ("POST", "/api/v1/measurements/{measurement_id}/validate"): 7,
+    # Equipment
+    ("GET", "/api/v1/equipment"): 2,
+    ("GET", "/api/v1/equipment/{equipment_id}"): 2,
+    ("POST", "/api/v1/equipment"): 4,
+    ("PUT", "/api/v1/equipment/{equipment_id}"): 5,
+    ("GET", "/api/v1/equipment/{equipment_id}/hours"): 2,
+    ("POST", "/api/v1/equipment/{equipment_id}/hours"): 4,
+    ("PUT", "/api/v1/equipment/hours"): 4,  # Equipment check + one upsert
+    # Alerts
+    ("GET", "/api/v1/alerts"): 2,
+    ("GET", "/api/v1/alerts/stats"): 3,
+    ("GET", "/api/v1/alerts/stats/plants"): 3,
+    ("GET", "/api/v1/alerts/{alert_id}"): 2,
+    ("POST", "/api/v1/alerts"): 7,  # +2 with notifications: recipients + outbox batch
+    ("PUT", "/api/v1/alerts/resolve"): 3,
+    ("PUT", "/api/v1/alerts/{alert_id}/resolve"): 5,
+    # Dashboard
+    ("GET", "/api/v1/dashboard/summary"): 2,  # Cache miss; a hit is auth only
+    ("GET", "/api/v1/dashboard/overview"): 8,
+    ("GET", "/api/v1/dashboard/trends"): 3,
+    ("GET", "/api/v1/dashboard/kpis"): 4,  # A snapshot miss falls back to the live query
+    # Real-time events (auth only; the stream itself does not query)
+    ("GET", "/api/v1/stream/plants/{plant_id}"): 1,
+}
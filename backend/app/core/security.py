@@ -1,23 +1,35 @@
 """
 Security utilities: JWT tokens and password hashing.
 """
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.cache import invalidate_user, principal_cache
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
 
-# Password context
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Password context; hashes below the configured rounds are flagged for rehash
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -30,6 +42,60 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash operations are already queued."""
+
+
+class PasswordHasher:
+    """Runs password hashing on a dedicated, bounded thread pool.
+
+    Hashing is CPU-bound; keeping it off the event loop and off the shared
+    threadpool means a login burst cannot stall unrelated requests. At most
+    ``workers`` hashes run at once and at most ``max_pending`` wait; beyond
+    that callers get PasswordHasherBusy instead of an ever-growing queue.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns a new hash if the stored one is outdated."""
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password."""
+        return await self._run(pwd_context.hash, password)
+
+    async def _run(self, func, *args):
+        if self._pending >= self.workers + self.max_pending:
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        # Only touched from the event loop, so a plain counter is enough
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the hashing threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -57,11 +123,52 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by authorization checks.
+
+    Detached from the session so it can be cached across requests.
+    """
+    id: int
+    role: str
+    plant_id: Optional[int]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, role=user.role, plant_id=user.plant_id, is_active=bool(user.is_active))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _track_user_change(mapper, connection, target: User) -> None:
+    """Remember changed users; their principals are dropped on commit."""
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from token."""
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Get current authenticated user from token.
+    
+    The principal is served from an in-process cache for up to
+    PRINCIPAL_CACHE_TTL_SECONDS; ORM updates and deletes of the user
+    invalidate it on commit.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
@@ -79,17 +186,25 @@ async def get_current_user(
     user_id = int(user_id_raw)
 
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None or not user.is_active:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        generation = principal_cache.generation(user_id)
+        user = await db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.set(user_id, principal, generation=generation)
+    
+    if not principal.is_active:
         raise credentials_exception
     
-    return user
+    return principal
 
 
 async def get_current_user_optional(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Optional[User]:
+    db: AsyncSession = Depends(get_db)
+) -> Optional[Principal]:
     """Get current user if authenticated, None otherwise."""
     try:
         return await get_current_user(token, db)
@@ -97,9 +212,25 @@ async def get_current_user_optional(
         return None
 
 
+async def get_current_user_stream(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = Query(default=None),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Get current user for streaming endpoints.
+
+    Browsers' EventSource cannot set headers, so the token may also be
+    passed as the ``access_token`` query parameter. The session is closed
+    right away so a long-lived stream does not hold a pooled connection.
+    """
+    user = await get_current_user(token or access_token or "", db)
+    await db.close()
+    return user
+
+
 def require_role(allowed_roles: list):
     """Dependency to require specific roles."""
-    async def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: Principal = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
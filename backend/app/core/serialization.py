@@ -0,0 +1,102 @@
+"""
+Fast response serialization with content negotiation.
+
+JSON is encoded with orjson. Clients that send ``Accept: application/msgpack``
+get MessagePack instead when the msgpack package is installed. Bulk read
+endpoints can skip Pydantic re-validation of rows that come straight from
+the database (``TRUSTED_SERIALIZATION``); the response schema still defines
+which columns are selected and returned.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Type
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Table
+
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # Optional: MessagePack negotiation is disabled without it
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    """Encode types orjson/msgpack do not handle natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode content as JSON bytes."""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    """Encode content as MessagePack bytes (datetimes as ISO strings)."""
+    return msgpack.packb(content, default=_default, use_bin_type=True, datetime=False)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that also encodes Decimal and ORM-derived values."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """Whether the client asked for MessagePack (and it is available)."""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def negotiated_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Encode content as MessagePack or JSON depending on the Accept header."""
+    response_class = MsgPackResponse if accepts_msgpack(request) else FastJSONResponse
+    response = response_class(content, status_code=status_code, headers=dict(headers or {}))
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def schema_columns(table: Table, schema: Type[BaseModel]) -> list:
+    """Table columns backing a response schema's fields, in schema order."""
+    return [table.c[name] for name in schema.model_fields if name in table.c]
+
+
+def serialize_rows(rows: Iterable[Mapping[str, Any]], schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Turn selected DB rows into response dicts.
+
+    In trusted mode rows are passed through as-is (the encoder handles
+    Decimal and datetime); otherwise each row is validated by the schema.
+    """
+    if settings.TRUSTED_SERIALIZATION:
+        return [dict(row) for row in rows]
+    return [schema.model_validate(dict(row)).model_dump() for row in rows]
@@ -0,0 +1,29 @@
+"""
+Per-route PostgreSQL statement timeouts.
+
+Routes not listed here use STATEMENT_TIMEOUT_MS. Analytics routes scan long
+date windows and get more room, but still a hard ceiling, so a runaway query
+is cancelled by the server and gives its connection back to the pool instead
+of holding it until the client gives up. STATEMENT_TIMEOUT_ROUTES (e.g.
+``{"GET /api/v1/dashboard/trends": 60000}``) overrides entries without a
+deploy. 0 means no timeout.
+"""
+from typing import Dict, Tuple
+
+from app.core.config import settings
+
+STATEMENT_TIMEOUTS: Dict[Tuple[str, str], int] = {
+    ("GET", "/api/v1/measurements/stats"): 20000,
+    ("GET", "/api/v1/alerts/stats/plants"): 20000,
+    ("GET", "/api/v1/dashboard/overview"): 30000,
+    ("GET", "/api/v1/dashboard/trends"): 30000,
+    ("GET", "/api/v1/dashboard/kpis"): 30000,
+}
+
+
+def statement_timeout_ms(route: Tuple[str, str]) -> int:
+    """Statement timeout (ms) for a (method, route template) pair."""
+    override = settings.STATEMENT_TIMEOUT_ROUTES.get(" ".join(route))
+    if override is not None:
+        return int(override)
+    return STATEMENT_TIMEOUTS.get(route, settings.STATEMENT_TIMEOUT_MS)
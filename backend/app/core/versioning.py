@@ -0,0 +1,122 @@
+"""
+Per-plant data versions and HTTP conditional requests (ETag).
+
+``plants.data_version`` is bumped in the same transaction as any ORM write
+to a plant's measurements, alerts or equipment (and to the plant itself).
+Read endpoints derive their ETag from the versions of the plants they cover,
+so ``If-None-Match`` can be answered with 304 after one primary-key lookup,
+without running the query or serializing the body. The version lives in the
+database, so every worker and replica agrees on it.
+
+The bump row-locks the plant until commit, so concurrent writers to one
+plant serialize on it (readers are not blocked). Measurement writes already
+do on the plant's KPI snapshot rows, so a counter table of its own would
+move the lock rather than remove it. To keep the lock short, ORM writes only
+record the plants they touch; the UPDATE runs right before commit, after
+the transaction's other statements.
+"""
+from typing import Iterable, List, Optional, Tuple
+import hashlib
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.alert import Alert
+from app.models.equipment import Equipment
+from app.models.measurement import Measurement
+from app.models.plant import Plant
+
+# Models whose writes change what plant read endpoints return
+PLANT_SCOPED_MODELS = (Measurement, Alert, Equipment)
+
+
+def bump_plant_versions(db: Session, plant_ids: Iterable[int]) -> None:
+    """Increment the data version of plants (within the caller's transaction)."""
+    ids = sorted({p for p in plant_ids if p is not None})
+    if not ids:
+        return
+    db.execute(
+        update(Plant)
+        .where(Plant.id.in_(ids))
+        .values(data_version=Plant.data_version + 1, updated_at=Plant.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Session.info key of the plants touched by the open transaction
+_TOUCHED_PLANTS = "touched_plant_ids"
+
+
+# Registered on Session itself so they also cover the sync sessions
+# that back AsyncSession
+@event.listens_for(Session, "before_flush")
+def _collect_on_flush(session: Session, flush_context, instances) -> None:
+    """Record the plants touched by pending ORM changes."""
+    plant_ids = session.info.setdefault(_TOUCHED_PLANTS, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, PLANT_SCOPED_MODELS):
+            plant_ids.add(obj.plant_id)
+        elif isinstance(obj, Plant) and obj.id is not None and session.is_modified(obj):
+            plant_ids.add(obj.id)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session: Session) -> None:
+    """Bump the versions of the touched plants as the last statement."""
+    session.flush()
+    bump_plant_versions(session, session.info.pop(_TOUCHED_PLANTS, ()))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_on_end(session: Session, transaction) -> None:
+    """Drop the plants of a rolled back or closed transaction."""
+    if transaction.parent is None:
+        session.info.pop(_TOUCHED_PLANTS, None)
+
+
+async def plant_versions(db: AsyncSession, plant_ids: Optional[List[int]] = None) -> List[Tuple[int, int]]:
+    """(plant id, data version) pairs for the given plants (all plants if None)."""
+    query = select(Plant.id, Plant.data_version)
+    if plant_ids is not None:
+        query = query.where(Plant.id.in_(plant_ids))
+    return sorted(tuple(row) for row in await db.execute(query))
+
+
+def etag_for(request: Request, versions: List[Tuple[int, int]]) -> str:
+    """Weak ETag for a read endpoint given the data versions it covers.
+
+    Combines the route, its query string, the plants' data versions and a
+    time bucket (rolling date windows move even without writes).
+    """
+    bucket = int(time.time() // settings.ETAG_TIME_BUCKET_SECONDS)
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{versions}|{bucket}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+async def plant_etag(db: AsyncSession, request: Request, plant_ids: Optional[List[int]] = None) -> str:
+    """Weak ETag for a read endpoint over the given plants (all plants if None)."""
+    return etag_for(request, await plant_versions(db, plant_ids))
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already holds this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in {tag.strip() for tag in header.split(",")}
+
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 response carrying the ETag."""
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def etag_headers(etag: str) -> dict:
+    """Headers that let clients revalidate with If-None-Match."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
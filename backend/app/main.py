@@ -2,12 +2,38 @@
 PTAS Backend - FastAPI Main Application
 Sistema de Gestión para Plantas de Tratamiento de Aguas Servidas
 """
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()  # Before the heavy imports below, for startup metrics
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import (
+    QueryCancellationMiddleware,
+    ReadYourWritesMiddleware,
+    async_engine,
+    database_timeout_handler,
+    dispose_engines,
+    engine,
+    replica_engines,
+)
+from app.core.bootstrap import bootstrap
+from app.core.invalidation import invalidation_bus
+from app.core.metrics import (
+    MetricsMiddleware,
+    missing_query_budgets,
+    pool_metrics,
+    render_metrics,
+    startup_metrics,
+)
+from app.core.security import password_hasher
+from app.core.serialization import FastJSONResponse
 from app.routers import (
     auth_router,
     plants_router,
@@ -15,64 +41,42 @@ from app.routers import (
     equipment_router,
     alerts_router,
     dashboard_router,
+    stream_router,
 )
 
+startup_metrics.began = _import_started
+startup_metrics.phases["import"] = time.perf_counter() - _import_started
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - startup and shutdown."""
     # Startup
     print("🚀 Starting PTAS Backend...")
-    init_db()
-    
-    # Create default admin user
-    from app.core.database import SessionLocal
-    from app.models.user import User
-    from app.models.plant import Plant
-    from app.core.security import get_password_hash
+    missing = missing_query_budgets(app.routes)
+    if missing and settings.QUERY_BUDGET_MODE == "raise":
+        raise RuntimeError(f"Routes without a query budget: {', '.join(missing)}")
+    if missing and settings.QUERY_BUDGET_MODE == "warn":
+        print(f"⚠️  Routes without a query budget: {', '.join(missing)}")
+    bootstrap()  # Migrations and default data, once across workers
+    await invalidation_bus.start()
     
-    db = SessionLocal()
-    try:
-        # Check if admin exists
-        admin = db.query(User).filter(User.username == "admin").first()
-        if not admin:
-            # Create default plant first
-            plant = Plant(
-                name="PTAS demo",
-                code="PTAS-001",
-                address="Demo",
-                region="Metropolitana",
-                capacity_m3d=500,
-                population_equiv=2000,
-                treatment_type="Lodos Activados",
-                status="active"
-            )
-            db.add(plant)
-            db.flush()  # Get plant.id
-            
-            # Create default admin
-            admin = User(
-                email="admin@ptas.cl",
-                username="admin",
-                password_hash=get_password_hash("admin123"),
-                full_name="Administrador PTAS",
-                role="administrador",
-                is_active=True,
-                plant_id=plant.id
-            )
-            db.add(admin)
-            db.commit()
-            print("✅ Default admin user created: admin / admin123")
-    except Exception as e:
-        print(f"⚠️ Error creating default data: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    # Background jobs: alert e-mail dispatcher, KPI snapshot refresh
+    from app.services.notifications import notification_dispatcher
+    from app.services.kpis import kpi_service
+    if settings.NOTIFICATIONS_ENABLED:
+        notification_dispatcher.start()
+    kpi_service.start()
     
     yield
     
     # Shutdown
     print("🛑 Shutting down PTAS Backend...")
+    await kpi_service.stop()
+    await notification_dispatcher.stop()
+    password_hasher.shutdown()
+    await invalidation_bus.stop()
+    await dispose_engines()
 
 
 # Create FastAPI app
@@ -80,9 +84,22 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Sistema de Gestión para Plantas de Tratamiento de Aguas Servidas - Chile",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Compress large responses (brotli/gzip)
+app.add_middleware(CompressionMiddleware)
+
+# Route a client's reads to the primary right after its own writes
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Per-route statement timeouts; reads are cancelled when the client disconnects
+app.add_middleware(QueryCancellationMiddleware)
+
+# Per-user rate limits and analytics load shedding (inside CORS, so 429/503 carry its headers)
+app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -92,6 +109,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and DB accounting (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
+# Statement timeouts and pool exhaustion answer 503 instead of 500
+app.add_exception_handler(DBAPIError, database_timeout_handler)
+app.add_exception_handler(PoolTimeoutError, database_timeout_handler)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(plants_router, prefix="/api/v1")
@@ -99,6 +123,7 @@ app.include_router(measurements_router, prefix="/api/v1")
 app.include_router(equipment_router, prefix="/api/v1")
 app.include_router(alerts_router, prefix="/api/v1")
 app.include_router(dashboard_router, prefix="/api/v1")
+app.include_router(stream_router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -118,6 +143,21 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+def metrics():
+    """Request, query and pool metrics in the Prometheus text format."""
+    return Response(
+        content=render_metrics([async_engine, *replica_engines, engine]),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/metrics/pool")
+def pool_metrics_endpoint():
+    """Connection pool usage, checkout waits and connection ages."""
+    return {"pools": pool_metrics([async_engine, *replica_engines, engine])}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -4,6 +4,8 @@ from app.models.plant import Plant
 from app.models.measurement import Measurement
 from app.models.equipment import Equipment, EquipmentHours
 from app.models.alert import Alert
+from app.models.notification import NotificationOutbox
+from app.models.kpi import KpiSnapshot
 
 __all__ = [
     "User",
@@ -12,4 +14,6 @@ __all__ = [
     "Equipment",
     "EquipmentHours",
     "Alert",
+    "NotificationOutbox",
+    "KpiSnapshot",
 ]
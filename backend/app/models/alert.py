@@ -1,15 +1,30 @@
 """
 Alert model - Alerts and notifications from the PTAS.
 """
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Index, desc
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, false, text
 from app.core.database import Base
 
 
 class Alert(Base):
     """Alert model - alerts and warnings from the system."""
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Per-plant alert lists filtered by state, newest first
+        Index("idx_alerts_plant_resolved", "plant_id", "is_resolved", desc("created_at")),
+        # Partial index: active-alert lookups stay small as history grows.
+        # A query only uses it when its filter matches the predicate, so
+        # filter with ~Alert.is_resolved (NOT is_resolved on PostgreSQL,
+        # is_resolved = 0 on SQLite); .is_(False) renders IS false and misses it
+        Index(
+            "ix_alerts_plant_unresolved",
+            "plant_id",
+            "created_at",
+            postgresql_where=text("NOT is_resolved"),
+            sqlite_where=text("is_resolved = 0"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id", ondelete="CASCADE"), nullable=False)
@@ -19,6 +34,8 @@ class Alert(Base):
     alert_type = Column(String(50), nullable=False)
     # Types: warning, critical, info, ds90_violation, ds609_violation, anomaly, equipment
     
+    parameter = Column(String(50), nullable=True)  # Measurement parameter: ph, sst, etc.
+    
     severity = Column(String(20), nullable=False)
     # Severity: low, medium, high, critical
     
@@ -31,11 +48,15 @@ class Alert(Base):
     norm_reference = Column(String(100), nullable=True)  # DS90 Art. 3.a, etc.
     
     # Resolution
-    is_resolved = Column(String(10), default="false")  # false, true
+    is_resolved = Column(Boolean, nullable=False, default=False, server_default=false())
     resolved_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     resolution_notes = Column(Text, nullable=True)
     
+    # Coalescing: repeats of an open alert bump these instead of inserting rows
+    occurrence_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
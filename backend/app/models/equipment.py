@@ -1,7 +1,7 @@
 """
 Equipment model - Equipment in the PTAS.
 """
-from sqlalchemy import Column, Integer, String, Numeric, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, Text, Date, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -35,10 +35,14 @@ class Equipment(Base):
 class EquipmentHours(Base):
     """Equipment operating hours."""
     __tablename__ = "equipment_hours"
+    __table_args__ = (
+        # One row per equipment and day; target of the bulk upsert
+        UniqueConstraint("equipment_id", "date", name="uq_equipment_hours_equipment_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False)
-    date = Column(DateTime(timezone=True), nullable=False)
+    date = Column(Date, nullable=False)  # Calendar day of the reading
     hours_run = Column(Numeric(5, 2), nullable=False)
     energy_kwh = Column(Numeric(10, 2), nullable=True)
     notes = Column(Text, nullable=True)
@@ -0,0 +1,38 @@
+"""
+KPI snapshot model - Precomputed disinfection-phase KPIs per plant and period.
+"""
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class KpiSnapshot(Base):
+    """KPI aggregates for one plant over a standard rolling period.
+    
+    Sums and counts (not averages) are stored so new measurements can be
+    folded in incrementally between full refreshes.
+    """
+    __tablename__ = "kpi_snapshots"
+    __table_args__ = (
+        UniqueConstraint("plant_id", "period_days", name="uq_kpi_snapshots_plant_period"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    plant_id = Column(Integer, ForeignKey("plants.id", ondelete="CASCADE"), nullable=False)
+    period_days = Column(Integer, nullable=False)  # 1, 7, 30, 365
+    window_start = Column(DateTime(timezone=True), nullable=False)
+    
+    total_measurements = Column(Integer, nullable=False, default=0)
+    validated_count = Column(Integer, nullable=False, default=0)
+    caudal_sum = Column(Numeric(16, 3), nullable=False, default=0)
+    caudal_count = Column(Integer, nullable=False, default=0)
+    ph_sum = Column(Numeric(16, 3), nullable=False, default=0)
+    ph_count = Column(Integer, nullable=False, default=0)
+    chlorine_sum = Column(Numeric(16, 3), nullable=False, default=0)
+    chlorine_count = Column(Integer, nullable=False, default=0)
+    
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Relationships
+    plant = relationship("Plant")
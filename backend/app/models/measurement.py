@@ -1,7 +1,7 @@
 """
 Measurement model - Operational data from PTAS.
 """
-from sqlalchemy import Column, Integer, String, Numeric, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, Text, DateTime, ForeignKey, Index, desc
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -10,6 +10,10 @@ from app.core.database import Base
 class Measurement(Base):
     """Measurement model - operational data from the plant."""
     __tablename__ = "measurements"
+    __table_args__ = (
+        # Per-plant history and latest-sample lookups (DISTINCT ON / ORDER BY ... DESC)
+        Index("idx_measurements_plant_timestamp", "plant_id", desc("timestamp")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id", ondelete="CASCADE"), nullable=False)
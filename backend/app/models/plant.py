@@ -22,6 +22,8 @@ class Plant(Base):
     status = Column(String(50), default="active")  # active, inactive, maintenance
     ds90_enabled = Column(Boolean, default=True)
     ds609_enabled = Column(Boolean, default=True)
+    # Bumped on every write to the plant's data; feeds read-endpoint ETags
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -5,6 +5,7 @@ from app.routers.measurements import router as measurements_router
 from app.routers.equipment import router as equipment_router
 from app.routers.alerts import router as alerts_router
 from app.routers.dashboard import router as dashboard_router
+from app.routers.stream import router as stream_router
 
 __all__ = [
     "auth_router",
@@ -13,4 +14,5 @@ __all__ = [
     "equipment_router",
     "alerts_router",
     "dashboard_router",
+    "stream_router",
 ]
\ No newline at end of file
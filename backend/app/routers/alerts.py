@@ -3,91 +3,200 @@ Alerts router - CRUD operations for alerts.
 """
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models.user import User
+from app.core.cache import invalidate_plant
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.security import Principal, get_current_user
+from app.core.versioning import (
+    bump_plant_versions,
+    etag_headers,
+    is_not_modified,
+    not_modified_response,
+    plant_etag,
+)
 from app.models.alert import Alert
+from app.services.alerts import alert_service
+from app.services.events import event_broker
+from app.services.notifications import notification_dispatcher
 from app.schemas.alert import (
     AlertCreate,
     AlertUpdate,
     AlertResolve,
+    AlertBulkResolve,
+    AlertBulkResolveResult,
     AlertResponse,
     AlertStats,
+    PlantAlertStats,
 )
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 
 @router.get("", response_model=List[AlertResponse])
-def get_alerts(
+async def get_alerts(
     plant_id: Optional[int] = None,
-    is_resolved: Optional[str] = None,
+    is_resolved: Optional[bool] = None,
     severity: Optional[str] = None,
     alert_type: Optional[str] = None,
     limit: int = Query(default=50, le=200),
     offset: int = 0,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get alerts with filters."""
-    query = db.query(Alert)
+    query = select(Alert)
     
     if plant_id:
-        query = query.filter(Alert.plant_id == plant_id)
+        query = query.where(Alert.plant_id == plant_id)
     elif current_user.role == "operador" and current_user.plant_id:
-        query = query.filter(Alert.plant_id == current_user.plant_id)
+        query = query.where(Alert.plant_id == current_user.plant_id)
     
     if is_resolved is not None:
-        query = query.filter(Alert.is_resolved == is_resolved)
+        query = query.where(Alert.is_resolved if is_resolved else ~Alert.is_resolved)
     if severity:
-        query = query.filter(Alert.severity == severity)
+        query = query.where(Alert.severity == severity)
     if alert_type:
-        query = query.filter(Alert.alert_type == alert_type)
+        query = query.where(Alert.alert_type == alert_type)
     
-    return query.order_by(Alert.created_at.desc()).offset(offset).limit(limit).all()
+    query = query.order_by(Alert.created_at.desc()).offset(offset).limit(limit)
+    return (await db.execute(query)).scalars().all()
+
+
+def _alert_stats_columns():
+    """Conditional counts for alert statistics, computed in one SQL pass."""
+    active = ~Alert.is_resolved
+    return (
+        func.count(Alert.id).label("total"),
+        func.count(Alert.id).filter(active).label("active"),
+        func.count(Alert.id).filter(Alert.is_resolved).label("resolved"),
+        func.count(Alert.id).filter(active, Alert.severity == "critical").label("critical"),
+        func.count(Alert.id).filter(active, Alert.severity == "warning").label("warning"),
+        func.count(Alert.id).filter(Alert.ds90_violation.is_(True)).label("ds90_violations"),
+        func.count(Alert.id).filter(Alert.ds609_violation.is_(True)).label("ds609_violations"),
+    )
 
 
 @router.get("/stats", response_model=AlertStats)
-def get_alert_stats(
+async def get_alert_stats(
+    request: Request,
+    response: Response,
     plant_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get alert statistics."""
-    alerts = db.query(Alert).filter(Alert.plant_id == plant_id).all()
-    
-    if not alerts:
-        return AlertStats()
-    
-    active = sum(1 for a in alerts if a.is_resolved == "false")
-    resolved = sum(1 for a in alerts if a.is_resolved == "true")
-    critical = sum(1 for a in alerts if a.severity == "critical" and a.is_resolved == "false")
-    warning = sum(1 for a in alerts if a.severity == "warning" and a.is_resolved == "false")
-    ds90 = sum(1 for a in alerts if a.ds90_violation)
-    ds609 = sum(1 for a in alerts if a.ds609_violation)
-    
-    return AlertStats(
-        total=len(alerts),
-        active=active,
-        resolved=resolved,
-        critical=critical,
-        warning=warning,
-        ds90_violations=ds90,
-        ds609_violations=ds609
-    )
+    etag = await plant_etag(db, request, [plant_id])
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
+    
+    row = (await db.execute(
+        select(*_alert_stats_columns()).where(Alert.plant_id == plant_id)
+    )).one()
+    return AlertStats(**row._asdict())
+
+
+@router.get("/stats/plants", response_model=List[PlantAlertStats])
+async def get_alert_stats_by_plant(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get alert statistics for every plant, grouped in a single query."""
+    scope = None
+    if current_user.role == "operador" and current_user.plant_id:
+        scope = [current_user.plant_id]
+    
+    etag = await plant_etag(db, request, scope)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
+    
+    query = select(Alert.plant_id, *_alert_stats_columns())
+    if scope is not None:
+        query = query.where(Alert.plant_id.in_(scope))
+    
+    rows = (await db.execute(query.group_by(Alert.plant_id).order_by(Alert.plant_id))).all()
+    return [PlantAlertStats(**row._asdict()) for row in rows]
+
+
+@router.put("/resolve", response_model=AlertBulkResolveResult)
+async def resolve_alerts_bulk(
+    resolve_data: AlertBulkResolve,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Resolve many alerts in one set-based UPDATE ... RETURNING.
+    
+    Operators only resolve alerts of their own plant.
+    """
+    # Refuse an unscoped request that would resolve every alert in the system
+    if resolve_data.ids is None and not resolve_data.plant_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicar ids o plant_id"
+        )
+    
+    plant_id = resolve_data.plant_id
+    if current_user.role == "operador" and current_user.plant_id:
+        if plant_id and plant_id != current_user.plant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para esta acción"
+            )
+        plant_id = current_user.plant_id
+    
+    filters = [~Alert.is_resolved]
+    
+    if resolve_data.ids is not None:
+        filters.append(Alert.id.in_(resolve_data.ids))
+    if plant_id:
+        filters.append(Alert.plant_id == plant_id)
+    if resolve_data.alert_type:
+        filters.append(Alert.alert_type == resolve_data.alert_type)
+    if resolve_data.severity:
+        filters.append(Alert.severity == resolve_data.severity)
+    if resolve_data.before:
+        filters.append(Alert.created_at < resolve_data.before)
+    
+    rows = (await db.execute(
+        update(Alert)
+        .where(*filters)
+        .values(
+            is_resolved=True,
+            resolved_by=current_user.id,
+            resolved_at=func.now(),
+            resolution_notes=resolve_data.resolution_notes
+        )
+        .returning(Alert.id, Alert.plant_id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.run_sync(bump_plant_versions, [plant_id for _, plant_id in rows])
+    await db.commit()
+    
+    ids_by_plant = {}
+    for alert_id, plant_id in rows:
+        ids_by_plant.setdefault(plant_id, []).append(alert_id)
+    for plant_id, ids in ids_by_plant.items():
+        invalidate_plant(plant_id)
+        event_broker.publish(plant_id, "alerts.resolved", {"ids": ids})
+    
+    return AlertBulkResolveResult(resolved=len(rows), ids=[alert_id for alert_id, _ in rows])
 
 
 @router.get("/{alert_id}", response_model=AlertResponse)
-def get_alert(
+async def get_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific alert by ID."""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = await db.get(Alert, alert_id)
     if not alert:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,39 +206,57 @@ def get_alert(
 
 
 @router.post("", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
-def create_alert(
+async def create_alert(
     alert_data: AlertCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Create a new alert."""
-    alert = Alert(**alert_data.model_dump())
-    db.add(alert)
-    db.commit()
-    db.refresh(alert)
-    return alert
+    """Create a new alert, or coalesce it into a matching open alert."""
+    alert, created = await db.run_sync(alert_service.create_or_coalesce, alert_data.model_dump())
+    if created and settings.NOTIFICATIONS_ENABLED:
+        # Only new alerts are e-mailed; the outbox rows commit with the alert
+        await db.run_sync(notification_dispatcher.enqueue_alert, alert)
+    await db.commit()
+    
+    payload = AlertResponse.model_validate(alert)
+    invalidate_plant(payload.plant_id)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    
+    event_broker.publish(
+        payload.plant_id,
+        "alert.created" if created else "alert.updated",
+        payload.model_dump(mode="json")
+    )
+    return payload
 
 
 @router.put("/{alert_id}/resolve", response_model=AlertResponse)
-def resolve_alert(
+async def resolve_alert(
     alert_id: int,
     resolve_data: AlertResolve,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Resolve an alert."""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = await db.get(Alert, alert_id)
     if not alert:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Alerta no encontrada"
         )
     
-    alert.is_resolved = "true"
+    alert.is_resolved = True
     alert.resolved_by = current_user.id
     alert.resolved_at = datetime.now()
     alert.resolution_notes = resolve_data.resolution_notes
     
-    db.commit()
-    db.refresh(alert)
-    return alert
\ No newline at end of file
+    await db.commit()
+    await db.refresh(alert)
+    
+    invalidate_plant(alert.plant_id)
+    
+    payload = AlertResponse.model_validate(alert)
+    event_broker.publish(alert.plant_id, "alert.resolved", payload.model_dump(mode="json"))
+    return payload
\ No newline at end of file
@@ -3,16 +3,18 @@ Authentication router - JWT login, register, refresh.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    password_hasher,
+    PasswordHasherBusy,
     create_access_token,
     create_refresh_token,
     decode_token,
     get_current_user,
+    Principal,
 )
 from app.models.user import User
 from app.schemas.user import (
@@ -26,15 +28,32 @@ from app.schemas.user import (
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Demasiados inicios de sesión simultáneos, intente nuevamente",
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login with username and password."""
-    user = db.query(User).filter(User.username == request.username).first()
+    user = (await db.execute(
+        select(User).where(User.username == request.username)
+    )).scalar_one_or_none()
+    
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(request.password, user.password_hash)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
     
-    if not user or not verify_password(request.password, user.password_hash):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario o contraseña incorrectos"
@@ -46,6 +65,11 @@ def login(
             detail="Usuario inactivo"
         )
     
+    # Transparently upgrade hashes made with older parameters
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    
     access_token = create_access_token(data={"sub": str(user.id)})
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
 
@@ -58,19 +82,19 @@ def login(
 
 
 @router.post("/token", response_model=TokenResponse)
-def login_form(
+async def login_form(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login with form data (OAuth2 compatible)."""
     request = LoginRequest(username=form_data.username, password=form_data.password)
-    return login(request, db)
+    return await login(request, db)
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_token(
+async def refresh_token(
     request: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token using refresh token."""
     payload = decode_token(request.refresh_token)
@@ -82,7 +106,7 @@ def refresh_token(
         )
     
     user_id = int(payload.get("sub"))
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     
     if not user or not user.is_active:
@@ -103,45 +127,52 @@ def refresh_token(
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user."""
     # Check if username exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    if (await db.execute(select(User.id).where(User.username == user_data.username))).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Nombre de usuario ya existe"
         )
     
     # Check if email exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if (await db.execute(select(User.id).where(User.email == user_data.email))).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email ya está registrado"
         )
     
+    try:
+        password_hash = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    
     # Create user
     user = User(
         email=user_data.email,
         username=user_data.username,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_hash,
         full_name=user_data.full_name,
         role=user_data.role,
         plant_id=user_data.plant_id
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return UserResponse.model_validate(user)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+async def get_current_user_info(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get current user info."""
-    return UserResponse.model_validate(current_user)
+    user = await db.get(User, current_user.id)
+    return UserResponse.model_validate(user)
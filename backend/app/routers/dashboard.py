@@ -3,63 +3,90 @@ Dashboard router - Summary, trends, and KPIs.
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models.user import User
+from app.core.cache import dashboard_cache
+from app.core.database import get_read_db, reads_from_primary
+from app.core.security import Principal, get_current_user
+from app.core.serialization import dumps_json, negotiated_response, serialize_rows
+from app.core.versioning import (
+    etag_for,
+    etag_headers,
+    is_not_modified,
+    not_modified_response,
+    plant_etag,
+)
+from app.models.plant import Plant
 from app.models.measurement import Measurement
 from app.models.equipment import Equipment
 from app.models.alert import Alert
+from app.schemas.measurement import TrendPoint
+from app.services.kpis import kpi_result, kpi_service
+from app.services.normativity import normativity
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
-@router.get("/summary")
-def get_dashboard_summary(
-    plant_id: int = Query(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-) -> Dict[str, Any]:
-    """Get dashboard summary for a plant."""
-    from app.models.plant import Plant
+def _summary_statement(plant_id: int):
+    """Dashboard summary as one round trip: CTEs with conditional counts
+    plus the latest measurement, joined onto the plant row."""
+    equipment_counts = select(
+        func.count(Equipment.id).label("equipment_total"),
+        func.count(Equipment.id).filter(Equipment.status == "active").label("equipment_active"),
+        func.count(Equipment.id).filter(Equipment.status == "maintenance").label("equipment_maintenance"),
+        func.count(Equipment.id).filter(Equipment.status == "broken").label("equipment_broken"),
+    ).where(Equipment.plant_id == plant_id).cte("equipment_counts")
     
-    # Get plant info
-    plant = db.query(Plant).filter(Plant.id == plant_id).first()
-    if not plant:
-        return {"error": "Planta no encontrada"}
+    alert_counts = select(
+        func.count(Alert.id).label("alerts_active"),
+        func.count(Alert.id).filter(Alert.severity == "critical").label("alerts_critical"),
+        func.count(Alert.id).filter(Alert.severity == "warning").label("alerts_warning"),
+    ).where(Alert.plant_id == plant_id, ~Alert.is_resolved).cte("alert_counts")
     
-    # Get last measurement
-    last_measurement = db.query(Measurement).filter(
+    last_measurement = select(
+        Measurement.timestamp,
+        Measurement.phase,
+        Measurement.caudal_effluent_m3h,
+        Measurement.ph,
+        Measurement.temperature,
+        Measurement.chlorine_free,
+        Measurement.sst,
+        Measurement.dbo5,
+    ).where(
         Measurement.plant_id == plant_id
-    ).order_by(Measurement.timestamp.desc()).first()
-    
-    # Get active alerts
-    active_alerts = db.query(Alert).filter(
-        Alert.plant_id == plant_id,
-        Alert.is_resolved == "false"
-    ).all()
-    
-    # Get equipment stats
-    equipment_list = db.query(Equipment).filter(Equipment.plant_id == plant_id).all()
-    equipment_stats = {
-        "total": len(equipment_list),
-        "active": sum(1 for e in equipment_list if e.status == "active"),
-        "maintenance": sum(1 for e in equipment_list if e.status == "maintenance"),
-        "broken": sum(1 for e in equipment_list if e.status == "broken")
-    }
+    ).order_by(Measurement.timestamp.desc()).limit(1).cte("last_measurement")
     
-    # Alert stats
-    critical_alerts = [a for a in active_alerts if a.severity == "critical"]
-    warning_alerts = [a for a in active_alerts if a.severity == "warning"]
-    
-    # Build response
+    return (
+        select(
+            Plant.id.label("plant_id"),
+            Plant.name.label("plant_name"),
+            Plant.code.label("plant_code"),
+            Plant.data_version,
+            *equipment_counts.c,
+            *alert_counts.c,
+            *last_measurement.c,
+        )
+        .select_from(Plant)
+        .join(equipment_counts, true())
+        .join(alert_counts, true())
+        .outerjoin(last_measurement, true())
+        .where(Plant.id == plant_id)
+    )
+
+
+def _float_or_none(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _build_summary(row) -> Dict[str, Any]:
+    """Shape a summary row into the dashboard response."""
     response = {
         "plant": {
-            "id": plant.id,
-            "name": plant.name,
-            "code": plant.code
+            "id": row["plant_id"],
+            "name": row["plant_name"],
+            "code": row["plant_code"]
         },
         "last_measurement": None,
         "compliance": {
@@ -68,52 +95,249 @@ def get_dashboard_summary(
             "last_violation": None
         },
         "alerts": {
-            "active": len(active_alerts),
-            "critical": len(critical_alerts),
-            "warning": len(warning_alerts)
+            "active": row["alerts_active"],
+            "critical": row["alerts_critical"],
+            "warning": row["alerts_warning"]
         },
-        "equipment": equipment_stats
+        "equipment": {
+            "total": row["equipment_total"],
+            "active": row["equipment_active"],
+            "maintenance": row["equipment_maintenance"],
+            "broken": row["equipment_broken"]
+        }
     }
     
     # Add last measurement if exists
-    if last_measurement:
+    if row["timestamp"] is not None:
         response["last_measurement"] = {
-            "timestamp": last_measurement.timestamp.isoformat(),
-            "phase": last_measurement.phase,
-            "caudal_effluent_m3h": float(last_measurement.caudal_effluent_m3h) if last_measurement.caudal_effluent_m3h else None,
-            "ph": float(last_measurement.ph) if last_measurement.ph else None,
-            "temperature": float(last_measurement.temperature) if last_measurement.temperature else None,
-            "chlorine_free": float(last_measurement.chlorine_free) if last_measurement.chlorine_free else None,
-            "sst": float(last_measurement.sst) if last_measurement.sst else None,
-            "dbo5": float(last_measurement.dbo5) if last_measurement.dbo5 else None
+            "timestamp": row["timestamp"].isoformat(),
+            "phase": row["phase"],
+            "caudal_effluent_m3h": _float_or_none(row["caudal_effluent_m3h"]),
+            "ph": _float_or_none(row["ph"]),
+            "temperature": _float_or_none(row["temperature"]),
+            "chlorine_free": _float_or_none(row["chlorine_free"]),
+            "sst": _float_or_none(row["sst"]),
+            "dbo5": _float_or_none(row["dbo5"])
         }
     
     return response
 
 
+@router.get("/summary")
+async def get_dashboard_summary(
+    request: Request,
+    plant_id: int = Query(...),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get dashboard summary for a plant.
+    
+    Served from a short-lived per-plant snapshot (pre-serialized JSON)
+    without touching the database; writes to the plant's measurements,
+    alerts and equipment invalidate it on every worker. A miss costs one
+    query, which also returns the plant's data version for the ETag. Only
+    reads from the primary fill the snapshot: one from a lagging replica
+    would be served to every client, including the writer that is pinned
+    to the primary, until the TTL. A read that races a write is not cached
+    (generation check), and an older version never replaces a newer one.
+    """
+    cached = dashboard_cache.get(plant_id)
+    if cached is not None:
+        version, body = cached
+        etag = etag_for(request, [(plant_id, version)])
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return Response(content=body, media_type="application/json", headers=etag_headers(etag))
+    
+    generation = dashboard_cache.generation(plant_id)
+    row = (await db.execute(_summary_statement(plant_id))).mappings().first()
+    if row is None:
+        return {"error": "Planta no encontrada"}
+    
+    version = row["data_version"]
+    etag = etag_for(request, [(plant_id, version)])
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    body = dumps_json(_build_summary(row))
+    current = dashboard_cache.get(plant_id)
+    if reads_from_primary(request) and (current is None or current[0] < version):
+        dashboard_cache.set(plant_id, (version, body), generation=generation)
+    return Response(content=body, media_type="application/json", headers=etag_headers(etag))
+
+
+# Columns of the latest-measurement snapshot shown on dashboards
+LAST_MEASUREMENT_FIELDS = (
+    "caudal_effluent_m3h", "ph", "temperature", "chlorine_free", "sst", "dbo5",
+)
+
+
+def _latest_measurements_statement(dialect_name: str, plant_ids: List[int]):
+    """Latest measurement per plant, every column needed for compliance."""
+    columns = [c for c in Measurement.__table__.c]
+    
+    if dialect_name == "postgresql":
+        return select(*columns).where(
+            Measurement.plant_id.in_(plant_ids)
+        ).distinct(Measurement.plant_id).order_by(
+            Measurement.plant_id, Measurement.timestamp.desc()
+        )
+    
+    # Portable fallback (e.g. SQLite) for DISTINCT ON
+    ranked = select(
+        *columns,
+        func.row_number().over(
+            partition_by=Measurement.plant_id,
+            order_by=Measurement.timestamp.desc()
+        ).label("rn")
+    ).where(Measurement.plant_id.in_(plant_ids)).subquery()
+    return select(*[ranked.c[c.name] for c in columns]).where(ranked.c.rn == 1)
+
+
+def _compliance(plant: Plant, measurement: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """DS90/DS609 compliance of a plant's latest measurement."""
+    result = {"ds90_compliant": True, "ds609_compliant": True, "last_violation": None}
+    if measurement is None:
+        return result
+    
+    check = normativity.check_all(
+        measurement,
+        ds90_enabled=bool(plant.ds90_enabled),
+        ds609_enabled=bool(plant.ds609_enabled)
+    )
+    for violation in check["violations"]:
+        if violation["norm"] == "DS90":
+            result["ds90_compliant"] = False
+        else:
+            result["ds609_compliant"] = False
+    if check["violations"]:
+        result["last_violation"] = check["violations"][0]["message"]
+    return result
+
+
+@router.get("/overview")
+async def get_dashboard_overview(
+    request: Request,
+    response: Response,
+    days: int = Query(default=30, le=365),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Summary, KPIs and compliance for every plant the user can access.
+    
+    Runs a constant number of set-based queries regardless of plant count.
+    """
+    scope = None
+    if current_user.role == "operador" and current_user.plant_id:
+        scope = [current_user.plant_id]
+    
+    etag = await plant_etag(db, request, scope)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
+    
+    plants_query = select(Plant)
+    if scope is not None:
+        plants_query = plants_query.where(Plant.id.in_(scope))
+    plants = (await db.execute(plants_query.order_by(Plant.id))).scalars().all()
+    if not plants:
+        return {"period_days": days, "plants": []}
+    
+    plant_ids = [p.id for p in plants]
+    
+    latest = {
+        row["plant_id"]: dict(row)
+        for row in (await db.execute(
+            _latest_measurements_statement(db.bind.dialect.name, plant_ids)
+        )).mappings()
+    }
+    
+    alert_counts = {
+        row["plant_id"]: row
+        for row in (await db.execute(
+            select(
+                Alert.plant_id,
+                func.count(Alert.id).label("alerts_active"),
+                func.count(Alert.id).filter(Alert.severity == "critical").label("alerts_critical"),
+                func.count(Alert.id).filter(Alert.severity == "warning").label("alerts_warning"),
+            ).where(
+                Alert.plant_id.in_(plant_ids), ~Alert.is_resolved
+            ).group_by(Alert.plant_id)
+        )).mappings()
+    }
+    
+    equipment_counts = {
+        row["plant_id"]: row
+        for row in (await db.execute(
+            select(
+                Equipment.plant_id,
+                func.count(Equipment.id).label("equipment_total"),
+                func.count(Equipment.id).filter(Equipment.status == "active").label("equipment_active"),
+                func.count(Equipment.id).filter(Equipment.status == "maintenance").label("equipment_maintenance"),
+                func.count(Equipment.id).filter(Equipment.status == "broken").label("equipment_broken"),
+            ).where(Equipment.plant_id.in_(plant_ids)).group_by(Equipment.plant_id)
+        )).mappings()
+    }
+    
+    if days in kpi_service.STANDARD_PERIODS:
+        kpis = await db.run_sync(kpi_service.get_snapshots, plant_ids, days)
+    else:
+        kpis = {}
+    missing = [p for p in plant_ids if p not in kpis]
+    if missing:
+        kpis.update(await db.run_sync(kpi_service.compute_live, missing, days))
+    
+    no_alerts = {"alerts_active": 0, "alerts_critical": 0, "alerts_warning": 0}
+    no_equipment = {
+        "equipment_total": 0, "equipment_active": 0,
+        "equipment_maintenance": 0, "equipment_broken": 0,
+    }
+    
+    overview = []
+    for plant in plants:
+        measurement = latest.get(plant.id)
+        row = {
+            "plant_id": plant.id,
+            "plant_name": plant.name,
+            "plant_code": plant.code,
+            **no_alerts,
+            **alert_counts.get(plant.id, {}),
+            **no_equipment,
+            **equipment_counts.get(plant.id, {}),
+            "timestamp": None,
+            "phase": None,
+        }
+        if measurement is not None:
+            row["timestamp"] = measurement["timestamp"]
+            row["phase"] = measurement["phase"]
+            row.update({field: measurement[field] for field in LAST_MEASUREMENT_FIELDS})
+        
+        summary = _build_summary(row)
+        summary["compliance"] = _compliance(plant, measurement)
+        summary["kpis"] = kpis.get(plant.id) or kpi_result(days, 0, 0, {})
+        overview.append(summary)
+    
+    return {"period_days": days, "plants": overview}
+
+
 @router.get("/trends")
-def get_trends(
+async def get_trends(
+    request: Request,
+    response: Response,
     plant_id: int = Query(...),
     parameter: str = Query(..., description="Parameter: ph, temperature, caudal, sst, dbo5, od, chlorine"),
     days: int = Query(default=30, le=365),
     phase: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """Get historical trends for a parameter."""
     from datetime import timedelta
     
-    start_date = datetime.now() - timedelta(days=days)
-    
-    query = db.query(Measurement).filter(
-        Measurement.plant_id == plant_id,
-        Measurement.timestamp >= start_date
-    )
-    
-    if phase:
-        query = query.filter(Measurement.phase == phase)
-    
-    measurements = query.order_by(Measurement.timestamp.asc()).all()
+    etag = await plant_etag(db, request, [plant_id])
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
     
     # Map parameter names to model fields
     param_map = {
@@ -130,63 +354,50 @@ def get_trends(
     if not field:
         return {"error": f"Parámetro '{parameter}' no válido"}
     
-    # Extract data points
-    data_points = []
-    for m in measurements:
-        value = getattr(m, field, None)
-        if value is not None:
-            data_points.append({
-                "timestamp": m.timestamp.isoformat(),
-                "value": float(value)
-            })
-    
-    return {
-        "parameter": parameter,
-        "phase": phase,
-        "days": days,
-        "data": data_points
-    }
+    start_date = datetime.now() - timedelta(days=days)
+    column = Measurement.__table__.c[field]
+    
+    # Only the two columns plotted; rows are encoded without ORM objects
+    query = select(Measurement.timestamp, column.label("value")).where(
+        Measurement.plant_id == plant_id,
+        Measurement.timestamp >= start_date,
+        column.isnot(None)
+    )
+    
+    if phase:
+        query = query.where(Measurement.phase == phase)
+    
+    rows = (await db.execute(query.order_by(Measurement.timestamp.asc()))).mappings()
+    
+    return negotiated_response(
+        request,
+        {
+            "parameter": parameter,
+            "phase": phase,
+            "days": days,
+            "data": serialize_rows(rows, TrendPoint)
+        },
+        headers=etag_headers(etag)
+    )
 
 
 @router.get("/kpis")
-def get_kpis(
+async def get_kpis(
+    request: Request,
+    response: Response,
     plant_id: int = Query(...),
     days: int = Query(default=30),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    """Get KPI summary."""
-    from datetime import timedelta
-    from sqlalchemy import func
+    """Get KPI summary.
     
-    start_date = datetime.now() - timedelta(days=days)
+    Standard periods (1, 7, 30, 365 days) are read from precomputed
+    snapshots; other windows are computed live.
+    """
+    etag = await plant_etag(db, request, [plant_id])
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
     
-    # Get measurements in period
-    measurements = db.query(Measurement).filter(
-        Measurement.plant_id == plant_id,
-        Measurement.timestamp >= start_date,
-        Measurement.phase == "desinfeccion"
-    ).all()
-    
-    if not measurements:
-        return {
-            "period_days": days,
-            "total_measurements": 0,
-            "compliance_rate": 0.0
-        }
-    
-    # Calculate KPIs
-    caudal_values = [m.caudal_effluent_m3h for m in measurements if m.caudal_effluent_m3h]
-    ph_values = [m.ph for m in measurements if m.ph]
-    chlorine_values = [m.chlorine_free for m in measurements if m.chlorine_free]
-    
-    validated = sum(1 for m in measurements if m.validated == "validated")
-    
-    return {
-        "period_days": days,
-        "total_measurements": len(measurements),
-        "compliance_rate": round((validated / len(measurements) * 100), 2) if measurements else 0,
-        "avg_caudal": round(sum(caudal_values) / len(caudal_values), 2) if caudal_values else None,
-        "avg_ph": round(sum(ph_values) / len(ph_values), 2) if ph_values else None,
-        "avg_chlorine": round(sum(chlorine_values) / len(chlorine_values), 2) if chlorine_values else None,
-    }
+    return await db.run_sync(kpi_service.get_kpis, plant_id, days)
@@ -3,58 +3,62 @@ Equipment router - CRUD operations for equipment and hours.
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models.user import User
+from app.core.cache import invalidate_plant
+from app.core.database import dialect_insert, get_db, get_read_db
+from app.core.security import Principal, get_current_user
 from app.models.equipment import Equipment, EquipmentHours
+from app.services.events import event_broker
 from app.schemas.equipment import (
     EquipmentCreate,
     EquipmentUpdate,
     EquipmentResponse,
     EquipmentHoursCreate,
     EquipmentHoursResponse,
+    EquipmentHoursBulk,
+    EquipmentHoursBulkResult,
 )
 
 router = APIRouter(prefix="/equipment", tags=["Equipment"])
 
 
 @router.get("", response_model=List[EquipmentResponse])
-def get_equipment(
+async def get_equipment(
     plant_id: Optional[int] = None,
     status: Optional[str] = None,
     equipment_type: Optional[str] = None,
     limit: int = Query(default=100),
     offset: int = 0,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get equipment with filters."""
-    query = db.query(Equipment)
+    query = select(Equipment)
     
     if plant_id:
-        query = query.filter(Equipment.plant_id == plant_id)
+        query = query.where(Equipment.plant_id == plant_id)
     elif current_user.role == "operador" and current_user.plant_id:
-        query = query.filter(Equipment.plant_id == current_user.plant_id)
+        query = query.where(Equipment.plant_id == current_user.plant_id)
     
     if status:
-        query = query.filter(Equipment.status == status)
+        query = query.where(Equipment.status == status)
     if equipment_type:
-        query = query.filter(Equipment.equipment_type == equipment_type)
+        query = query.where(Equipment.equipment_type == equipment_type)
     
-    return query.offset(offset).limit(limit).all()
+    return (await db.execute(query.offset(offset).limit(limit))).scalars().all()
 
 
 @router.get("/{equipment_id}", response_model=EquipmentResponse)
-def get_equipment_item(
+async def get_equipment_item(
     equipment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific equipment by ID."""
-    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    equipment = await db.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,28 +68,78 @@ def get_equipment_item(
 
 
 @router.post("", response_model=EquipmentResponse, status_code=status.HTTP_201_CREATED)
-def create_equipment(
+async def create_equipment(
     equipment_data: EquipmentCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new equipment."""
     equipment = Equipment(**equipment_data.model_dump())
     db.add(equipment)
-    db.commit()
-    db.refresh(equipment)
-    return equipment
+    await db.commit()
+    await db.refresh(equipment)
+    
+    invalidate_plant(equipment.plant_id)
+    payload = EquipmentResponse.model_validate(equipment)
+    event_broker.publish(equipment.plant_id, "equipment.created", payload.model_dump(mode="json"))
+    return payload
+
+
+# Declared before /{equipment_id} so "hours" is not parsed as an id
+@router.put("/hours", response_model=EquipmentHoursBulkResult)
+async def upsert_equipment_hours_bulk(
+    bulk_data: EquipmentHoursBulk,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Insert or update daily hours for many equipment in one statement.
+    
+    Rows are keyed on (equipment_id, date) with INSERT ... ON CONFLICT DO
+    UPDATE, so re-sending a feed is safe; the last item for a key wins.
+    """
+    plant_id = bulk_data.plant_id
+    if current_user.role == "operador" and current_user.plant_id:
+        if plant_id and plant_id != current_user.plant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para esta acción"
+            )
+        plant_id = current_user.plant_id
+    
+    # ON CONFLICT cannot update the same row twice in one statement
+    rows = {(item.equipment_id, item.date): item.model_dump() for item in bulk_data.items}
+    
+    equipment_ids = {equipment_id for equipment_id, _ in rows}
+    query = select(Equipment.id).where(Equipment.id.in_(equipment_ids))
+    if plant_id:
+        query = query.where(Equipment.plant_id == plant_id)
+    missing = equipment_ids - set((await db.execute(query)).scalars())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Equipos no encontrados: {', '.join(map(str, sorted(missing)))}"
+        )
+    
+    insert = dialect_insert(db)
+    statement = insert(EquipmentHours).values(list(rows.values()))
+    statement = statement.on_conflict_do_update(
+        index_elements=["equipment_id", "date"],
+        set_={key: statement.excluded[key] for key in ("hours_run", "energy_kwh", "notes")},
+    )
+    await db.execute(statement)
+    await db.commit()
+    return EquipmentHoursBulkResult(upserted=len(rows))
 
 
 @router.put("/{equipment_id}", response_model=EquipmentResponse)
-def update_equipment(
+async def update_equipment(
     equipment_id: int,
     equipment_data: EquipmentUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update equipment."""
-    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    equipment = await db.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -95,62 +149,66 @@ def update_equipment(
     for key, value in equipment_data.model_dump(exclude_unset=True).items():
         setattr(equipment, key, value)
     
-    db.commit()
-    db.refresh(equipment)
-    return equipment
+    await db.commit()
+    await db.refresh(equipment)
+    
+    invalidate_plant(equipment.plant_id)
+    payload = EquipmentResponse.model_validate(equipment)
+    event_broker.publish(equipment.plant_id, "equipment.updated", payload.model_dump(mode="json"))
+    return payload
 
 
 # Equipment Hours endpoints
 @router.get("/{equipment_id}/hours", response_model=List[EquipmentHoursResponse])
-def get_equipment_hours(
+async def get_equipment_hours(
     equipment_id: int,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     limit: int = Query(default=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get equipment hours."""
-    query = db.query(EquipmentHours).filter(EquipmentHours.equipment_id == equipment_id)
+    query = select(EquipmentHours).where(EquipmentHours.equipment_id == equipment_id)
     
     if start_date:
-        query = query.filter(EquipmentHours.date >= start_date)
+        query = query.where(EquipmentHours.date >= start_date)
     if end_date:
-        query = query.filter(EquipmentHours.date <= end_date)
+        query = query.where(EquipmentHours.date <= end_date)
     
-    return query.order_by(EquipmentHours.date.desc()).limit(limit).all()
+    return (await db.execute(query.order_by(EquipmentHours.date.desc()).limit(limit))).scalars().all()
 
 
 @router.post("/{equipment_id}/hours", response_model=EquipmentHoursResponse, status_code=status.HTTP_201_CREATED)
-def create_equipment_hours(
+async def create_equipment_hours(
     equipment_id: int,
     hours_data: EquipmentHoursCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create equipment hours record."""
     # Verify equipment exists
-    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    equipment = await db.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Equipo no encontrado"
         )
     
-    # Check if already exists for date
-    existing = db.query(EquipmentHours).filter(
-        EquipmentHours.equipment_id == equipment_id,
-        EquipmentHours.date == hours_data.date
-    ).first()
+    # The unique (equipment_id, date) constraint rejects duplicates atomically
+    insert = dialect_insert(db)
+    hours = (await db.execute(
+        insert(EquipmentHours)
+        .values(**hours_data.model_dump())
+        .on_conflict_do_nothing(index_elements=["equipment_id", "date"])
+        .returning(EquipmentHours)
+    )).scalar_one_or_none()
     
-    if existing:
+    if hours is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ya existe registro de horas para esta fecha"
         )
     
-    hours = EquipmentHours(**hours_data.model_dump())
-    db.add(hours)
-    db.commit()
-    db.refresh(hours)
+    await db.commit()
     return hours
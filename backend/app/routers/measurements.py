@@ -3,13 +3,18 @@ Measurements router - CRUD operations for operational data.
 """
 from typing import List, Optional
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models.user import User
+from app.core.cache import invalidate_plant
+from app.core.database import get_db, get_read_db
+from app.core.security import Principal, get_current_user
+from app.core.serialization import negotiated_response, schema_columns, serialize_rows
+from app.core.versioning import etag_headers, is_not_modified, not_modified_response, plant_etag
 from app.models.measurement import Measurement
+from app.services.events import event_broker
+from app.services.kpis import kpi_service
 from app.schemas.measurement import (
     MeasurementCreate,
     MeasurementUpdate,
@@ -21,7 +26,8 @@ router = APIRouter(prefix="/measurements", tags=["Measurements"])
 
 
 @router.get("", response_model=List[MeasurementResponse])
-def get_measurements(
+async def get_measurements(
+    request: Request,
     plant_id: Optional[int] = None,
     phase: Optional[str] = None,
     start_date: Optional[date] = None,
@@ -29,54 +35,69 @@ def get_measurements(
     validated: Optional[str] = None,
     limit: int = Query(default=50, le=200),
     offset: int = 0,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get measurements with filters."""
-    query = db.query(Measurement)
+    """Get measurements with filters.
+    
+    Selects only the response columns and encodes rows directly (JSON or
+    MessagePack), without building ORM objects.
+    """
+    query = select(*schema_columns(Measurement.__table__, MeasurementResponse))
     
     # Filter by plant
     if plant_id:
-        query = query.filter(Measurement.plant_id == plant_id)
+        query = query.where(Measurement.plant_id == plant_id)
     elif current_user.role == "operador" and current_user.plant_id:
-        query = query.filter(Measurement.plant_id == current_user.plant_id)
+        query = query.where(Measurement.plant_id == current_user.plant_id)
     
     # Filter by phase
     if phase:
-        query = query.filter(Measurement.phase == phase)
+        query = query.where(Measurement.phase == phase)
     
     # Filter by date range
     if start_date:
-        query = query.filter(Measurement.timestamp >= start_date)
+        query = query.where(Measurement.timestamp >= start_date)
     if end_date:
-        query = query.filter(Measurement.timestamp <= end_date)
+        query = query.where(Measurement.timestamp <= end_date)
     
     # Filter by validation status
     if validated:
-        query = query.filter(Measurement.validated == validated)
+        query = query.where(Measurement.validated == validated)
     
-    measurements = query.order_by(Measurement.timestamp.desc()).offset(offset).limit(limit).all()
-    return measurements
+    rows = (await db.execute(
+        query.order_by(Measurement.timestamp.desc()).offset(offset).limit(limit)
+    )).mappings()
+    return negotiated_response(request, serialize_rows(rows, MeasurementResponse))
 
 
 @router.get("/stats", response_model=MeasurementStats)
-def get_measurement_stats(
+async def get_measurement_stats(
+    request: Request,
+    response: Response,
     plant_id: int,
     days: int = 30,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get statistics for measurements."""
     from datetime import timedelta
     from sqlalchemy import func
     
+    etag = await plant_etag(db, request, [plant_id])
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
+    
     start_date = datetime.now() - timedelta(days=days)
     
     # Get measurements in date range
-    measurements = db.query(Measurement).filter(
-        Measurement.plant_id == plant_id,
-        Measurement.timestamp >= start_date
-    ).all()
+    measurements = (await db.execute(
+        select(Measurement).where(
+            Measurement.plant_id == plant_id,
+            Measurement.timestamp >= start_date
+        )
+    )).scalars().all()
     
     if not measurements:
         return MeasurementStats(total_measurements=0, compliance_rate=0.0)
@@ -105,13 +126,13 @@ def get_measurement_stats(
 
 
 @router.get("/{measurement_id}", response_model=MeasurementResponse)
-def get_measurement(
+async def get_measurement(
     measurement_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific measurement by ID."""
-    measurement = db.query(Measurement).filter(Measurement.id == measurement_id).first()
+    measurement = await db.get(Measurement, measurement_id)
     if not measurement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,10 +142,10 @@ def get_measurement(
 
 
 @router.post("", response_model=MeasurementResponse, status_code=status.HTTP_201_CREATED)
-def create_measurement(
+async def create_measurement(
     measurement_data: MeasurementCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new measurement."""
     measurement = Measurement(
@@ -132,39 +153,52 @@ def create_measurement(
         user_id=current_user.id
     )
     db.add(measurement)
-    db.commit()
-    db.refresh(measurement)
-    return measurement
+    await db.flush()
+    await db.run_sync(kpi_service.apply_measurement, measurement)
+    await db.commit()
+    await db.refresh(measurement)
+    
+    invalidate_plant(measurement.plant_id)
+    payload = MeasurementResponse.model_validate(measurement)
+    event_broker.publish(measurement.plant_id, "measurement.created", payload.model_dump(mode="json"))
+    return payload
 
 
 @router.put("/{measurement_id}", response_model=MeasurementResponse)
-def update_measurement(
+async def update_measurement(
     measurement_id: int,
     measurement_data: MeasurementUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update a measurement."""
-    measurement = db.query(Measurement).filter(Measurement.id == measurement_id).first()
+    measurement = await db.get(Measurement, measurement_id)
     if not measurement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Medición no encontrada"
         )
     
+    before = kpi_service.contribution(measurement)
     for key, value in measurement_data.model_dump(exclude_unset=True).items():
         setattr(measurement, key, value)
     
-    db.commit()
-    db.refresh(measurement)
-    return measurement
+    await db.flush()
+    await db.run_sync(kpi_service.apply_change, before, measurement)
+    await db.commit()
+    await db.refresh(measurement)
+    
+    invalidate_plant(measurement.plant_id)
+    payload = MeasurementResponse.model_validate(measurement)
+    event_broker.publish(measurement.plant_id, "measurement.updated", payload.model_dump(mode="json"))
+    return payload
 
 
 @router.post("/{measurement_id}/validate", response_model=MeasurementResponse)
-def validate_measurement(
+async def validate_measurement(
     measurement_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Validate a measurement (supervisor/admin only)."""
     if current_user.role not in ["supervisor", "administrador"]:
@@ -173,17 +207,24 @@ def validate_measurement(
             detail="Solo supervisores pueden validar mediciones"
         )
     
-    measurement = db.query(Measurement).filter(Measurement.id == measurement_id).first()
+    measurement = await db.get(Measurement, measurement_id)
     if not measurement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Medición no encontrada"
         )
     
+    before = kpi_service.contribution(measurement)
     measurement.validated = "validated"
     measurement.validated_by = current_user.id
     measurement.validated_at = datetime.now()
     
-    db.commit()
-    db.refresh(measurement)
-    return measurement
+    await db.flush()
+    await db.run_sync(kpi_service.apply_change, before, measurement)
+    await db.commit()
+    await db.refresh(measurement)
+    
+    invalidate_plant(measurement.plant_id)
+    payload = MeasurementResponse.model_validate(measurement)
+    event_broker.publish(measurement.plant_id, "measurement.validated", payload.model_dump(mode="json"))
+    return payload
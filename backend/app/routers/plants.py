@@ -3,11 +3,12 @@ Plants router - CRUD operations for PTAS plants.
 """
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user, require_role
-from app.models.user import User
+from app.core.cache import invalidate_plant
+from app.core.database import get_db, get_read_db
+from app.core.security import Principal, get_current_user, require_role
 from app.models.plant import Plant
 from app.schemas.plant import PlantCreate, PlantUpdate, PlantResponse
 
@@ -15,25 +16,25 @@ router = APIRouter(prefix="/plants", tags=["Plants"])
 
 
 @router.get("", response_model=List[PlantResponse])
-def get_plants(
+async def get_plants(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get all plants."""
-    plants = db.query(Plant).offset(skip).limit(limit).all()
+    plants = (await db.execute(select(Plant).offset(skip).limit(limit))).scalars().all()
     return plants
 
 
 @router.get("/{plant_id}", response_model=PlantResponse)
-def get_plant(
+async def get_plant(
     plant_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific plant by ID."""
-    plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    plant = await db.get(Plant, plant_id)
     if not plant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,14 +44,14 @@ def get_plant(
 
 
 @router.post("", response_model=PlantResponse, status_code=status.HTTP_201_CREATED)
-def create_plant(
+async def create_plant(
     plant_data: PlantCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["administrador"]))
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role(["administrador"]))
 ):
     """Create a new plant (admin only)."""
     # Check if code already exists
-    if db.query(Plant).filter(Plant.code == plant_data.code).first():
+    if (await db.execute(select(Plant.id).where(Plant.code == plant_data.code))).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Código de planta ya existe"
@@ -58,50 +59,43 @@ def create_plant(
     
     plant = Plant(**plant_data.model_dump())
     db.add(plant)
-    db.commit()
-    db.refresh(plant)
+    await db.commit()
+    await db.refresh(plant)
     return plant
 
 
 @router.put("/{plant_id}", response_model=PlantResponse)
-def update_plant(
+async def update_plant(
     plant_id: int,
     plant_data: PlantUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["administrador", "supervisor"]))
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role(["administrador", "supervisor"]))
 ):
     """Update a plant."""
-    plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    plant = await db.get(Plant, plant_id)
     if not plant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Planta no encontrada"
         )
     
-    # Check code uniqueness if changing
-    if plant_data.code and plant_data.code != plant.code:
-        if db.query(Plant).filter(Plant.code == plant_data.code).first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Código de planta ya existe"
-            )
-    
     for key, value in plant_data.model_dump(exclude_unset=True).items():
         setattr(plant, key, value)
     
-    db.commit()
-    db.refresh(plant)
+    await db.commit()
+    await db.refresh(plant)
+    invalidate_plant(plant.id)
     return plant
 
 
 @router.delete("/{plant_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_plant(
+async def delete_plant(
     plant_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["administrador"]))
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role(["administrador"]))
 ):
     """Delete (deactivate) a plant."""
-    plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    plant = await db.get(Plant, plant_id)
     if not plant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,5 +104,6 @@ def delete_plant(
     
     # Soft delete
     plant.status = "inactive"
-    db.commit()
+    await db.commit()
+    invalidate_plant(plant_id)
     return None
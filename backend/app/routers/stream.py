@@ -0,0 +1,54 @@
+"""
+Stream router - Server-Sent Events push of plant alerts and dashboard updates.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.security import Principal, get_current_user_stream
+from app.services.events import event_broker
+
+router = APIRouter(prefix="/stream", tags=["Stream"])
+
+# Client reconnect delay sent in the SSE "retry" field (ms)
+SSE_RETRY_MS = 3000
+
+
+@router.get("/plants/{plant_id}")
+async def stream_plant_events(
+    plant_id: int,
+    request: Request,
+    last_event_id: Optional[int] = Query(default=None),
+    last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    current_user: Principal = Depends(get_current_user_stream)
+):
+    """Stream alert, measurement and equipment events for a plant.
+    
+    Reconnecting clients send Last-Event-ID (or ?last_event_id=) and receive
+    the events they missed from the broker's replay history.
+    """
+    resume_from = last_event_id
+    if resume_from is None and last_event_id_header and last_event_id_header.isdigit():
+        resume_from = int(last_event_id_header)
+    
+    async def event_stream():
+        subscription = event_broker.subscribe(plant_id, resume_from)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.SSE_HEARTBEAT_SECONDS)
+                if event is not None:
+                    yield event.to_sse()
+                elif subscription.closed:
+                    break
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
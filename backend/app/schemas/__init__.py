@@ -17,6 +17,7 @@ from app.schemas.measurement import (
     MeasurementUpdate,
     MeasurementResponse,
     MeasurementStats,
+    TrendPoint,
 )
 from app.schemas.equipment import (
     EquipmentCreate,
@@ -24,13 +25,18 @@ from app.schemas.equipment import (
     EquipmentResponse,
     EquipmentHoursCreate,
     EquipmentHoursResponse,
+    EquipmentHoursBulk,
+    EquipmentHoursBulkResult,
 )
 from app.schemas.alert import (
     AlertCreate,
     AlertUpdate,
     AlertResolve,
+    AlertBulkResolve,
+    AlertBulkResolveResult,
     AlertResponse,
     AlertStats,
+    PlantAlertStats,
 )
 
 __all__ = [
@@ -47,14 +53,20 @@ __all__ = [
     "MeasurementUpdate",
     "MeasurementResponse",
     "MeasurementStats",
+    "TrendPoint",
     "EquipmentCreate",
     "EquipmentUpdate",
     "EquipmentResponse",
     "EquipmentHoursCreate",
     "EquipmentHoursResponse",
+    "EquipmentHoursBulk",
+    "EquipmentHoursBulkResult",
     "AlertCreate",
     "AlertUpdate",
     "AlertResolve",
+    "AlertBulkResolve",
+    "AlertBulkResolveResult",
     "AlertResponse",
     "AlertStats",
+    "PlantAlertStats",
 ]
@@ -1,6 +1,6 @@
 """Pydantic schemas for alerts."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -13,6 +13,7 @@ class AlertBase(BaseModel):
     ds90_violation: bool = False
     ds609_violation: bool = False
     norm_reference: Optional[str] = None
+    parameter: Optional[str] = None
 
 
 class AlertCreate(AlertBase):
@@ -21,7 +22,7 @@ class AlertCreate(AlertBase):
 
 
 class AlertUpdate(BaseModel):
-    is_resolved: Optional[str] = None
+    is_resolved: Optional[bool] = None
     resolution_notes: Optional[str] = None
 
 
@@ -29,14 +30,31 @@ class AlertResolve(BaseModel):
     resolution_notes: Optional[str] = None
 
 
+class AlertBulkResolve(BaseModel):
+    """Resolve alerts by id list and/or filter."""
+    ids: Optional[List[int]] = None
+    plant_id: Optional[int] = None
+    alert_type: Optional[str] = None
+    severity: Optional[str] = None
+    before: Optional[datetime] = None  # created_at < before
+    resolution_notes: Optional[str] = None
+
+
+class AlertBulkResolveResult(BaseModel):
+    resolved: int = 0
+    ids: List[int] = []
+
+
 class AlertResponse(AlertBase):
     id: int
     measurement_id: Optional[int] = None
     equipment_id: Optional[int] = None
-    is_resolved: str
+    is_resolved: bool
     resolved_by: Optional[int] = None
     resolved_at: Optional[datetime] = None
     resolution_notes: Optional[str] = None
+    occurrence_count: int = 1
+    last_seen_at: Optional[datetime] = None
     created_at: datetime
     
     class Config:
@@ -52,3 +70,8 @@ class AlertStats(BaseModel):
     warning: int = 0
     ds90_violations: int = 0
     ds609_violations: int = 0
+
+
+class PlantAlertStats(AlertStats):
+    """Alert statistics for one plant in a cross-plant listing."""
+    plant_id: int
@@ -1,7 +1,7 @@
 """Pydantic schemas for equipment."""
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from datetime import date as Date, datetime
 
 
 class EquipmentBase(BaseModel):
@@ -45,10 +45,21 @@ class EquipmentResponse(EquipmentBase):
 
 class EquipmentHoursBase(BaseModel):
     equipment_id: int
-    date: datetime
+    date: Date
     hours_run: float
     energy_kwh: Optional[float] = None
     notes: Optional[str] = None
+    
+    @field_validator("date", mode="before")
+    @classmethod
+    def truncate_to_day(cls, value):
+        """Hours are per calendar day: keep the date of a timestamp as sent."""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        return value.date() if isinstance(value, datetime) else value
 
 
 class EquipmentHoursCreate(EquipmentHoursBase):
@@ -61,3 +72,14 @@ class EquipmentHoursResponse(EquipmentHoursBase):
     
     class Config:
         from_attributes = True
+
+
+class EquipmentHoursBulk(BaseModel):
+    """Daily hours for many equipment, upserted on (equipment_id, date)."""
+    plant_id: Optional[int] = None  # Every item must belong to this plant
+    # One INSERT: 5 parameters per row stay under the driver's 32767 limit
+    items: List[EquipmentHoursCreate] = Field(..., min_length=1, max_length=5000)
+
+
+class EquipmentHoursBulkResult(BaseModel):
+    upserted: int = 0
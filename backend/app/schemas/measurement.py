@@ -79,3 +79,9 @@ class MeasurementStats(BaseModel):
     avg_caudal: Optional[float] = None
     compliance_rate: float = 0.0
     total_measurements: int = 0
+
+
+class TrendPoint(BaseModel):
+    """A point of a parameter trend."""
+    timestamp: datetime
+    value: float
@@ -1,10 +1,22 @@
 """Services package."""
 from app.services.normativity import normativity, NormativityService
 from app.services.ia_engine import ia_engine, IAEngine
+from app.services.alerts import alert_service, AlertService
+from app.services.events import event_broker, EventBroker
+from app.services.notifications import notification_dispatcher, NotificationDispatcher
+from app.services.kpis import kpi_service, KpiService
 
 __all__ = [
     "normativity",
     "NormativityService",
     "ia_engine",
     "IAEngine",
+    "alert_service",
+    "AlertService",
+    "event_broker",
+    "EventBroker",
+    "notification_dispatcher",
+    "NotificationDispatcher",
+    "kpi_service",
+    "KpiService",
 ]
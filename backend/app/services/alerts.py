@@ -0,0 +1,72 @@
+"""
+Alert service - alert creation with deduplication/coalescing.
+
+A probe stuck at a bad reading raises the same alert on every measurement.
+Instead of inserting a new row each time, repeats of an open alert within
+the coalescing window bump its occurrence count and last-seen timestamp.
+"""
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.models.alert import Alert
+
+
+class AlertService:
+    """Service to create alerts, coalescing repeats of open alerts."""
+
+    def __init__(self, window_minutes: int = settings.ALERT_COALESCE_WINDOW_MINUTES):
+        self.window_minutes = window_minutes
+
+    def find_open_duplicate(self, db: Session, data: Dict[str, Any]) -> Optional[Alert]:
+        """Find the open alert matching the coalescing key within the window.
+
+        Key: (plant, equipment, parameter, alert_type, norm_reference).
+        """
+        if self.window_minutes <= 0:
+            return None
+
+        since = datetime.now() - timedelta(minutes=self.window_minutes)
+        return db.query(Alert).filter(
+            Alert.plant_id == data["plant_id"],
+            Alert.equipment_id.is_not_distinct_from(data.get("equipment_id")),
+            Alert.parameter.is_not_distinct_from(data.get("parameter")),
+            Alert.alert_type == data["alert_type"],
+            Alert.norm_reference.is_not_distinct_from(data.get("norm_reference")),
+            ~Alert.is_resolved,
+            Alert.last_seen_at >= since
+        ).order_by(Alert.last_seen_at.desc()).with_for_update().first()
+
+    def create_or_coalesce(self, db: Session, data: Dict[str, Any]) -> Tuple[Alert, bool]:
+        """Create an alert or fold it into a matching open one.
+
+        Returns the alert and whether a new row was inserted. Flushes but does
+        not commit, so the caller can add related rows (e.g. the notification
+        outbox) in the same transaction.
+        """
+        alert = self.find_open_duplicate(db, data)
+
+        if alert is None:
+            alert = Alert(**data)
+            db.add(alert)
+            db.flush()
+            db.refresh(alert)
+            return alert, True
+
+        # Increment server-side so concurrent repeats don't lose counts
+        alert.occurrence_count = Alert.occurrence_count + 1
+        alert.last_seen_at = func.now()
+        alert.message = data["message"]
+        alert.severity = data["severity"]
+        if data.get("measurement_id") is not None:
+            alert.measurement_id = data["measurement_id"]
+
+        db.flush()
+        db.refresh(alert)
+        return alert, False
+
+
+# Singleton instance
+alert_service = AlertService()
@@ -0,0 +1,139 @@
+"""
+Event broker - in-process pub/sub for real-time plant updates.
+
+Write paths (alerts, measurements, equipment) publish events per plant;
+the stream router fans them out to every subscriber of that plant. A short
+per-plant history lets reconnecting clients resume from their Last-Event-ID.
+
+Request handlers publish from the event loop, but publish() does not rely
+on it: background jobs and commit hooks run in worker threads, and each
+subscription belongs to the loop that reads it. So publish() is thread-safe
+and hands events to each subscriber's loop with call_soon_threadsafe.
+
+The broker, its history and its event ids are per process. With several
+uvicorn workers a stream only carries the events published by the worker
+that serves it, and a Last-Event-ID from one worker means nothing to
+another (ids are counted separately, so a reconnect elsewhere may skip or
+repeat events). Multi-worker deployments must route every stream of a
+plant, and the writes it should see, to one worker, or accept that clients
+refresh over HTTP after reconnecting.
+"""
+from typing import Any, Deque, Dict, List, Optional, Set
+from dataclasses import dataclass
+from collections import defaultdict, deque
+import asyncio
+import json
+import threading
+
+from app.core.config import settings
+
+
+@dataclass
+class Event:
+    id: int
+    plant_id: int
+    type: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        """Encode as a Server-Sent Events message."""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class Subscription:
+    """A subscriber's bounded queue, bound to the event loop that reads it."""
+
+    def __init__(self, plant_id: int, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.plant_id = plant_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.closed = False
+
+    def push(self, event: Event) -> None:
+        """Schedule delivery from any thread."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: Optional[Event]) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the stream, the client resumes via Last-Event-ID
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """Next event, or None on timeout or once the subscription is closed."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Per-plant publish/subscribe with replay history."""
+
+    def __init__(
+        self,
+        history_size: int = settings.EVENTS_HISTORY_SIZE,
+        queue_size: int = settings.EVENTS_QUEUE_SIZE,
+    ):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._history: Dict[int, Deque[Event]] = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    def publish(self, plant_id: int, event_type: str, data: Dict[str, Any]) -> Event:
+        """Publish an event to every subscriber of a plant."""
+        with self._lock:
+            self._last_id += 1
+            event = Event(id=self._last_id, plant_id=plant_id, type=event_type, data=data)
+            self._history[plant_id].append(event)
+            subscribers = list(self._subscribers.get(plant_id, ()))
+
+        for subscription in subscribers:
+            subscription.push(event)
+        return event
+
+    def subscribe(self, plant_id: int, last_event_id: Optional[int] = None) -> Subscription:
+        """Subscribe to a plant, replaying history newer than last_event_id.
+
+        Must be called from the event loop that will consume the subscription.
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            backlog: List[Event] = []
+            if last_event_id is not None:
+                backlog = [e for e in self._history.get(plant_id, ()) if e.id > last_event_id]
+            subscription = Subscription(plant_id, loop, self.queue_size + len(backlog))
+            self._subscribers[plant_id].add(subscription)
+
+        for event in backlog:
+            subscription._put(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.plant_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.plant_id]
+
+    def subscriber_count(self, plant_id: Optional[int] = None) -> int:
+        """Number of active subscriptions, for one plant or overall."""
+        with self._lock:
+            if plant_id is not None:
+                return len(self._subscribers.get(plant_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+
+# Singleton instance
+event_broker = EventBroker()
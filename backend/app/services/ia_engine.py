@@ -5,8 +5,9 @@ Uses statistical methods (IQR, Z-score) for detection.
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-import numpy as np
-from scipy import stats
+
+# numpy is imported inside the methods that use it: this module is loaded with
+# app.services on every worker start, while the detectors run rarely
 
 
 @dataclass
@@ -55,6 +56,8 @@ class IAEngine:
     
     def _detect_zscore(self, values: List[float], param: str) -> List[Anomaly]:
         """Detect anomalies using Z-score method."""
+        import numpy as np
+        
         anomalies = []
         
         values_array = np.array(values)
@@ -82,6 +85,8 @@ class IAEngine:
     
     def _detect_iqr(self, values: List[float], param: str) -> List[Anomaly]:
         """Detect anomalies using IQR method."""
+        import numpy as np
+        
         anomalies = []
         
         values_array = np.array(values)
@@ -111,6 +116,8 @@ class IAEngine:
         if len(values) < window:
             return {"trend": "insufficient_data"}
         
+        import numpy as np
+        
         values_array = np.array(values)
         
         # Calculate moving average
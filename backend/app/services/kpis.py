@@ -0,0 +1,312 @@
+"""
+KPI service - precomputed disinfection-phase KPI snapshots.
+
+A periodic job recomputes snapshots for the standard periods of every
+plant in one grouped query; new and edited measurements are folded into
+the open snapshots incrementally, so writes never re-aggregate history.
+The KPI endpoints read snapshots and only compute live for non-standard
+windows or plants without a snapshot yet.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, dialect_insert
+from app.models.kpi import KpiSnapshot
+from app.models.measurement import Measurement
+from app.models.plant import Plant
+
+logger = logging.getLogger(__name__)
+
+# Phase the KPIs are computed on
+KPI_PHASE = "desinfeccion"
+
+# (snapshot sum/count column prefix, measurement column)
+KPI_PARAMETERS = (
+    ("caudal", Measurement.caudal_effluent_m3h),
+    ("ph", Measurement.ph),
+    ("chlorine", Measurement.chlorine_free),
+)
+
+
+def _nonzero(value) -> bool:
+    # Matches the original get_kpis: None and zero readings are excluded
+    return value is not None and value != 0
+
+
+def kpi_result(
+    days: int,
+    total: int,
+    validated: int,
+    averages: Dict[str, Optional[float]],
+) -> Dict[str, Any]:
+    """Shape KPI aggregates like the /dashboard/kpis response."""
+    if not total:
+        return {
+            "period_days": days,
+            "total_measurements": 0,
+            "compliance_rate": 0.0
+        }
+    return {
+        "period_days": days,
+        "total_measurements": total,
+        "compliance_rate": round(validated / total * 100, 2),
+        "avg_caudal": averages.get("caudal"),
+        "avg_ph": averages.get("ph"),
+        "avg_chlorine": averages.get("chlorine"),
+    }
+
+
+def _round_avg(total, count) -> Optional[float]:
+    return round(float(total) / count, 2) if count else None
+
+
+class KpiService:
+    """Maintains and serves KPI snapshots."""
+
+    STANDARD_PERIODS = (1, 7, 30, 365)
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.refresh_seconds = settings.KPI_SNAPSHOT_REFRESH_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    # Reads
+
+    def get_snapshots(self, db: Session, plant_ids: List[int], days: int) -> Dict[int, Dict[str, Any]]:
+        """KPI results from snapshots for a standard period, keyed by plant."""
+        snapshots = db.query(KpiSnapshot).filter(
+            KpiSnapshot.plant_id.in_(plant_ids),
+            KpiSnapshot.period_days == days
+        ).all()
+        return {s.plant_id: self._snapshot_result(s) for s in snapshots}
+
+    def get_kpis(self, db: Session, plant_id: int, days: int) -> Dict[str, Any]:
+        """KPIs for a plant: snapshot for standard periods, live otherwise."""
+        if days in self.STANDARD_PERIODS:
+            result = self.get_snapshots(db, [plant_id], days).get(plant_id)
+            if result is not None:
+                return result
+        return self.compute_live(db, [plant_id], days).get(plant_id, kpi_result(days, 0, 0, {}))
+
+    def compute_live(self, db: Session, plant_ids: List[int], days: int) -> Dict[int, Dict[str, Any]]:
+        """KPI results from raw measurements, one grouped query for all plants."""
+        columns = [
+            func.count(Measurement.id).label("total"),
+            func.count(Measurement.id).filter(Measurement.validated == "validated").label("validated"),
+        ]
+        for name, column in KPI_PARAMETERS:
+            columns.append(func.avg(func.nullif(column, 0)).label(name))
+
+        rows = db.execute(
+            select(Measurement.plant_id, *columns).where(
+                Measurement.plant_id.in_(plant_ids),
+                Measurement.timestamp >= datetime.now() - timedelta(days=days),
+                Measurement.phase == KPI_PHASE
+            ).group_by(Measurement.plant_id)
+        ).mappings()
+
+        return {
+            row["plant_id"]: kpi_result(
+                days,
+                row["total"],
+                row["validated"],
+                {
+                    name: round(float(row[name]), 2) if row[name] is not None else None
+                    for name, _ in KPI_PARAMETERS
+                },
+            )
+            for row in rows
+        }
+
+    def _snapshot_result(self, snapshot: KpiSnapshot) -> Dict[str, Any]:
+        return kpi_result(
+            snapshot.period_days,
+            snapshot.total_measurements,
+            snapshot.validated_count,
+            {
+                name: _round_avg(getattr(snapshot, f"{name}_sum"), getattr(snapshot, f"{name}_count"))
+                for name, _ in KPI_PARAMETERS
+            },
+        )
+
+    # Writes
+
+    def refresh(self, db: Session, plant_ids: Optional[Iterable[int]] = None) -> int:
+        """Recompute standard-period snapshots (all plants if None) and upsert them.
+
+        One grouped pass over the longest window computes every period.
+        Does not commit. Returns the number of snapshots written.
+        """
+        if plant_ids is None:
+            plant_ids = [p for (p,) in db.query(Plant.id).all()]
+        plant_ids = list(plant_ids)
+        if not plant_ids:
+            return 0
+
+        now = datetime.now()
+        starts = {d: now - timedelta(days=d) for d in self.STANDARD_PERIODS}
+
+        columns = []
+        for days, start in starts.items():
+            in_window = Measurement.timestamp >= start
+            columns.append(func.count(Measurement.id).filter(in_window).label(f"total_{days}"))
+            columns.append(
+                func.count(Measurement.id).filter(
+                    in_window, Measurement.validated == "validated"
+                ).label(f"validated_{days}")
+            )
+            for name, column in KPI_PARAMETERS:
+                nonzero = (column.isnot(None), column != 0)
+                columns.append(func.coalesce(func.sum(column).filter(in_window, *nonzero), 0).label(f"{name}_sum_{days}"))
+                columns.append(func.count(column).filter(in_window, *nonzero).label(f"{name}_count_{days}"))
+
+        rows = {
+            row["plant_id"]: row
+            for row in db.execute(
+                select(Measurement.plant_id, *columns).where(
+                    Measurement.plant_id.in_(plant_ids),
+                    Measurement.timestamp >= starts[max(self.STANDARD_PERIODS)],
+                    Measurement.phase == KPI_PHASE
+                ).group_by(Measurement.plant_id)
+            ).mappings()
+        }
+
+        values = []
+        for plant_id in plant_ids:
+            row = rows.get(plant_id)
+            for days, start in starts.items():
+                snapshot = {
+                    "plant_id": plant_id,
+                    "period_days": days,
+                    "window_start": start,
+                    "total_measurements": row[f"total_{days}"] if row else 0,
+                    "validated_count": row[f"validated_{days}"] if row else 0,
+                    "computed_at": now,
+                }
+                for name, _ in KPI_PARAMETERS:
+                    snapshot[f"{name}_sum"] = row[f"{name}_sum_{days}"] if row else 0
+                    snapshot[f"{name}_count"] = row[f"{name}_count_{days}"] if row else 0
+                values.append(snapshot)
+
+        insert = dialect_insert(db)
+        statement = insert(KpiSnapshot).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["plant_id", "period_days"],
+            set_={
+                key: statement.excluded[key]
+                for key in values[0]
+                if key not in ("plant_id", "period_days")
+            },
+        )
+        db.execute(statement)
+        return len(values)
+
+    def contribution(self, measurement: Measurement) -> Optional[Dict[str, Any]]:
+        """What a measurement adds to the snapshots covering its timestamp.
+
+        None outside the KPI phase. Take it before editing a measurement and
+        pass it to ``apply_change`` afterwards.
+        """
+        if measurement.phase != KPI_PHASE:
+            return None
+
+        values = {
+            "plant_id": measurement.plant_id,
+            "timestamp": measurement.timestamp,
+            "total_measurements": 1,
+            "validated_count": 1 if measurement.validated == "validated" else 0,
+        }
+        for name, column in KPI_PARAMETERS:
+            value = getattr(measurement, column.key)
+            values[f"{name}_sum"] = value if _nonzero(value) else 0
+            values[f"{name}_count"] = 1 if _nonzero(value) else 0
+        return values
+
+    def _fold(self, db: Session, contribution: Dict[str, Any], sign: int) -> None:
+        # Measurements older than a snapshot's window are skipped
+        increments = {
+            key: getattr(KpiSnapshot, key) + sign * value
+            for key, value in contribution.items()
+            if key not in ("plant_id", "timestamp") and value
+        }
+        db.execute(
+            update(KpiSnapshot)
+            .where(
+                KpiSnapshot.plant_id == contribution["plant_id"],
+                KpiSnapshot.window_start <= contribution["timestamp"]
+            )
+            .values(**increments)
+            .execution_options(synchronize_session=False)
+        )
+
+    def apply_measurement(self, db: Session, measurement: Measurement) -> None:
+        """Fold a new measurement into the plant's open snapshots (one UPDATE).
+
+        Does not commit.
+        """
+        contribution = self.contribution(measurement)
+        if contribution is not None:
+            self._fold(db, contribution, 1)
+
+    def apply_change(self, db: Session, before: Optional[Dict[str, Any]], measurement: Measurement) -> None:
+        """Replace an edited measurement's old contribution with its new one.
+
+        ``before`` is ``contribution()`` taken before the edit. At most two
+        UPDATEs (old windows minus, new windows plus); does not commit.
+        """
+        after = self.contribution(measurement)
+        if before == after:
+            return
+        if before is not None:
+            self._fold(db, before, -1)
+        if after is not None:
+            self._fold(db, after, 1)
+
+    # Periodic job
+
+    def refresh_if_due(self) -> int:
+        """Refresh all plants unless another worker did so recently."""
+        db = self.session_factory()
+        try:
+            oldest = db.query(func.min(KpiSnapshot.computed_at)).scalar()
+            if oldest is not None and oldest > datetime.now(oldest.tzinfo) - timedelta(seconds=self.refresh_seconds / 2):
+                return 0
+            written = self.refresh(db)
+            db.commit()
+            return written
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        """Refresh loop; DB work runs in a thread."""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_if_due)
+            except Exception:
+                logger.exception("KPI snapshot refresh failed")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        """Start the periodic refresh job."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the periodic refresh job."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+kpi_service = KpiService()
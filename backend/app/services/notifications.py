@@ -0,0 +1,334 @@
+"""
+Notification service - batched, asynchronous e-mail delivery of alerts.
+
+New alerts are written to the notification_outbox table in the same
+transaction as the alert, so a notification is never lost or sent for an
+alert that was rolled back.
+A background dispatcher in each worker claims due rows, groups them into one
+digest per recipient and sends them over pooled SMTP connections, off the
+request path, up to SMTP_POOL_SIZE digests at a time. Failed sends are
+retried with exponential backoff and each plant is capped at
+NOTIFY_PLANT_RATE_PER_HOUR notifications.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+import asyncio
+import logging
+import queue
+import smtplib
+import threading
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.alert import Alert
+from app.models.notification import NotificationOutbox
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Roles that receive alert e-mails
+NOTIFY_ROLES = ("supervisor", "administrador")
+
+# A claimed batch is re-delivered if its worker dies before finishing
+CLAIM_LEASE_SECONDS = 300
+
+
+class SMTPConnectionPool:
+    """Bounded pool of reusable SMTP connections (thread-safe)."""
+
+    def __init__(
+        self,
+        host: str = settings.SMTP_HOST,
+        port: int = settings.SMTP_PORT,
+        user: Optional[str] = settings.SMTP_USER,
+        password: Optional[str] = settings.SMTP_PASSWORD,
+        use_tls: bool = settings.SMTP_USE_TLS,
+        size: int = settings.SMTP_POOL_SIZE,
+        timeout: float = 10.0,
+        factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a live connection; broken connections are discarded."""
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except (smtplib.SMTPException, OSError):
+            if conn is not None:
+                self._close(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put_nowait(conn)
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(conn)
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = self.factory(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.user:
+            conn.login(self.user, self.password or "")
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+
+class NotificationDispatcher:
+    """Queues alert notifications and delivers them as per-recipient digests."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        pool: Optional[SMTPConnectionPool] = None,
+    ):
+        self.session_factory = session_factory
+        self.pool = pool or SMTPConnectionPool()
+        self.interval = settings.NOTIFY_INTERVAL_SECONDS
+        self.batch_size = settings.NOTIFY_BATCH_SIZE
+        self.max_attempts = settings.NOTIFY_MAX_ATTEMPTS
+        self.backoff_seconds = settings.NOTIFY_BACKOFF_SECONDS
+        self.plant_rate_per_hour = settings.NOTIFY_PLANT_RATE_PER_HOUR
+        self._task: Optional[asyncio.Task] = None
+
+    # Enqueue (request path)
+
+    def enqueue_alert(self, db: Session, alert: Alert) -> int:
+        """Queue one outbox row per recipient of an alert.
+
+        Runs in the caller's transaction (the one that inserted the alert);
+        does not commit.
+        """
+        recipients = db.query(User.email).filter(
+            User.is_active.is_(True),
+            User.role.in_(NOTIFY_ROLES),
+            or_(User.plant_id == alert.plant_id, User.plant_id.is_(None))
+        ).all()
+
+        db.add_all([
+            NotificationOutbox(
+                plant_id=alert.plant_id,
+                alert_id=alert.id,
+                recipient=email,
+                severity=alert.severity,
+                title=alert.title,
+                message=alert.message,
+            )
+            for (email,) in recipients
+        ])
+        return len(recipients)
+
+    # Dispatch (background)
+
+    def dispatch_once(self) -> int:
+        """Claim due notifications, send digests and record results.
+
+        Returns the number of notifications delivered.
+        """
+        db = self.session_factory()
+        try:
+            claimed = self._claim(db)
+            if not claimed:
+                return 0
+
+            digests: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for row in claimed:
+                digests[row["recipient"]].append(row)
+
+            # Sends run in parallel, one per pooled connection; the session
+            # stays in this thread
+            with ThreadPoolExecutor(max_workers=min(self.pool.size, len(digests))) as executor:
+                sends = {
+                    recipient: executor.submit(self._send_digest, recipient, rows)
+                    for recipient, rows in digests.items()
+                }
+
+            delivered = 0
+            for recipient, rows in digests.items():
+                try:
+                    sends[recipient].result()
+                except Exception as exc:
+                    logger.warning("Notification digest to %s failed: %s", recipient, exc)
+                    self._mark_failed(db, rows, str(exc))
+                else:
+                    self._mark_sent(db, rows)
+                    delivered += len(rows)
+            db.commit()
+            return delivered
+        finally:
+            db.close()
+
+    def _claim(self, db: Session) -> List[Dict[str, Any]]:
+        """Lock due rows, apply per-plant rate limits and lease the rest."""
+        now = datetime.now()
+        rows = db.query(NotificationOutbox).filter(
+            NotificationOutbox.status.in_(("pending", "sending")),
+            NotificationOutbox.next_attempt_at <= now
+        ).order_by(NotificationOutbox.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        if not rows:
+            db.commit()
+            return []
+
+        plant_ids = {r.plant_id for r in rows}
+        sent_last_hour = dict(
+            db.query(NotificationOutbox.plant_id, func.count(NotificationOutbox.id)).filter(
+                NotificationOutbox.plant_id.in_(plant_ids),
+                NotificationOutbox.status == "sent",
+                NotificationOutbox.sent_at >= now - timedelta(hours=1)
+            ).group_by(NotificationOutbox.plant_id).all()
+        )
+        budget = {p: self.plant_rate_per_hour - sent_last_hour.get(p, 0) for p in plant_ids}
+
+        claimed = []
+        for row in rows:
+            if row.status == "sending":
+                # Lease expired: the worker died mid-send, which counts as an attempt
+                row.attempts += 1
+                if row.attempts >= self.max_attempts:
+                    row.status = "failed"
+                    row.last_error = "Lease expired before the send was confirmed"
+                    continue
+            if budget[row.plant_id] > 0:
+                budget[row.plant_id] -= 1
+                row.status = "sending"
+                row.next_attempt_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+                claimed.append({
+                    "id": row.id,
+                    "plant_id": row.plant_id,
+                    "recipient": row.recipient,
+                    "severity": row.severity,
+                    "title": row.title,
+                    "message": row.message,
+                    "attempts": row.attempts,
+                    "created_at": row.created_at,
+                })
+            else:
+                # Rate limited: try again next tick
+                row.status = "pending"
+                row.next_attempt_at = now + timedelta(seconds=self.interval)
+
+        db.commit()
+        return claimed
+
+    def _send_digest(self, recipient: str, rows: List[Dict[str, Any]]) -> None:
+        msg = EmailMessage()
+        msg["From"] = settings.SMTP_FROM
+        msg["To"] = recipient
+        msg["Subject"] = f"[PTAS] {len(rows)} alerta(s) nueva(s)"
+
+        lines = []
+        for row in rows:
+            created = row["created_at"].strftime("%Y-%m-%d %H:%M") if row["created_at"] else ""
+            lines.append(f"[{row['severity'].upper()}] Planta {row['plant_id']} - {row['title']} ({created})")
+            lines.append(f"    {row['message']}")
+        msg.set_content("\n".join(lines))
+
+        with self.pool.connection() as conn:
+            conn.send_message(msg)
+
+    def _mark_sent(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_([r["id"] for r in rows]))
+            .values(
+                status="sent",
+                attempts=NotificationOutbox.attempts + 1,
+                sent_at=func.now(),
+                last_error=None,
+            )
+        )
+
+    def _mark_failed(self, db: Session, rows: List[Dict[str, Any]], error: str) -> None:
+        now = datetime.now()
+        for row in rows:
+            attempts = row["attempts"] + 1
+            give_up = attempts >= self.max_attempts
+            db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == row["id"])
+                .values(
+                    status="failed" if give_up else "pending",
+                    attempts=attempts,
+                    next_attempt_at=now + timedelta(seconds=self.backoff_seconds * 2 ** (attempts - 1)),
+                    last_error=error[:1000],
+                )
+            )
+
+    # Lifecycle
+
+    async def run(self) -> None:
+        """Dispatch loop; DB and SMTP work runs in a thread."""
+        while True:
+            try:
+                await asyncio.to_thread(self.dispatch_once)
+            except Exception:
+                logger.exception("Notification dispatch failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background dispatch loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the dispatch loop and close pooled connections."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.pool.close()
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,234 @@
+"""
+Deterministic synthetic fleet data for load benchmarks.
+
+Loads ``--plants`` plants (codes ``BENCH-001``...) with an operator each,
+measurements for all six phases every ``--interval-hours`` over the last
+``--years`` years, equipment with daily operating hours, and alerts for the
+out-of-range samples. The same seed always produces the same data; only the
+time axis follows the current date so rolling dashboard windows have data.
+
+Usage (from backend/, against the database in DATABASE_URL):
+    python -m benchmarks.fleet --plants 50 --years 2 --interval-hours 12
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, List
+import argparse
+import random
+import sys
+import time
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal, engine, init_db
+from app.core.security import get_password_hash
+from app.models.alert import Alert
+from app.models.equipment import Equipment, EquipmentHours
+from app.models.measurement import Measurement
+from app.models.plant import Plant
+from app.models.user import User
+from app.services.kpis import kpi_service
+
+PHASES = ("afluente", "pretratamiento", "reactor", "clarificador", "desinfeccion", "lodos")
+CODE_PREFIX = "BENCH-"
+OPERATOR_PASSWORD = "bench123"
+REGIONS = ("Metropolitana", "Valparaíso", "Biobío", "Maule", "Araucanía", "Los Lagos")
+TREATMENTS = ("Lodos Activados", "Lagunas Aireadas", "SBR", "Biofiltro")
+EQUIPMENT_TYPES = ("bomba", "motor", "soplador", "mezclador", "decantador", "filtro", "bomba", "soplador")
+BATCH_SIZE = 5000
+
+# Typical (low, high) ranges per phase; effluent phases are cleaner
+PHASE_RANGES: Dict[str, Dict[str, tuple]] = {
+    "afluente": {"ph": (6.8, 7.8), "temperature": (12, 24), "sst": (150, 350), "dbo5": (150, 350), "dqo": (300, 700)},
+    "pretratamiento": {"ph": (6.8, 7.8), "temperature": (12, 24), "sst": (120, 280), "dbo5": (140, 320)},
+    "reactor": {"ph": (6.8, 7.6), "temperature": (14, 26), "od": (1.5, 3.5), "sst": (2000, 4000)},
+    "clarificador": {"ph": (6.8, 7.8), "turbidity": (2, 15), "sst": (15, 60), "level_sludge_m": (0.2, 1.0)},
+    "desinfeccion": {"ph": (6.8, 8.2), "chlorine_free": (0.3, 1.5), "sst": (10, 70), "dbo5": (10, 50), "dqo": (30, 140)},
+    "lodos": {"ph": (6.5, 7.5), "level_sludge_m": (0.5, 2.5)},
+}
+PARAMETERS = sorted({parameter for ranges in PHASE_RANGES.values() for parameter in ranges})
+EXCURSION_RATE = 0.02  # Share of effluent samples pushed out of range
+PLACES = {"level_sludge_m": 3}
+
+
+def _dec(rng: random.Random, low: float, high: float, places: int = 2) -> Decimal:
+    return Decimal(f"{rng.uniform(low, high):.{places}f}")
+
+
+def _batches(rows: Iterator[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def plant_rows(count: int, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "name": f"PTAS Bench {i:03d}",
+            "code": f"{CODE_PREFIX}{i:03d}",
+            "address": f"Camino {rng.randint(1, 999)}",
+            "region": REGIONS[i % len(REGIONS)],
+            "capacity_m3d": rng.choice((250, 500, 1000, 2500, 5000)),
+            "population_equiv": rng.randint(1000, 40000),
+            "treatment_type": TREATMENTS[i % len(TREATMENTS)],
+            "status": "active",
+            "ds90_enabled": True,
+            "ds609_enabled": i % 3 == 0,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def measurement_rows(plant_id: int, user_id: int, start: datetime, end: datetime,
+                     interval: timedelta, rng: random.Random, alerts: List[dict]) -> Iterator[dict]:
+    """One sample per phase per interval; excursions also append an alert row."""
+    validated_before = end - timedelta(days=7)
+    timestamp = start
+    while timestamp < end:
+        caudal = rng.uniform(5, 60)
+        for phase in PHASES:
+            row = {
+                "plant_id": plant_id,
+                "user_id": user_id,
+                "timestamp": timestamp,
+                "phase": phase,
+                "caudal_affluent_m3h": _dec(rng, caudal * 0.95, caudal * 1.05, 3),
+                "caudal_effluent_m3h": _dec(rng, caudal * 0.9, caudal, 3),
+                "validated": "validated" if timestamp < validated_before else "pending",
+                "validated_by": user_id if timestamp < validated_before else None,
+                "validated_at": timestamp + timedelta(hours=2) if timestamp < validated_before else None,
+                **dict.fromkeys(PARAMETERS),  # Same keys on every row for executemany
+            }
+            for parameter, (low, high) in PHASE_RANGES[phase].items():
+                row[parameter] = _dec(rng, low, high, PLACES.get(parameter, 2))
+            if phase == "desinfeccion" and rng.random() < EXCURSION_RATE:
+                parameter = rng.choice(("ph", "sst", "dbo5"))
+                row[parameter] = Decimal("9.40") if parameter == "ph" else row[parameter] * 3
+                alerts.append({
+                    "plant_id": plant_id,
+                    "alert_type": "ds90_violation",
+                    "parameter": parameter,
+                    "severity": "critical" if parameter == "ph" else "high",
+                    "title": f"{parameter} fuera de norma",
+                    "message": f"{parameter} = {row[parameter]} en {phase}",
+                    "ds90_violation": True,
+                    "norm_reference": "DS90",
+                    "is_resolved": timestamp < validated_before,
+                    "resolved_by": user_id if timestamp < validated_before else None,
+                    "resolved_at": timestamp + timedelta(hours=6) if timestamp < validated_before else None,
+                    "occurrence_count": 1,
+                    "last_seen_at": timestamp,
+                    "created_at": timestamp,
+                })
+            yield row
+        timestamp += interval
+
+
+def equipment_rows(plant_id: int, code: str, rng: random.Random, start: datetime) -> List[dict]:
+    return [
+        {
+            "plant_id": plant_id,
+            "name": f"{kind.capitalize()} {n + 1}",
+            "code": f"{code}-E{n + 1:02d}",
+            "equipment_type": kind,
+            "power_kw": _dec(rng, 1, 75),
+            "status": "active" if rng.random() > 0.05 else "maintenance",
+            "install_date": start,
+        }
+        for n, kind in enumerate(EQUIPMENT_TYPES)
+    ]
+
+
+def hours_rows(equipment_ids: List[int], start: datetime, end: datetime, rng: random.Random) -> Iterator[dict]:
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        for equipment_id in equipment_ids:
+            hours = rng.uniform(4, 24)
+            yield {
+                "equipment_id": equipment_id,
+                "date": day.date(),
+                "hours_run": Decimal(f"{hours:.2f}"),
+                "energy_kwh": _dec(rng, hours * 2, hours * 20),
+            }
+        day += timedelta(days=1)
+
+
+def generate(plants: int, years: float, interval_hours: float, seed: int) -> Dict[str, int]:
+    """Insert the synthetic fleet and refresh KPI snapshots. Returns row counts."""
+    rng = random.Random(seed)
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=round(365 * years))
+    interval = timedelta(hours=interval_hours)
+    password_hash = get_password_hash(OPERATOR_PASSWORD)
+    counts = {"plants": 0, "users": 0, "measurements": 0, "equipment": 0, "equipment_hours": 0, "alerts": 0}
+
+    with engine.begin() as conn:
+        for plant in plant_rows(plants, rng):
+            plant_id = conn.execute(Plant.__table__.insert().returning(Plant.id), plant).scalar_one()
+            user_id = conn.execute(User.__table__.insert().returning(User.id), {
+                "email": f"bench{plant_id}@ptas.cl",
+                "username": f"bench_op_{plant['code'][len(CODE_PREFIX):]}",
+                "password_hash": password_hash,
+                "full_name": f"Operador {plant['name']}",
+                "role": "operador",
+                "plant_id": plant_id,
+                "is_active": True,
+            }).scalar_one()
+
+            alerts: List[dict] = []
+            for batch in _batches(measurement_rows(plant_id, user_id, start, end, interval, rng, alerts)):
+                conn.execute(Measurement.__table__.insert(), batch)
+                counts["measurements"] += len(batch)
+            for batch in _batches(iter(alerts)):
+                conn.execute(Alert.__table__.insert(), batch)
+                counts["alerts"] += len(batch)
+
+            equipment_ids = [
+                conn.execute(Equipment.__table__.insert().returning(Equipment.id), row).scalar_one()
+                for row in equipment_rows(plant_id, plant["code"], rng, start)
+            ]
+            for batch in _batches(hours_rows(equipment_ids, start, end, rng)):
+                conn.execute(EquipmentHours.__table__.insert(), batch)
+                counts["equipment_hours"] += len(batch)
+
+            counts["plants"] += 1
+            counts["users"] += 1
+            counts["equipment"] += len(equipment_ids)
+            print(f"  {plant['code']}: {counts['measurements']:,} measurements so far", flush=True)
+
+    db = SessionLocal()
+    try:
+        kpi_service.refresh(db)
+        db.commit()
+    finally:
+        db.close()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plants", type=int, default=50)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--interval-hours", type=float, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    init_db()
+    with engine.connect() as conn:
+        if conn.execute(select(Plant.id).where(Plant.code.startswith(CODE_PREFIX)).limit(1)).first():
+            sys.exit(f"Benchmark plants ({CODE_PREFIX}*) already exist; use a fresh database.")
+
+    started = time.perf_counter()
+    counts = generate(args.plants, args.years, args.interval_hours, args.seed)
+    print(f"Loaded in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{count:,} {table}" for table, count in counts.items()))
+    print(f"Operators: bench_op_001..bench_op_{args.plants:03d} / {OPERATOR_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
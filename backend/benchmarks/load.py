@@ -0,0 +1,103 @@
+"""
+HTTP load benchmark against a running backend.
+
+Logs in once, then keeps ``--concurrency`` requests in flight against each
+path until ``--requests`` have completed, and reports throughput and latency
+percentiles.
+
+Usage (from backend/, with the API running):
+    python -m benchmarks.load --url http://localhost:8000 --concurrency 50 \\
+        --requests 2000 /api/v1/alerts?plant_id=1 /api/v1/auth/me
+"""
+from typing import Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post("/api/v1/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (ms) for one run."""
+    latencies = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def drive(send: Callable[[], Awaitable[httpx.Response]], total: int, concurrency: int) -> Dict[str, float]:
+    """Keep ``concurrency`` calls of ``send`` in flight until ``total`` completed."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await send()
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_path(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> None:
+    result = await drive(lambda: client.get(path), total, concurrency)
+    print(
+        f"{path}\n"
+        f"  {result['requests']} requests in {result['elapsed_s']:.2f}s  "
+        f"{result['throughput_rps']:8.1f} req/s  errors {result['errors']}\n"
+        f"  latency ms  p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}  "
+        f"p99 {result['p99_ms']:7.1f}  mean {result['mean_ms']:7.1f}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        token = await login(client, args.username, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        for path in args.paths:
+            await run_path(client, path, args.requests, args.concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP load benchmark against a running backend")
+    parser.add_argument("paths", nargs="*", default=["/api/v1/auth/me", "/api/v1/alerts?plant_id=1"])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Login burst benchmark against a running backend.
+
+Fires ``--logins`` logins with ``--concurrency`` in flight (a shift change)
+while a probe keeps requesting ``--probe`` and records its latency, showing
+whether password hashing stalls unrelated requests.
+
+Usage (from backend/, with the API running):
+    python -m benchmarks.login --url http://localhost:8000 --logins 200 --concurrency 50
+"""
+from typing import List
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        credentials = {"username": args.username, "password": args.password}
+        login_latencies: List[float] = []
+        probe_latencies: List[float] = []
+        statuses = {}
+        remaining = args.logins
+        done = asyncio.Event()
+
+        async def login_worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await client.post("/api/v1/auth/login", json=credentials)
+                login_latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get(args.probe)
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+        print(f"{args.logins} logins, concurrency {args.concurrency}: {elapsed:.2f}s  "
+              f"{args.logins / elapsed:.1f} logins/s  statuses {statuses}")
+        print(f"  login ms   p50 {percentile(login_latencies, 0.5):7.1f}  "
+              f"p95 {percentile(login_latencies, 0.95):7.1f}  p99 {percentile(login_latencies, 0.99):7.1f}")
+        print(f"  {args.probe} during burst ({len(probe_latencies)} requests) ms  "
+              f"p50 {percentile(probe_latencies, 0.5):7.1f}  p95 {percentile(probe_latencies, 0.95):7.1f}  "
+              f"max {max(probe_latencies, default=0) * 1000:7.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Login burst benchmark against a running backend")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe", default="/health")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Query-plan check for the hot read routes.
+
+Calls the main GET endpoints in-process against DATABASE_URL (PostgreSQL),
+records every SELECT they issue, runs EXPLAIN on each with the same
+parameters and warns when a plan sequentially scans a large table. That
+usually means an index from the migrations is missing, invalid or no longer
+matches the query.
+
+Usage (from backend/, ideally on a database loaded by benchmarks.fleet):
+    python -m benchmarks.plans [--min-rows 10000] [--analyze] [--strict]
+"""
+from typing import Any, Dict, Iterator, List, Tuple
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+from sqlalchemy import event, select, text
+
+from app.core.config import settings
+from app.core.database import SessionLocal, async_engine, dispose_engines, replica_engines
+from app.core.security import create_access_token
+from app.main import app
+from app.models.equipment import Equipment
+from app.models.measurement import Measurement
+from app.models.user import User
+
+HOT_PATHS = (
+    "/api/v1/measurements?plant_id={plant_id}&limit=100",
+    "/api/v1/measurements/stats?plant_id={plant_id}&days=30",
+    "/api/v1/alerts?plant_id={plant_id}",
+    "/api/v1/alerts?plant_id={plant_id}&is_resolved=false",
+    "/api/v1/alerts/stats?plant_id={plant_id}",
+    "/api/v1/dashboard/summary?plant_id={plant_id}",
+    "/api/v1/dashboard/overview",
+    "/api/v1/dashboard/trends?plant_id={plant_id}&parameter=ph&days=90",
+    "/api/v1/equipment/{equipment_id}/hours?limit=30",
+)
+
+Statement = Tuple[str, str, Any]  # (path, SQL, DBAPI parameters)
+
+
+def sample_ids() -> Dict[str, int]:
+    """An admin user and the plant/equipment with the most data to query."""
+    db = SessionLocal()
+    try:
+        admin_id = db.execute(select(User.id).where(User.role == "administrador").limit(1)).scalar()
+        plant_id = db.execute(
+            select(Measurement.plant_id).group_by(Measurement.plant_id)
+            .order_by(text("count(*) DESC")).limit(1)
+        ).scalar()
+        equipment_id = db.execute(
+            select(Equipment.id).where(Equipment.plant_id == plant_id).order_by(Equipment.id).limit(1)
+        ).scalar()
+    finally:
+        db.close()
+    if admin_id is None or plant_id is None:
+        sys.exit("Need an administrador user and measurements; load data with python -m benchmarks.fleet")
+    return {"admin_id": admin_id, "plant_id": plant_id, "equipment_id": equipment_id or 0}
+
+
+async def capture_statements(ids: Dict[str, int]) -> List[Statement]:
+    """Run each hot route once and collect the SELECTs it sends."""
+    captured: List[Statement] = []
+    current = {"path": ""}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((current["path"], statement, parameters))
+
+    engines = [async_engine.sync_engine] + [replica.sync_engine for replica in replica_engines]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    # No lifespan: the check must not migrate, seed or start background jobs
+    token = create_access_token({"sub": str(ids["admin_id"])})
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://plans",
+                                     headers={"Authorization": f"Bearer {token}"}) as client:
+            for template in HOT_PATHS:
+                current["path"] = template.format(**ids)
+                response = await client.get(current["path"])
+                if response.status_code != 200:
+                    print(f"  {current['path']}: HTTP {response.status_code}", file=sys.stderr)
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+    return captured
+
+
+def seq_scans(plan: Dict[str, Any]) -> Iterator[str]:
+    """Relation names of every sequential scan node in a JSON plan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+async def explain(statements: List[Statement], analyze: bool) -> Tuple[Dict[str, float], List[Dict[str, Any]]]:
+    """Table row estimates and the JSON plan of every statement (on the primary)."""
+    prefix = "EXPLAIN (ANALYZE, FORMAT JSON) " if analyze else "EXPLAIN (FORMAT JSON) "
+    async with async_engine.connect() as conn:
+        sizes = dict((await conn.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' "
+            "AND relnamespace = 'public'::regnamespace"
+        ))).all())
+        plans = []
+        for _, statement, parameters in statements:
+            document = (await conn.exec_driver_sql(prefix + statement, tuple(parameters or ()))).scalar()
+            plans.append((json.loads(document) if isinstance(document, str) else document)[0])
+    return sizes, plans
+
+
+async def check(analyze: bool) -> Tuple[List[Statement], Dict[str, float], List[Dict[str, Any]]]:
+    try:
+        statements = await capture_statements(sample_ids())
+        return (statements, *await explain(statements, analyze))
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-rows", type=int, default=10_000,
+                        help="Only warn about sequential scans of tables at least this large")
+    parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN ANALYZE and report actual times")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 when a warning is printed")
+    args = parser.parse_args()
+
+    if not settings.DATABASE_URL.startswith("postgresql"):
+        sys.exit("The plan check needs PostgreSQL (DATABASE_URL)")
+    statements, sizes, plans = asyncio.run(check(args.analyze))
+
+    warnings = 0
+    for (path, statement, _), plan in zip(statements, plans):
+        top = plan["Plan"]
+        timing = f"{plan['Execution Time']:9.1f}ms" if args.analyze else f"cost {top['Total Cost']:>10.0f}"
+        print(f"{timing}  {path}  {' '.join(statement.split())[:90]}")
+        for table in sorted(set(seq_scans(top))):
+            if sizes.get(table, 0) >= args.min_rows:
+                warnings += 1
+                print(f"  ⚠️  Seq Scan on {table} (~{sizes[table]:,.0f} rows)")
+
+    print(f"\n{len(statements)} statements, {warnings} sequential scans of large tables")
+    if warnings and args.strict:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Serialization benchmark on a 10k-row measurements payload.
+
+Compares the previous response path (Pydantic validation of every ORM row,
+jsonable_encoder and stdlib json) with the fast paths in
+app.core.serialization, and reports compressed sizes.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--rows 10000] [--repeat 5]
+"""
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import brotli, compress
+from app.core.serialization import dumps_json, dumps_msgpack, msgpack
+from app.schemas.measurement import MeasurementResponse
+
+PHASES = ("afluente", "pretratamiento", "reactor", "clarificador", "desinfeccion", "lodos")
+
+
+def make_rows(count: int, seed: int = 42) -> list:
+    """Synthetic measurement rows shaped like DB results (Decimal, aware datetimes)."""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def dec(low, high, places=2):
+        return Decimal(f"{rng.uniform(low, high):.{places}f}")
+
+    rows = []
+    for i in range(count):
+        timestamp = start + timedelta(minutes=15 * i)
+        rows.append({
+            "plant_id": 1,
+            "timestamp": timestamp,
+            "phase": PHASES[i % len(PHASES)],
+            "id": i + 1,
+            "user_id": 1,
+            "caudal_affluent_m3h": dec(10, 40, 3),
+            "caudal_effluent_m3h": dec(10, 40, 3),
+            "ph": dec(6.5, 8.5),
+            "temperature": dec(12, 25),
+            "conductivity": dec(400, 1200),
+            "turbidity": dec(1, 20),
+            "od": dec(1, 4),
+            "chlorine_free": dec(0.2, 1.5),
+            "sst": dec(10, 80),
+            "dbo5": dec(10, 60),
+            "dqo": dec(30, 150),
+            "level_sludge_m": dec(0.1, 1.2, 3),
+            "notes": None,
+            "validated": "validated" if i % 3 else "pending",
+            "validated_by": 1 if i % 3 else None,
+            "validated_at": timestamp + timedelta(hours=1) if i % 3 else None,
+            "created_at": timestamp,
+        })
+    return rows
+
+
+def bench(label: str, func, repeat: int) -> float:
+    func()  # Warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings) * 1000
+    print(f"  {label:<42} {median:9.1f} ms")
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    orm_rows = [SimpleNamespace(**row) for row in rows]
+
+    print(f"Encoding {args.rows} measurements (median of {args.repeat} runs)")
+
+    def validated_stdlib():
+        models = [MeasurementResponse.model_validate(row) for row in orm_rows]
+        return json.dumps(jsonable_encoder(models)).encode()
+
+    def validated_orjson():
+        return dumps_json([MeasurementResponse.model_validate(row).model_dump() for row in orm_rows])
+
+    baseline = bench("pydantic + jsonable_encoder + json", validated_stdlib, args.repeat)
+    bench("pydantic + orjson", validated_orjson, args.repeat)
+    fast = bench("trusted rows + orjson", lambda: dumps_json(rows), args.repeat)
+    if msgpack is not None:
+        bench("trusted rows + msgpack", lambda: dumps_msgpack(rows), args.repeat)
+    print(f"  speed-up (trusted + orjson vs baseline): {baseline / fast:.1f}x")
+
+    body = dumps_json(rows)
+    print("Payload size")
+    print(f"  {'json':<42} {len(body) / 1024:9.1f} KiB")
+    if msgpack is not None:
+        print(f"  {'msgpack':<42} {len(dumps_msgpack(rows)) / 1024:9.1f} KiB")
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        started = time.perf_counter()
+        size = len(compress(body, encoding))
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"  {'json + ' + encoding:<42} {size / 1024:9.1f} KiB  ({elapsed:.1f} ms)")
+    print(f"  {'json + gzip -9 (reference)':<42} {len(gzip.compress(body, 9)) / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Micro-benchmarks for IAEngine and NormativityService.
+
+Times every public method of both services over input sizes from 10 to
+``--max-size`` values (and 1/3/6 parameters for anomaly detection), reports
+the scaling curve of each (time per value and the growth exponent)
+plus memory from tracemalloc (peak and retained blocks per call), and can
+compare against a stored baseline, exiting non-zero on regressions.
+
+Usage (from backend/):
+    python -m benchmarks.services --output services-baseline.json
+    python -m benchmarks.services --baseline services-baseline.json [--max-size 100000]
+"""
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import argparse
+import gc
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from app.services.ia_engine import Anomaly, ia_engine
+from app.services.normativity import normativity
+
+PARAMETERS = ("ph", "sst", "dbo5", "od", "temperature", "chlorine_free")
+TYPICAL = {
+    "ph": (7.2, 0.3),
+    "sst": (35.0, 10.0),
+    "dbo5": (25.0, 8.0),
+    "od": (2.5, 0.6),
+    "temperature": (18.0, 3.0),
+    "chlorine_free": (0.9, 0.3),
+}
+OUTLIER_RATE = 0.01
+MIN_SECONDS = 0.2  # Repeat small cases until each measurement takes about this long
+GROWTH = 10  # Size step between cases
+NOISE_FLOOR = 0.001  # Seconds; faster cases are not checked against the baseline
+
+
+def make_measurements(count: int, rng: random.Random) -> List[Dict[str, float]]:
+    """Measurements with normally distributed parameters and ~1% outliers."""
+    rows = []
+    for _ in range(count):
+        row = {}
+        for parameter, (mean, std) in TYPICAL.items():
+            spread = std * (8 if rng.random() < OUTLIER_RATE else 1)
+            row[parameter] = round(rng.gauss(mean, spread), 3)
+        rows.append(row)
+    return rows
+
+
+def make_anomalies(count: int, rng: random.Random) -> List[Anomaly]:
+    return [
+        Anomaly(
+            parameter=(parameter := rng.choice(PARAMETERS)),
+            value=TYPICAL[parameter][0] * rng.choice((0.2, 5.0)),
+            expected_range=(0.0, 1.0),
+            severity="warning",
+            message="",
+            method="z-score",
+        )
+        for _ in range(count)
+    ]
+
+
+def cases(sizes: List[int], seed: int) -> Iterator[Tuple[str, int, Callable[[], Any]]]:
+    """(benchmark name, input size, zero-argument call) for every method and size.
+
+    Inputs are built one size at a time so only one size is held in memory.
+    """
+    for size in sizes:
+        rng = random.Random(f"{seed}:{size}")
+        measurements = make_measurements(size, rng)
+        values = [row["ph"] for row in measurements]
+        anomalies = make_anomalies(size, rng)
+        hours = [{"hours_run": rng.uniform(0, 24)} for _ in range(size)]
+
+        for count in (1, 3, 6):
+            yield (
+                f"IAEngine.detect_anomalies[{count} params]", size,
+                lambda m=measurements, p=list(PARAMETERS[:count]): ia_engine.detect_anomalies(m, p),
+            )
+        yield "IAEngine.analyze_trend", size, lambda v=values: ia_engine.analyze_trend(v)
+        yield (
+            "IAEngine.generate_recommendations", size,
+            lambda a=anomalies, m=measurements[0]: ia_engine.generate_recommendations(a, m),
+        )
+        yield "IAEngine.predict_maintenance", size, lambda h=hours: ia_engine.predict_maintenance(h)
+        # Norm checks take one measurement; size is the number checked
+        yield (
+            "NormativityService.check_ds90", size,
+            lambda m=measurements: [normativity.check_ds90(row) for row in m],
+        )
+        yield (
+            "NormativityService.check_ds609", size,
+            lambda m=measurements: [normativity.check_ds609(row) for row in m],
+        )
+        yield (
+            "NormativityService.check_all", size,
+            lambda m=measurements: [normativity.check_all(row) for row in m],
+        )
+
+
+def measure(func: Callable[[], Any]) -> Dict[str, float]:
+    """Best-of-N wall time, then tracemalloc peak and retained blocks of one call."""
+    gc.collect()
+    timings: List[float] = []
+    while not timings or (sum(timings) < MIN_SECONDS and len(timings) < 50):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1] - baseline_memory
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+
+    return {
+        "seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_kib": round(peak / 1024, 1),
+        "blocks": blocks,
+    }
+
+
+def scaling_exponent(points: Dict[int, Dict[str, float]]) -> float:
+    """Growth exponent between the two largest sizes: ~1 linear, ~2 quadratic.
+
+    Small sizes are dominated by fixed per-call overhead, so they are left out.
+    """
+    if len(points) < 2:
+        return 0.0
+    (small, first), (large, last) = sorted(points.items())[-2:]
+    return math.log(max(last["seconds"], 1e-9) / max(first["seconds"], 1e-9)) / math.log(large / small)
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Print regressions against the baseline; True if there are none."""
+    regressions = []
+    for name, points in results.items():
+        for size, current in points.items():
+            previous = baseline["benchmarks"].get(name, {}).get(size)
+            if previous is None:
+                continue
+            slower = previous["seconds"] >= NOISE_FLOOR and current["seconds"] > previous["seconds"] * (1 + tolerance)
+            bigger = previous["peak_kib"] >= 64 and current["peak_kib"] > previous["peak_kib"] * (1 + tolerance)
+            if slower or bigger:
+                regressions.append(
+                    f"  {name} n={size}: {previous['seconds'] * 1000:.2f} -> {current['seconds'] * 1000:.2f} ms, "
+                    f"peak {previous['peak_kib']:.0f} -> {current['peak_kib']:.0f} KiB"
+                )
+    if regressions:
+        print(f"\nRegressions beyond {tolerance:.0%}:")
+        print("\n".join(regressions))
+    else:
+        print(f"\nNo regressions beyond {tolerance:.0%} against the baseline.")
+    return not regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-size", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--max-seconds", type=float, default=30.0,
+                        help="Skip larger sizes of a benchmark once a call is expected to take longer")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sizes = [GROWTH ** exponent for exponent in range(1, 7) if GROWTH ** exponent <= args.max_size]
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    skipped: Dict[str, List[int]] = {}
+    for name, size, func in cases(sizes, args.seed):
+        if args.filter not in name:
+            continue
+        points = results.setdefault(name, {})
+        if points:
+            # Extrapolate with the growth seen so far (at least linear)
+            exponent = max(scaling_exponent({int(s): p for s, p in points.items()}), 1.0)
+            if list(points.values())[-1]["seconds"] * GROWTH ** exponent > args.max_seconds:
+                skipped.setdefault(name, []).append(size)
+                continue
+        print(f"  {name} n={size}", file=sys.stderr, flush=True)
+        points[str(size)] = measure(func)
+
+    for name, points in results.items():
+        print(f"{name}  (scaling exponent {scaling_exponent({int(s): p for s, p in points.items()}):.2f})")
+        print(f"  {'n':>9} {'time':>11} {'per value':>11} {'peak KiB':>10} {'blocks':>9}")
+        for size, point in points.items():
+            print(f"  {int(size):>9} {point['seconds'] * 1000:9.3f}ms {point['seconds'] / int(size) * 1e9:9.0f}ns "
+                  f"{point['peak_kib']:10.1f} {point['blocks']:9d}")
+        for size in skipped.get(name, []):
+            print(f"  {size:>9}  skipped (expected over {args.max_seconds:.0f}s per call)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": {"seed": args.seed, "max_size": args.max_size}, "benchmarks": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Cold-start benchmark: time from launching uvicorn to the first response.
+
+Starts ``uvicorn app.main:app --workers N`` against DATABASE_URL, polls
+``/health`` until it answers and waits for every worker to finish its
+lifespan. Reports per run the time to first response and until all workers
+were ready, and fails the run if a worker logged a startup error (e.g. two
+workers racing to migrate or seed).
+
+Usage (from backend/):
+    python -m benchmarks.startup --workers 4 --runs 3
+"""
+from typing import Dict, List
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+READY_LINE = "Application startup complete"
+ERROR_MARKERS = ("Traceback", "Error creating default data", "Application startup failed")
+
+
+def run_once(workers: int, port: int, timeout: float) -> Dict[str, float]:
+    """Launch the server, time readiness, then stop it."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env,
+    )
+    output: List[str] = []
+    ready: List[float] = []
+
+    def read_output() -> None:
+        for line in server.stdout:
+            output.append(line)
+            if READY_LINE in line:
+                ready.append(time.perf_counter() - started)
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    first_response = None
+    try:
+        while time.perf_counter() - started < timeout:
+            if first_response is None:
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                        first_response = time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+            if first_response is not None and len(ready) >= workers:
+                break
+            if server.poll() is not None:
+                break
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        reader.join(timeout=5)
+
+    errors = [line.rstrip() for line in output if any(marker in line for marker in ERROR_MARKERS)]
+    if first_response is None or len(ready) < workers or errors:
+        print("".join(output[-40:]), file=sys.stderr)
+        sys.exit(f"Startup failed: {len(ready)}/{workers} workers ready, {len(errors)} errors")
+    return {"first_response": first_response, "all_ready": max(ready[:workers])}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for one start")
+    args = parser.parse_args()
+
+    results = []
+    for run in range(1, args.runs + 1):
+        result = run_once(args.workers, args.port, args.timeout)
+        results.append(result)
+        print(f"  run {run}: first response {result['first_response']:.2f}s, "
+              f"all {args.workers} workers ready {result['all_ready']:.2f}s")
+    print(f"Median: first response {statistics.median(r['first_response'] for r in results):.2f}s, "
+          f"all workers ready {statistics.median(r['all_ready'] for r in results):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
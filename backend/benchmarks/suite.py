@@ -0,0 +1,160 @@
+"""
+End-to-end load benchmark suite against a running backend.
+
+Runs the main API scenarios (login, lists, stats, trends, dashboard and
+measurement creation) against the synthetic fleet from ``benchmarks.fleet``,
+picking plants with a fixed seed, and records throughput and p50/p95/p99 per
+scenario to JSON. With ``--baseline`` the run is compared against an earlier
+result and exits non-zero when a scenario regresses beyond ``--tolerance``.
+
+Usage (from backend/, with the API running on a database loaded by
+benchmarks.fleet):
+    python -m benchmarks.suite --url http://localhost:8000 --output baseline.json
+    python -m benchmarks.suite --url http://localhost:8000 --baseline baseline.json
+"""
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+
+import httpx
+
+from benchmarks.fleet import CODE_PREFIX, OPERATOR_PASSWORD
+from benchmarks.load import drive, login
+
+Scenario = Callable[[httpx.AsyncClient, random.Random, List[dict]], Awaitable[httpx.Response]]
+
+
+def _get(path: str) -> Scenario:
+    def send(client: httpx.AsyncClient, rng: random.Random, plants: List[dict]) -> Awaitable[httpx.Response]:
+        return client.get(path.format(plant_id=rng.choice(plants)["id"]))
+    return send
+
+
+def _login(client: httpx.AsyncClient, rng: random.Random, plants: List[dict]) -> Awaitable[httpx.Response]:
+    code = rng.choice(plants)["code"]
+    credentials = {"username": f"bench_op_{code[len(CODE_PREFIX):]}", "password": OPERATOR_PASSWORD}
+    return client.post("/api/v1/auth/login", json=credentials)
+
+
+def _create_measurement(client: httpx.AsyncClient, rng: random.Random, plants: List[dict]) -> Awaitable[httpx.Response]:
+    return client.post("/api/v1/measurements", json={
+        "plant_id": rng.choice(plants)["id"],
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "phase": "desinfeccion",
+        "ph": round(rng.uniform(6.8, 8.2), 2),
+        "chlorine_free": round(rng.uniform(0.3, 1.5), 2),
+        "sst": round(rng.uniform(10, 70), 2),
+    })
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": _login,
+    "measurements_list": _get("/api/v1/measurements?plant_id={plant_id}&limit=100"),
+    "alerts_list": _get("/api/v1/alerts?plant_id={plant_id}"),
+    "measurements_stats": _get("/api/v1/measurements/stats?plant_id={plant_id}&days=30"),
+    "alerts_stats": _get("/api/v1/alerts/stats?plant_id={plant_id}"),
+    "trends": _get("/api/v1/dashboard/trends?plant_id={plant_id}&parameter=ph&days=90"),
+    "summary": _get("/api/v1/dashboard/summary?plant_id={plant_id}"),
+    "overview": _get("/api/v1/dashboard/overview"),
+    "create_measurement": _create_measurement,
+}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Print the change per scenario; True if none regressed beyond tolerance."""
+    ok = True
+    print(f"\nAgainst baseline {baseline['meta'].get('revision')} ({baseline['meta'].get('started_at')}):")
+    for name, current in result["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            print(f"  {name:<20} (no baseline)")
+            continue
+        p95_change = current["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0.0
+        rps_change = current["throughput_rps"] / previous["throughput_rps"] - 1 if previous["throughput_rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance or current["errors"] > previous["errors"]
+        ok = ok and not regressed
+        print(f"  {name:<20} p95 {p95_change:+7.1%}  req/s {rps_change:+7.1%}  "
+              f"errors {previous['errors']} -> {current['errors']}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        token = await login(client, args.username, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        response = await client.get("/api/v1/plants", params={"limit": 1000})
+        response.raise_for_status()
+        plants = [plant for plant in response.json() if plant["code"].startswith(CODE_PREFIX)]
+        if not plants:
+            sys.exit(f"No {CODE_PREFIX}* plants found; load them with python -m benchmarks.fleet")
+
+        result: Dict[str, Any] = {
+            "meta": {
+                "url": args.url,
+                "revision": git_revision(),
+                "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "plants": len(plants),
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "seed": args.seed,
+            },
+            "scenarios": {},
+        }
+        for name in args.scenarios:
+            rng = random.Random(f"{args.seed}:{name}")
+            total = args.login_requests if name == "login" else args.requests
+            summary = await drive(lambda: SCENARIOS[name](client, rng, plants), total, args.concurrency)
+            result["scenarios"][name] = summary
+            print(f"  {name:<20} {summary['throughput_rps']:8.1f} req/s  p50 {summary['p50_ms']:7.1f}  "
+                  f"p95 {summary['p95_ms']:7.1f}  p99 {summary['p99_ms']:7.1f} ms  errors {summary['errors']}")
+        return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark suite")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=", ".join(SCENARIOS))
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/throughput change (0.2 = 20%%)")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    result = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
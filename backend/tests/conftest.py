@@ -0,0 +1,32 @@
+"""
+Shared test fixtures.
+
+Settings are read from the environment when app.core.config is imported,
+so the test defaults are set here, before any app module is loaded: a
+throwaway SQLite database, in-memory cache invalidation and no background
+e-mail or rate limiting.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="ptas-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/primary.db")
+os.environ.setdefault("CACHE_INVALIDATION_BACKEND", "memory")
+os.environ.setdefault("NOTIFICATIONS_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app import models  # noqa: F401  (registers every table on Base)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Session factory bound to a fresh SQLite database with every table."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    engine.dispose()
@@ -0,0 +1,152 @@
+"""
+Admission control: per-caller token buckets and the analytics concurrency limit.
+
+A small app with an ordinary and a heavy route sits behind
+AdmissionMiddleware with its own controller; the heavy handler can be held
+open to fill the concurrency slots.
+"""
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.config import settings
+from app.core.security import create_access_token
+
+PLAIN = "/api/v1/plants"
+HEAVY = "/api/v1/dashboard/trends"
+
+
+def controller(**limits):
+    values = dict(
+        user_rate=1, user_burst=100, heavy_rate=1, heavy_burst=30,
+        heavy_concurrency=8, heavy_per_user=2,
+    )
+    values.update(limits)
+    return AdmissionController(**values)
+
+
+def build_app(admission, gate=None):
+    async def plain(request):
+        return JSONResponse({"ok": True})
+
+    async def heavy(request):
+        if gate is not None:
+            await gate.wait()
+        return JSONResponse({"ok": True})
+
+    return Starlette(
+        routes=[Route(PLAIN, plain), Route(HEAVY, heavy)],
+        middleware=[Middleware(AdmissionMiddleware, controller=admission)],
+    )
+
+
+def user(user_id):
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id)})}
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+def run(app, scenario):
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await scenario(client)
+
+    return asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+
+def test_empty_bucket_answers_429_with_retry_after():
+    admission = controller(user_rate=0.5, user_burst=3)
+
+    async def scenario(client):
+        statuses = [(await client.get(PLAIN, headers=user(1))).status_code for _ in range(3)]
+        rejected = await client.get(PLAIN, headers=user(1))
+        other = await client.get(PLAIN, headers=user(2))
+        return statuses, rejected, other
+
+    statuses, rejected, other = run(build_app(admission), scenario)
+
+    assert statuses == [200, 200, 200]
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) == 2  # One token at 0.5/s
+    assert "detail" in rejected.json()
+    assert other.status_code == 200  # Buckets are per caller
+    assert admission.rejected[("GET", PLAIN, 429)] == 1
+
+
+def test_long_windows_cost_more():
+    admission = controller(heavy_rate=1, heavy_burst=30)
+
+    async def scenario(client):
+        year = {"days": 365}  # ~12 tokens each
+        statuses = [(await client.get(HEAVY, params=year, headers=user(1))).status_code for _ in range(3)]
+        return statuses, await client.get(HEAVY, params={"days": 7}, headers=user(1))
+
+    statuses, short = run(build_app(admission), scenario)
+
+    assert statuses == [200, 200, 429]
+    assert short.status_code == 200  # The remaining ~5.7 tokens still cover a short window
+
+
+def test_heavy_concurrency_limit_answers_503():
+    admission = controller(heavy_concurrency=2)
+    gate = asyncio.Event()
+
+    async def scenario(client):
+        held = [asyncio.ensure_future(client.get(HEAVY, headers=user(n))) for n in (1, 2)]
+        while admission.heavy_in_flight < 2:
+            await asyncio.sleep(0.01)
+
+        busy = await client.get(HEAVY, headers=user(3))
+        plain = await client.get(PLAIN, headers=user(3))  # Ordinary routes are not limited
+        gate.set()
+        done = await asyncio.gather(*held)
+        after = await client.get(HEAVY, headers=user(3))
+        return busy, plain, done, after
+
+    busy, plain, done, after = run(build_app(admission, gate), scenario)
+
+    assert busy.status_code == 503
+    assert busy.headers["retry-after"] == "1"
+    assert plain.status_code == 200
+    assert [r.status_code for r in done] == [200, 200]
+    assert after.status_code == 200
+    assert admission.heavy_in_flight == 0
+
+
+def test_per_user_concurrency_limit_answers_429():
+    admission = controller(heavy_per_user=1)
+    gate = asyncio.Event()
+
+    async def scenario(client):
+        held = asyncio.ensure_future(client.get(HEAVY, headers=user(1)))
+        while admission.heavy_in_flight < 1:
+            await asyncio.sleep(0.01)
+        second = await client.get(HEAVY, headers=user(1))
+        other = asyncio.ensure_future(client.get(HEAVY, headers=user(2)))
+        gate.set()
+        return second, await held, await other
+
+    second, first, other = run(build_app(admission, gate), scenario)
+
+    assert (first.status_code, second.status_code, other.status_code) == (200, 429, 200)
+
+
+def test_disabled_does_not_limit(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    admission = controller(user_rate=0.01, user_burst=1, heavy_concurrency=0)
+
+    async def scenario(client):
+        return [(await client.get(path, headers=user(1))).status_code for path in (PLAIN, PLAIN, HEAVY)]
+
+    assert run(build_app(admission), scenario) == [200, 200, 200]
+    assert not admission.rejected
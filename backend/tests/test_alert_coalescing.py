@@ -0,0 +1,117 @@
+"""
+Coalescing of repeated open alerts (AlertService).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.alert import Alert
+from app.models.plant import Plant
+from app.services.alerts import AlertService
+
+WINDOW_MINUTES = 60
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    db.add(Plant(id=1, name="Planta 1", code="P-1"))
+    db.commit()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def service():
+    return AlertService(window_minutes=WINDOW_MINUTES)
+
+
+def reading(**values):
+    data = {
+        "plant_id": 1, "alert_type": "ds90_violation", "severity": "warning", "parameter": "ph",
+        "norm_reference": "DS90 Tabla 1", "title": "pH fuera de norma", "message": "pH 9.1",
+    }
+    data.update(values)
+    return data
+
+
+def raise_alert(db, service, minutes_ago=5, **values):
+    """A new open alert last seen ``minutes_ago``."""
+    alert, created = service.create_or_coalesce(db, reading(**values))
+    assert created
+    alert.last_seen_at = datetime.now() - timedelta(minutes=minutes_ago)
+    db.commit()
+    return alert
+
+
+def test_repeat_inside_window_is_coalesced(db, service):
+    first = raise_alert(db, service)
+    seen = first.last_seen_at
+
+    alert, created = service.create_or_coalesce(db, reading(severity="critical", message="pH 9.8"))
+    db.commit()
+
+    assert not created
+    assert alert.id == first.id
+    assert alert.occurrence_count == 2
+    assert alert.last_seen_at.replace(tzinfo=None) != seen  # Moved to the database clock
+    assert (alert.severity, alert.message) == ("critical", "pH 9.8")  # Latest reading wins
+    assert db.query(Alert).count() == 1
+
+    service.create_or_coalesce(db, reading())
+    db.commit()
+    db.refresh(alert)
+    assert alert.occurrence_count == 3
+
+
+def test_repeat_outside_window_creates_alert(db, service):
+    old = raise_alert(db, service, minutes_ago=WINDOW_MINUTES * 2)
+
+    alert, created = service.create_or_coalesce(db, reading())
+    db.commit()
+
+    assert created and alert.id != old.id
+    assert alert.occurrence_count == 1
+    assert db.query(Alert).count() == 2
+
+
+def test_repeat_after_resolution_creates_alert(db, service):
+    resolved = raise_alert(db, service)
+    resolved.is_resolved = True
+    db.commit()
+
+    alert, created = service.create_or_coalesce(db, reading())
+
+    assert created and alert.id != resolved.id
+
+
+@pytest.mark.parametrize("change", [
+    {"parameter": "od"},
+    {"alert_type": "ds609_violation"},
+    {"norm_reference": None},
+    {"plant_id": 2},
+])
+def test_different_key_creates_alert(db, service, change):
+    db.add(Plant(id=2, name="Planta 2", code="P-2"))
+    raise_alert(db, service)
+
+    _, created = service.create_or_coalesce(db, reading(**change))
+
+    assert created
+
+
+def test_null_key_parts_match(db, service):
+    first = raise_alert(db, service, parameter=None, norm_reference=None)
+
+    alert, created = service.create_or_coalesce(db, reading(parameter=None, norm_reference=None))
+
+    assert not created and alert.id == first.id
+
+
+def test_zero_window_disables_coalescing(db):
+    service = AlertService(window_minutes=0)
+    service.create_or_coalesce(db, reading())
+
+    _, created = service.create_or_coalesce(db, reading())
+
+    assert created
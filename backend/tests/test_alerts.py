@@ -0,0 +1,121 @@
+"""
+Bulk alert resolution (PUT /alerts/resolve).
+"""
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.main import app
+
+_unique = itertools.count(1)
+
+
+def bearer(user_id):
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id)})}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        client.headers.update(bearer(1))
+        yield client
+
+
+@pytest.fixture
+def plants(client):
+    """Two fresh plants, so each test only sees its own alerts."""
+    ids = []
+    for _ in range(2):
+        n = next(_unique)
+        response = client.post("/api/v1/plants", json={"name": f"Planta alertas {n}", "code": f"AL-{n}"})
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+
+def raise_alert(client, plant_id, alert_type="ph", severity="warning"):
+    response = client.post("/api/v1/alerts", json={
+        "plant_id": plant_id, "alert_type": alert_type, "severity": severity,
+        "title": alert_type, "message": f"{alert_type} fuera de rango", "parameter": f"{alert_type}-{next(_unique)}",
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def resolve(client, headers=None, **body):
+    return client.put("/api/v1/alerts/resolve", json=body, headers=headers)
+
+
+def is_resolved(client, alert_id):
+    return client.get(f"/api/v1/alerts/{alert_id}").json()["is_resolved"]
+
+
+def test_resolve_by_ids(client, plants):
+    first, second, third = (raise_alert(client, plants[0]) for _ in range(3))
+
+    response = resolve(client, ids=[first, second], resolution_notes="Incidente cerrado")
+
+    assert response.status_code == 200
+    assert response.json()["resolved"] == 2
+    assert sorted(response.json()["ids"]) == [first, second]
+    alert = client.get(f"/api/v1/alerts/{first}").json()
+    assert (alert["is_resolved"], alert["resolved_by"], alert["resolution_notes"]) == (True, 1, "Incidente cerrado")
+    assert alert["resolved_at"] is not None
+    assert not is_resolved(client, third)
+
+    # Already resolved alerts are not counted again
+    assert resolve(client, ids=[first, second]).json() == {"resolved": 0, "ids": []}
+
+
+def test_resolve_by_plant_and_filters(client, plants):
+    plant, other = plants
+    warning = raise_alert(client, plant, "ph", "warning")
+    critical = raise_alert(client, plant, "od", "critical")
+    elsewhere = raise_alert(client, other, "od", "critical")
+
+    assert resolve(client, plant_id=plant, severity="critical").json()["ids"] == [critical]
+    assert not is_resolved(client, warning)
+
+    assert resolve(client, plant_id=plant).json()["ids"] == [warning]
+    assert not is_resolved(client, elsewhere)
+
+
+def test_ids_or_plant_required(client):
+    response = resolve(client, severity="critical")
+
+    assert response.status_code == 400
+
+
+def test_operator_is_scoped_to_their_plant(client, plants):
+    plant, other = plants
+    n = next(_unique)
+    operator = client.post("/api/v1/auth/register", json={
+        "email": f"op{n}@ptas.cl", "username": f"op{n}", "full_name": "Operador",
+        "password": "secreto123", "role": "operador", "plant_id": plant,
+    }).json()
+    own, foreign = raise_alert(client, plant), raise_alert(client, other)
+    headers = bearer(operator["id"])
+
+    assert resolve(client, headers, plant_id=other).status_code == 403
+
+    response = resolve(client, headers, ids=[own, foreign])
+    assert response.json()["ids"] == [own]
+    assert not is_resolved(client, foreign)
+
+
+def test_resolve_changes_the_plant_etag(client, plants):
+    plant = plants[0]
+    alert_id = raise_alert(client, plant)
+    stats = client.get("/api/v1/alerts/stats", params={"plant_id": plant})
+    etag = stats.headers["etag"]
+    assert stats.json()["active"] == 1
+
+    resolve(client, plant_id=plant)
+
+    fresh = client.get("/api/v1/alerts/stats", params={"plant_id": plant}, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert (fresh.json()["active"], fresh.json()["resolved"]) == (0, 1)
+    assert is_resolved(client, alert_id)
@@ -0,0 +1,110 @@
+"""
+Daily equipment hours keyed on (equipment_id, calendar day).
+"""
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.main import app
+
+_unique = itertools.count(1)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        client.headers["Authorization"] = "Bearer " + create_access_token({"sub": "1"})
+        yield client
+
+
+@pytest.fixture
+def plant(client):
+    n = next(_unique)
+    response = client.post("/api/v1/plants", json={"name": f"Planta horas {n}", "code": f"HR-{n}"})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def add_equipment(client, plant_id):
+    response = client.post("/api/v1/equipment", json={"plant_id": plant_id, "name": "Soplador", "equipment_type": "soplador"})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def upsert(client, plant_id, items):
+    return client.put("/api/v1/equipment/hours", json={"plant_id": plant_id, "items": items})
+
+
+def stored(client, equipment_id):
+    rows = client.get(f"/api/v1/equipment/{equipment_id}/hours").json()
+    return sorted((row["date"], row["hours_run"]) for row in rows)
+
+
+def test_same_batch_twice_is_idempotent(client, plant):
+    pump, blower = add_equipment(client, plant), add_equipment(client, plant)
+    items = [
+        {"equipment_id": pump, "date": "2026-10-17", "hours_run": 20},
+        {"equipment_id": pump, "date": "2026-10-18", "hours_run": 22},
+        {"equipment_id": blower, "date": "2026-10-18", "hours_run": 24, "energy_kwh": 180},
+    ]
+
+    for _ in range(2):
+        response = upsert(client, plant, items)
+        assert response.status_code == 200
+        assert response.json() == {"upserted": 3}
+
+    assert stored(client, pump) == [("2026-10-17", 20), ("2026-10-18", 22)]
+    assert stored(client, blower) == [("2026-10-18", 24)]
+
+
+def test_resend_updates_the_day(client, plant):
+    pump = add_equipment(client, plant)
+    upsert(client, plant, [{"equipment_id": pump, "date": "2026-10-18", "hours_run": 10}])
+
+    upsert(client, plant, [{"equipment_id": pump, "date": "2026-10-18", "hours_run": 23.5, "notes": "corregido"}])
+
+    rows = client.get(f"/api/v1/equipment/{pump}/hours").json()
+    assert [(row["hours_run"], row["notes"]) for row in rows] == [(23.5, "corregido")]
+
+
+def test_repeated_key_in_one_batch_keeps_the_last(client, plant):
+    pump = add_equipment(client, plant)
+
+    response = upsert(client, plant, [
+        {"equipment_id": pump, "date": "2026-10-18", "hours_run": 8},
+        {"equipment_id": pump, "date": "2026-10-18", "hours_run": 16},
+    ])
+
+    assert response.json() == {"upserted": 1}
+    assert stored(client, pump) == [("2026-10-18", 16)]
+
+
+def test_readings_are_keyed_on_the_calendar_day(client, plant):
+    pump = add_equipment(client, plant)
+
+    upsert(client, plant, [
+        {"equipment_id": pump, "date": "2026-10-18T06:00:00", "hours_run": 6},
+        {"equipment_id": pump, "date": "2026-10-18T23:30:00-03:00", "hours_run": 23},
+    ])
+    upsert(client, plant, [{"equipment_id": pump, "date": "2026-10-18T12:00:00Z", "hours_run": 12}])
+
+    assert stored(client, pump) == [("2026-10-18", 12)]
+
+    # The single-row endpoint sees the same day as taken
+    response = client.post(f"/api/v1/equipment/{pump}/hours", json={
+        "equipment_id": pump, "date": "2026-10-18T08:00:00", "hours_run": 8,
+    })
+    assert response.status_code == 400
+
+
+def test_equipment_of_another_plant_is_rejected(client, plant):
+    n = next(_unique)
+    other = client.post("/api/v1/plants", json={"name": f"Otra {n}", "code": f"HR-X{n}"}).json()["id"]
+    foreign = add_equipment(client, other)
+
+    response = upsert(client, plant, [{"equipment_id": foreign, "date": "2026-10-18", "hours_run": 5}])
+
+    assert response.status_code == 404
+    assert stored(client, foreign) == []
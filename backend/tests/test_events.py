@@ -0,0 +1,98 @@
+"""
+EventBroker fan-out, replay and slow-consumer handling.
+"""
+import asyncio
+import threading
+
+from app.services.events import EventBroker
+
+
+def run(scenario):
+    return asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+
+async def drain(subscription):
+    """Events already delivered to a subscription."""
+    await asyncio.sleep(0)  # Let call_soon_threadsafe deliveries run
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_fan_out_to_every_subscriber_of_the_plant():
+    broker = EventBroker(history_size=10, queue_size=10)
+
+    async def scenario():
+        first, second = broker.subscribe(1), broker.subscribe(1)
+        other_plant = broker.subscribe(2)
+
+        event = broker.publish(1, "alert.created", {"id": 7})
+
+        assert [e.id for e in await drain(first)] == [event.id]
+        assert [e.id for e in await drain(second)] == [event.id]
+        assert await drain(other_plant) == []
+        assert broker.subscriber_count(1) == 2 and broker.subscriber_count() == 3
+
+        broker.unsubscribe(first)
+        broker.publish(1, "alert.resolved", {"id": 7})
+        assert await drain(first) == []
+        assert broker.subscriber_count(1) == 1
+
+    run(scenario)
+
+
+def test_publish_from_another_thread():
+    broker = EventBroker(history_size=10, queue_size=10)
+
+    async def scenario():
+        subscription = broker.subscribe(1)
+        thread = threading.Thread(target=broker.publish, args=(1, "measurement.created", {"id": 3}))
+        thread.start()
+        thread.join()
+
+        event = await subscription.get(timeout=1)
+        assert (event.type, event.data) == ("measurement.created", {"id": 3})
+
+    run(scenario)
+
+
+def test_replay_after_last_event_id():
+    broker = EventBroker(history_size=3, queue_size=10)
+    events = [broker.publish(1, "measurement.created", {"n": n}) for n in range(5)]
+    broker.publish(2, "measurement.created", {"n": 99})
+
+    async def scenario():
+        resumed = broker.subscribe(1, last_event_id=events[2].id)
+        assert [e.data["n"] for e in await drain(resumed)] == [3, 4]
+
+        # Older events fell out of the history; only the kept ones replay
+        from_start = broker.subscribe(1, last_event_id=0)
+        assert [e.data["n"] for e in await drain(from_start)] == [2, 3, 4]
+
+        assert await drain(broker.subscribe(1)) == []  # No Last-Event-ID: live only
+
+    run(scenario)
+
+
+def test_slow_consumer_is_dropped():
+    broker = EventBroker(history_size=10, queue_size=2)
+
+    async def scenario():
+        slow, fast = broker.subscribe(1), broker.subscribe(1)
+        for n in range(3):
+            broker.publish(1, "measurement.created", {"n": n})
+            assert len(await drain(fast)) == 1
+
+        await asyncio.sleep(0)
+        assert slow.closed
+        assert await slow.get(timeout=1) is None  # The stream ends; the client resumes
+        assert not fast.closed
+
+    run(scenario)
+
+
+def test_sse_encoding():
+    event = EventBroker().publish(1, "alerts.resolved", {"ids": [1, 2]})
+
+    assert event.to_sse() == f'id: {event.id}\nevent: alerts.resolved\ndata: {{"ids": [1, 2]}}\n\n'
@@ -0,0 +1,172 @@
+"""
+Cross-worker cache invalidation.
+
+Buses on one MemoryHub stand in for workers, each with its own caches. The
+PostgreSQL listener's reconnect path runs against a scripted asyncpg.
+"""
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.invalidation import ALL_KEYS, InvalidationBus, MemoryHub, MemoryTransport, PostgresTransport
+
+
+def worker(hub):
+    cache = TTLCache(ttl_seconds=60)
+    bus = InvalidationBus(MemoryTransport(hub))
+    bus.register("dashboard", cache)
+    asyncio.run(bus.start())
+    return bus, cache
+
+
+@pytest.fixture
+def workers():
+    hub = MemoryHub()
+    started = [worker(hub), worker(hub)]
+    yield started
+    for bus, _ in started:
+        asyncio.run(bus.stop())
+
+
+def test_publish_evicts_the_key_on_every_worker(workers):
+    (sender, own), (receiver, other) = workers
+    for cache in (own, other):
+        cache.set(1, "plant 1")
+        cache.set(2, "plant 2")
+
+    sender.publish("dashboard", 1)
+
+    assert own.get(1) is None and other.get(1) is None
+    assert own.get(2) == "plant 2" and other.get(2) == "plant 2"
+    assert (sender.published, sender.received) == (1, 0)  # Not echoed back
+    assert receiver.received == 1
+
+
+def test_publish_bumps_the_generation_on_other_workers(workers):
+    (sender, _), (_, other) = workers
+    generation = other.generation(1)
+
+    sender.publish("dashboard", 1)
+
+    # A read that started before the write elsewhere is not cached
+    assert other.set(1, "stale", generation=generation) is False
+
+
+def test_all_keys_clears_the_cache(workers):
+    (sender, own), (_, other) = workers
+    for cache in (own, other):
+        cache.set(1, "plant 1")
+        cache.set(2, "plant 2")
+
+    sender.publish("dashboard", ALL_KEYS)
+
+    assert [own.get(1), own.get(2), other.get(1), other.get(2)] == [None] * 4
+
+
+def test_unknown_cache_is_ignored(workers):
+    (sender, _), (receiver, other) = workers
+    other.set(1, "plant 1")
+
+    sender.publish("principals", 1)
+
+    assert other.get(1) == "plant 1"
+    assert receiver.received == 1
+
+
+@pytest.mark.parametrize("payload", ["not json", "[]", '{"key": 1}', "null"])
+def test_malformed_payload_is_ignored(workers, payload):
+    _, (receiver, other) = workers
+    other.set(1, "plant 1")
+
+    receiver._receive(payload)
+
+    assert other.get(1) == "plant 1"
+    assert receiver.received == 0
+
+
+def test_stopped_bus_only_evicts_locally():
+    hub = MemoryHub()
+    (sender, own), (receiver, other) = worker(hub), worker(hub)
+    asyncio.run(sender.stop())
+    own.set(1, "plant 1")
+    other.set(1, "plant 1")
+
+    sender.publish("dashboard", 1)
+
+    assert own.get(1) is None
+    assert other.get(1) == "plant 1"
+    asyncio.run(receiver.stop())
+
+
+class ScriptedConnection:
+    """asyncpg connection whose keepalive fails when told to."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.listeners = []
+        self.closed = False
+        self.drop = False
+
+    def get_server_pid(self):
+        return self.pid
+
+    async def add_listener(self, channel, listener):
+        self.listeners.append(listener)
+
+    async def execute(self, query, *args):
+        if self.drop:
+            raise ConnectionResetError("server closed the connection")
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+def test_listener_reconnect_clears_every_cache(monkeypatch):
+    connections = []
+    refusals = [OSError("connection refused")]  # First reconnect attempt fails
+
+    async def connect(dsn):
+        if connections and refusals:
+            raise refusals.pop()
+        connections.append(ScriptedConnection(pid=100 + len(connections)))
+        return connections[-1]
+
+    monkeypatch.setitem(sys.modules, "asyncpg", SimpleNamespace(connect=connect))
+    monkeypatch.setattr(invalidation, "RECONNECT_SECONDS", (0,))
+    monkeypatch.setattr(invalidation, "KEEPALIVE_SECONDS", 0.01)
+
+    dashboard, principals = TTLCache(ttl_seconds=60), TTLCache(ttl_seconds=60)
+    bus = InvalidationBus(PostgresTransport("postgresql://ptas@localhost/ptas", "cache_invalidation"))
+    bus.register("dashboard", dashboard)
+    bus.register("principals", principals)
+
+    async def scenario():
+        await bus.start()
+        while not (connections and connections[0].listeners):
+            await asyncio.sleep(0.01)
+        dashboard.set(1, "plant 1")
+        principals.set(7, "user 7")
+
+        # Events from other workers are applied; our own echo is skipped
+        listener = connections[0].listeners[0]
+        listener(connections[0], 999, "cache_invalidation", '{"cache": "dashboard", "key": 2}')
+        listener(connections[0], connections[0].pid, "cache_invalidation", '{"cache": "dashboard", "key": 1}')
+        assert (bus.received, dashboard.get(1)) == (1, "plant 1")
+
+        connections[0].drop = True
+        while len(connections) < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await bus.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+    assert connections[0].closed and not refusals
+    assert dashboard.get(1) is None and principals.get(7) is None
@@ -0,0 +1,235 @@
+"""
+NotificationDispatcher against a local SMTP stand-in.
+
+The stand-in is plugged in through SMTPConnectionPool's connection factory,
+so the dispatcher runs its real claim, digest, retry and rate-limit paths.
+"""
+from datetime import datetime, timedelta
+import smtplib
+import threading
+from typing import Optional
+
+import pytest
+
+from app.models.alert import Alert
+from app.models.notification import NotificationOutbox
+from app.models.plant import Plant
+from app.models.user import User
+from app.services.alerts import AlertService
+from app.services.notifications import NotificationDispatcher, SMTPConnectionPool
+
+
+class LocalSMTP:
+    """In-process SMTP server: records messages, can be told to fail."""
+
+    def __init__(self):
+        self.inbox = []
+        self.connections = 0
+        self.fail = False
+        self.barrier: Optional[threading.Barrier] = None
+        self._lock = threading.Lock()
+
+    def connect(self, host, port, timeout=None):
+        with self._lock:
+            self.connections += 1
+        return _Connection(self)
+
+
+class _Connection:
+    def __init__(self, server: LocalSMTP):
+        self.server = server
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        if self.server.fail:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        if self.server.barrier is not None:
+            self.server.barrier.wait(timeout=5)  # Fails unless the sends overlap
+        self.server.inbox.append(msg)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def smtp():
+    return LocalSMTP()
+
+
+@pytest.fixture
+def dispatcher(session_factory, smtp):
+    dispatcher = NotificationDispatcher(
+        session_factory=session_factory,
+        pool=SMTPConnectionPool(factory=smtp.connect, size=2),
+    )
+    dispatcher.batch_size = 100
+    dispatcher.max_attempts = 3
+    dispatcher.backoff_seconds = 30
+    dispatcher.plant_rate_per_hour = 100
+    return dispatcher
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    db.add_all([Plant(id=1, name="Planta 1", code="P-1"), Plant(id=2, name="Planta 2", code="P-2")])
+    db.commit()
+    yield db
+    db.close()
+
+
+def queue(db, recipient="sup@ptas.cl", plant_id=1, **values):
+    row = NotificationOutbox(
+        plant_id=plant_id,
+        recipient=recipient,
+        severity="high",
+        title="pH fuera de norma",
+        message="pH 9.8 en efluente",
+        next_attempt_at=datetime.now() - timedelta(seconds=1),
+        **values,
+    )
+    db.add(row)
+    db.commit()
+    return row.id
+
+
+def reload(db, row_id):
+    db.expire_all()
+    return db.get(NotificationOutbox, row_id)
+
+
+def test_digest_per_recipient(db, dispatcher, smtp):
+    ids = [queue(db, "a@ptas.cl") for _ in range(3)] + [queue(db, "b@ptas.cl")]
+
+    assert dispatcher.dispatch_once() == 4
+
+    assert sorted((m["To"], m["Subject"]) for m in smtp.inbox) == [
+        ("a@ptas.cl", "[PTAS] 3 alerta(s) nueva(s)"),
+        ("b@ptas.cl", "[PTAS] 1 alerta(s) nueva(s)"),
+    ]
+    assert smtp.connections <= 2  # Bounded by the pool size
+    for row_id in ids:
+        row = reload(db, row_id)
+        assert (row.status, row.attempts, row.sent_at is not None) == ("sent", 1, True)
+
+
+def test_digests_are_sent_concurrently_up_to_pool_size(db, dispatcher, smtp):
+    smtp.barrier = threading.Barrier(2)
+    for recipient in ("a@ptas.cl", "b@ptas.cl", "c@ptas.cl", "d@ptas.cl"):
+        queue(db, recipient)
+
+    assert dispatcher.dispatch_once() == 4
+
+    assert smtp.connections == 2  # Two sends in flight, never more
+
+    smtp.barrier = None
+    queue(db, "e@ptas.cl")
+    assert dispatcher.dispatch_once() == 1
+    assert smtp.connections == 2  # Reused from the pool
+
+
+def test_claim_leases_rows(session_factory, db, dispatcher):
+    row_id = queue(db)
+
+    claimed = dispatcher._claim(session_factory())
+
+    assert [r["id"] for r in claimed] == [row_id]
+    row = reload(db, row_id)
+    assert row.status == "sending"
+    assert row.next_attempt_at > datetime.now()
+    # Leased rows are not handed out again while the lease lasts
+    assert dispatcher._claim(session_factory()) == []
+
+
+def test_expired_lease_counts_as_attempt(db, dispatcher, smtp):
+    row_id = queue(db, status="sending", attempts=0)
+
+    assert dispatcher.dispatch_once() == 1
+
+    row = reload(db, row_id)
+    assert (row.status, row.attempts) == ("sent", 2)  # Lost send + this one
+
+
+def test_expired_lease_gives_up_at_max_attempts(db, dispatcher, smtp):
+    row_id = queue(db, status="sending", attempts=dispatcher.max_attempts - 1)
+
+    assert dispatcher.dispatch_once() == 0
+
+    row = reload(db, row_id)
+    assert (row.status, row.attempts) == ("failed", dispatcher.max_attempts)
+    assert smtp.inbox == []
+
+
+def test_failed_send_backs_off_exponentially(db, dispatcher, smtp):
+    smtp.fail = True
+    row_id = queue(db)
+
+    started = datetime.now()
+    assert dispatcher.dispatch_once() == 0
+    row = reload(db, row_id)
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert "connection lost" in row.last_error
+    first_delay = (row.next_attempt_at - started).total_seconds()
+    assert 29 <= first_delay <= 31
+
+    row.next_attempt_at = datetime.now() - timedelta(seconds=1)
+    db.commit()
+    started = datetime.now()
+    dispatcher.dispatch_once()
+    row = reload(db, row_id)
+    assert row.attempts == 2
+    assert 59 <= (row.next_attempt_at - started).total_seconds() <= 61
+
+
+def test_failed_send_stops_at_max_attempts(db, dispatcher, smtp):
+    smtp.fail = True
+    row_id = queue(db, attempts=dispatcher.max_attempts - 1)
+
+    dispatcher.dispatch_once()
+
+    row = reload(db, row_id)
+    assert (row.status, row.attempts) == ("failed", dispatcher.max_attempts)
+    # Failed rows are never claimed again
+    smtp.fail = False
+    row.next_attempt_at = datetime.now() - timedelta(seconds=1)
+    db.commit()
+    assert dispatcher.dispatch_once() == 0
+
+
+def test_plant_rate_cap(db, dispatcher, smtp):
+    dispatcher.plant_rate_per_hour = 2
+    queue(db, status="sent", sent_at=datetime.now() - timedelta(minutes=10))
+    capped = [queue(db, plant_id=1) for _ in range(2)]
+    other = queue(db, plant_id=2)
+
+    assert dispatcher.dispatch_once() == 2
+
+    statuses = [reload(db, row_id).status for row_id in capped]
+    assert sorted(statuses) == ["pending", "sent"]
+    held = reload(db, capped[statuses.index("pending")])
+    assert held.attempts == 0
+    assert held.next_attempt_at > datetime.now()
+    assert reload(db, other).status == "sent"
+
+
+def test_outbox_rows_commit_with_the_alert(db, dispatcher):
+    db.add(User(email="sup@ptas.cl", username="sup", password_hash="x", full_name="Sup", role="supervisor", plant_id=1))
+    db.commit()
+    data = {"plant_id": 1, "alert_type": "ph", "severity": "high", "title": "pH", "message": "pH 9.8"}
+
+    alert, created = AlertService(window_minutes=0).create_or_coalesce(db, data)
+    assert created
+    assert dispatcher.enqueue_alert(db, alert) == 1
+    db.rollback()
+    assert db.query(Alert).count() == 0
+    assert db.query(NotificationOutbox).count() == 0
+
+    alert, _ = AlertService(window_minutes=0).create_or_coalesce(db, data)
+    dispatcher.enqueue_alert(db, alert)
+    db.commit()
+    assert [r.alert_id for r in db.query(NotificationOutbox)] == [alert.id]
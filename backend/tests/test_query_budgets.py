@@ -0,0 +1,213 @@
+"""
+Every budgeted route, run with QUERY_BUDGET_MODE=raise.
+
+Each request starts with cold caches, as the budgets are declared, so a
+statement over a route's budget raises QueryBudgetExceeded and fails the
+test instead of only being logged.
+"""
+import asyncio
+import itertools
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import dashboard_cache, principal_cache
+from app.core.config import settings
+from app.core.metrics import route_metrics
+from app.core.query_budgets import QUERY_BUDGETS
+from app.core.security import create_access_token
+from app.main import app
+
+STREAM_ROUTE = ("GET", "/api/v1/stream/plants/{plant_id}")
+
+_unique = itertools.count(1)
+
+
+def _plant_body():
+    n = next(_unique)
+    return {"name": f"Planta presupuesto {n}", "code": f"QB-{n}"}
+
+
+def _user_body():
+    n = next(_unique)
+    return {"email": f"qb{n}@ptas.cl", "username": f"qb{n}", "full_name": "QB", "password": "secreto123"}
+
+
+def route_requests(ids):
+    """(method, route template) -> requests (method, path, keyword arguments)."""
+    plant, equipment = ids["plant"], ids["equipment"]
+    measurement, alert = ids["measurement"], ids["alert"]
+    now = datetime.now().isoformat()
+    reading = {"plant_id": plant, "timestamp": now, "phase": "reactor", "ph": 7.2, "od": 2.1}
+    hours = {"equipment_id": equipment, "date": now, "hours_run": 12.5, "energy_kwh": 40.0}
+    new_alert = {
+        "plant_id": plant, "alert_type": "ph", "severity": "warning",
+        "title": "pH alto", "message": "pH 8.9", "parameter": "ph",
+    }
+    login = {"username": "admin", "password": "admin123"}
+    return {
+        ("GET", "/"): [("GET", "/", {})],
+        ("GET", "/health"): [("GET", "/health", {})],
+        ("GET", "/metrics"): [("GET", "/metrics", {})],
+        ("GET", "/metrics/pool"): [("GET", "/metrics/pool", {})],
+        ("POST", "/api/v1/auth/login"): [("POST", "/api/v1/auth/login", {"json": login})],
+        ("POST", "/api/v1/auth/token"): [("POST", "/api/v1/auth/token", {"data": login})],
+        ("POST", "/api/v1/auth/refresh"): [
+            ("POST", "/api/v1/auth/refresh", {"json": {"refresh_token": ids["refresh_token"]}}),
+        ],
+        ("POST", "/api/v1/auth/register"): [("POST", "/api/v1/auth/register", {"json": _user_body()})],
+        ("GET", "/api/v1/auth/me"): [("GET", "/api/v1/auth/me", {})],
+        ("GET", "/api/v1/plants"): [("GET", "/api/v1/plants", {})],
+        ("GET", "/api/v1/plants/{plant_id}"): [("GET", f"/api/v1/plants/{plant}", {})],
+        ("POST", "/api/v1/plants"): [("POST", "/api/v1/plants", {"json": _plant_body()})],
+        ("PUT", "/api/v1/plants/{plant_id}"): [
+            ("PUT", f"/api/v1/plants/{plant}", {"json": {"region": "Biobío"}}),
+        ],
+        ("DELETE", "/api/v1/plants/{plant_id}"): [("DELETE", f"/api/v1/plants/{ids['spare_plant']}", {})],
+        ("GET", "/api/v1/measurements"): [("GET", "/api/v1/measurements", {"params": {"plant_id": plant}})],
+        ("GET", "/api/v1/measurements/stats"): [
+            ("GET", "/api/v1/measurements/stats", {"params": {"plant_id": plant, "days": 30}}),
+        ],
+        ("GET", "/api/v1/measurements/{measurement_id}"): [
+            ("GET", f"/api/v1/measurements/{measurement}", {}),
+        ],
+        ("POST", "/api/v1/measurements"): [("POST", "/api/v1/measurements", {"json": reading})],
+        ("PUT", "/api/v1/measurements/{measurement_id}"): [
+            ("PUT", f"/api/v1/measurements/{measurement}", {"json": {"ph": 7.4}}),
+        ],
+        ("POST", "/api/v1/measurements/{measurement_id}/validate"): [
+            ("POST", f"/api/v1/measurements/{measurement}/validate", {}),
+        ],
+        ("GET", "/api/v1/equipment"): [("GET", "/api/v1/equipment", {"params": {"plant_id": plant}})],
+        ("GET", "/api/v1/equipment/{equipment_id}"): [("GET", f"/api/v1/equipment/{equipment}", {})],
+        ("POST", "/api/v1/equipment"): [
+            ("POST", "/api/v1/equipment", {"json": {"plant_id": plant, "name": "Soplador", "equipment_type": "soplador"}}),
+        ],
+        ("PUT", "/api/v1/equipment/{equipment_id}"): [
+            ("PUT", f"/api/v1/equipment/{equipment}", {"json": {"status": "maintenance"}}),
+        ],
+        ("GET", "/api/v1/equipment/{equipment_id}/hours"): [
+            ("GET", f"/api/v1/equipment/{equipment}/hours", {}),
+        ],
+        ("POST", "/api/v1/equipment/{equipment_id}/hours"): [
+            ("POST", f"/api/v1/equipment/{equipment}/hours", {"json": hours}),
+        ],
+        ("PUT", "/api/v1/equipment/hours"): [
+            ("PUT", "/api/v1/equipment/hours", {"json": {"plant_id": plant, "items": [hours]}}),
+        ],
+        ("GET", "/api/v1/alerts"): [("GET", "/api/v1/alerts", {"params": {"plant_id": plant}})],
+        ("GET", "/api/v1/alerts/stats"): [("GET", "/api/v1/alerts/stats", {"params": {"plant_id": plant}})],
+        ("GET", "/api/v1/alerts/stats/plants"): [("GET", "/api/v1/alerts/stats/plants", {})],
+        ("GET", "/api/v1/alerts/{alert_id}"): [("GET", f"/api/v1/alerts/{alert}", {})],
+        ("POST", "/api/v1/alerts"): [("POST", "/api/v1/alerts", {"json": new_alert})],
+        ("PUT", "/api/v1/alerts/resolve"): [
+            ("PUT", "/api/v1/alerts/resolve", {"json": {"plant_id": plant, "alert_type": "ph"}}),
+        ],
+        ("PUT", "/api/v1/alerts/{alert_id}/resolve"): [
+            ("PUT", f"/api/v1/alerts/{alert}/resolve", {"json": {"resolution_notes": "Calibrado"}}),
+        ],
+        ("GET", "/api/v1/dashboard/summary"): [
+            ("GET", "/api/v1/dashboard/summary", {"params": {"plant_id": plant}}),
+        ],
+        ("GET", "/api/v1/dashboard/overview"): [("GET", "/api/v1/dashboard/overview", {})],
+        ("GET", "/api/v1/dashboard/trends"): [
+            ("GET", "/api/v1/dashboard/trends", {"params": {"plant_id": plant, "parameter": "ph"}}),
+        ],
+        ("GET", "/api/v1/dashboard/kpis"): [
+            # A standard period reads snapshots; any other window is computed live
+            ("GET", "/api/v1/dashboard/kpis", {"params": {"plant_id": plant, "days": 30}}),
+            ("GET", "/api/v1/dashboard/kpis", {"params": {"plant_id": plant, "days": 10}}),
+        ],
+    }
+
+
+@pytest.fixture(scope="module")
+def client():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "QUERY_BUDGET_MODE", "raise")
+        with TestClient(app) as client:
+            client.headers["Authorization"] = "Bearer " + create_access_token({"sub": "1"})
+            yield client
+
+
+@pytest.fixture(scope="module")
+def ids(client):
+    """Rows for the routes to act on, created through the API."""
+    def created(path, body):
+        response = client.post(path, json=body)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    plant = created("/api/v1/plants", _plant_body())
+    return {
+        "plant": plant,
+        "spare_plant": created("/api/v1/plants", _plant_body()),
+        "equipment": created("/api/v1/equipment", {"plant_id": plant, "name": "Bomba", "equipment_type": "bomba"}),
+        "measurement": created("/api/v1/measurements", {
+            "plant_id": plant, "timestamp": datetime.now().isoformat(), "phase": "afluente", "ph": 7.0,
+        }),
+        "alert": created("/api/v1/alerts", {
+            "plant_id": plant, "alert_type": "od", "severity": "critical",
+            "title": "OD bajo", "message": "OD 0.4 mg/L", "parameter": "od",
+        }),
+        "refresh_token": client.post(
+            "/api/v1/auth/login", json={"username": "admin", "password": "admin123"}
+        ).json()["refresh_token"],
+    }
+
+
+def test_every_budgeted_route_is_exercised():
+    covered = set(route_requests({key: 1 for key in (
+        "plant", "spare_plant", "equipment", "measurement", "alert", "refresh_token",
+    )})) | {STREAM_ROUTE}
+    assert covered == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("route", sorted(set(QUERY_BUDGETS) - {STREAM_ROUTE}), ids=" ".join)
+def test_route_within_budget(client, ids, route):
+    for method, path, kwargs in route_requests(ids)[route]:
+        principal_cache.clear()
+        dashboard_cache.clear()
+        before = route_metrics.queries[route].snapshot()["count"] if route in route_metrics.queries else 0
+
+        response = client.request(method, path, **kwargs)
+
+        assert response.status_code < 400, response.text
+        assert route_metrics.queries[route].snapshot()["count"] == before + 1
+
+
+def test_stream_within_budget(client, ids):
+    """The SSE stream never ends on its own; disconnect once it has started."""
+    principal_cache.clear()
+    token = client.headers["Authorization"].split()[1]
+    messages = []
+
+    async def run():
+        started = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await started.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if message["type"] == "http.response.start":
+                started.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "server": ("testserver", 80), "client": ("testclient", 50000),
+            "path": f"/api/v1/stream/plants/{ids['plant']}", "raw_path": b"", "root_path": "",
+            "query_string": f"access_token={token}".encode(), "headers": [(b"host", b"testserver")],
+        }
+        await asyncio.wait_for(app(scope, receive, send), timeout=10)
+
+    client.portal.call(run)
+
+    assert messages[0]["status"] == 200
@@ -0,0 +1,110 @@
+"""
+Read routing between the primary and a replica, with two SQLite files.
+
+The replica is a separate database holding a plant the primary does not
+have, so each response shows which database served it.
+"""
+import http.cookiejar
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core import database
+from app.core.cache import dashboard_cache
+from app.core.config import settings
+from app.core.database import READ_YOUR_WRITES_COOKIE, Base, async_database_url
+from app.core.security import create_access_token
+from app.main import app
+from app.models.plant import Plant
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Plant(name="Planta en réplica", code="REPLICA"))
+        db.commit()
+    engine.dispose()
+
+    replica_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    monkeypatch.setattr(database, "replica_engines", [replica_engine])
+    monkeypatch.setattr(database, "_replica_cycle", iter(lambda: replica_engine, None))
+    return replica_engine
+
+
+@pytest.fixture
+def client(replica):
+    with TestClient(app) as client:
+        client.headers["Authorization"] = "Bearer " + create_access_token({"sub": "1"})
+        yield client
+
+
+def plant_codes(client):
+    response = client.get("/api/v1/plants")
+    assert response.status_code == 200
+    return {plant["code"] for plant in response.json()}
+
+
+def create_plant(client, code):
+    response = client.post("/api/v1/plants", json={"name": f"Planta {code}", "code": code})
+    assert response.status_code == 201
+    return response
+
+
+def test_plain_read_uses_replica(client):
+    assert plant_codes(client) == {"REPLICA"}
+    assert READ_YOUR_WRITES_COOKIE not in client.cookies
+
+
+def test_write_pins_reads_to_primary(client):
+    response = create_plant(client, "RW-1")
+
+    assert f"Max-Age={settings.READ_YOUR_WRITES_SECONDS}" in response.headers["set-cookie"]
+    assert READ_YOUR_WRITES_COOKIE in client.cookies
+    codes = plant_codes(client)
+    assert "RW-1" in codes and "REPLICA" not in codes
+
+
+def test_reads_return_to_replica_when_cookie_expires(client, monkeypatch):
+    create_plant(client, "RW-2")
+    assert "RW-2" in plant_codes(client)
+
+    later = time.time() + settings.READ_YOUR_WRITES_SECONDS + 1
+    monkeypatch.setattr(http.cookiejar, "time", SimpleNamespace(time=lambda: later))
+
+    assert plant_codes(client) == {"REPLICA"}
+
+
+def test_failed_write_does_not_pin(client):
+    create_plant(client, "RW-3")
+    client.cookies.clear()
+
+    response = client.post("/api/v1/plants", json={"name": "Duplicada", "code": "RW-3"})
+
+    assert response.status_code == 400
+    assert READ_YOUR_WRITES_COOKIE not in client.cookies
+    assert plant_codes(client) == {"REPLICA"}
+
+
+def test_replica_read_does_not_fill_dashboard_cache(client):
+    dashboard_cache.clear()
+    response = client.post("/api/v1/equipment", json={"plant_id": 1, "name": "Bomba RW", "equipment_type": "bomba"})
+    assert response.status_code == 201
+    pinned = dict(client.cookies)
+
+    # Another client, not pinned, reads the lagging replica right after the write
+    client.cookies.clear()
+    assert client.get("/api/v1/dashboard/summary", params={"plant_id": 1}).json()["plant"]["code"] == "REPLICA"
+
+    client.cookies.update(pinned)
+    summary = client.get("/api/v1/dashboard/summary", params={"plant_id": 1}).json()
+    assert summary["plant"]["code"] != "REPLICA"
+    assert summary["equipment"]["total"] >= 1
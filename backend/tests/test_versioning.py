@@ -0,0 +1,61 @@
+"""
+Plant data versions bumped by ORM writes.
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core import versioning  # noqa: F401  (registers the session hooks)
+from app.models.alert import Alert
+from app.models.equipment import Equipment
+from app.models.plant import Plant
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    db.add_all([Plant(id=1, name="Planta 1", code="P-1"), Plant(id=2, name="Planta 2", code="P-2")])
+    db.commit()
+    yield db
+    db.close()
+
+
+def alert(plant_id):
+    return Alert(plant_id=plant_id, alert_type="ph", severity="warning", title="pH", message="pH 8.9")
+
+
+def versions(db):
+    return dict(db.execute(select(Plant.id, Plant.data_version)).all())
+
+
+def test_write_bumps_its_plant_on_commit(db):
+    start = versions(db)
+    db.add(alert(1))
+    db.flush()
+
+    # The plant row is not touched (nor locked) until the commit
+    assert versions(db) == start
+
+    db.commit()
+    assert versions(db) == {1: start[1] + 1, 2: start[2]}
+
+
+def test_one_bump_per_transaction(db):
+    start = versions(db)
+    db.add(Equipment(plant_id=2, name="Bomba", equipment_type="bomba"))
+    db.flush()
+    db.add(alert(2))
+    db.commit()
+
+    assert versions(db)[2] == start[2] + 1
+
+
+def test_rollback_forgets_touched_plants(db):
+    start = versions(db)
+    db.add(alert(1))
+    db.flush()
+    db.rollback()
+
+    db.add(Equipment(plant_id=2, name="Soplador", equipment_type="soplador"))
+    db.commit()
+
+    assert versions(db) == {1: start[1], 2: start[2] + 1}
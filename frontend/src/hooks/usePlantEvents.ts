@@ -0,0 +1,55 @@
+import { useEffect, useRef } from 'react';
+
+export type PlantEventType =
+  | 'alert.created'
+  | 'alert.updated'
+  | 'alert.resolved'
+  | 'alerts.resolved'
+  | 'measurement.created'
+  | 'measurement.updated'
+  | 'measurement.validated'
+  | 'equipment.created'
+  | 'equipment.updated';
+
+const EVENT_TYPES: PlantEventType[] = [
+  'alert.created',
+  'alert.updated',
+  'alert.resolved',
+  'alerts.resolved',
+  'measurement.created',
+  'measurement.updated',
+  'measurement.validated',
+  'equipment.created',
+  'equipment.updated',
+];
+
+// Subscribe to the plant's SSE stream. EventSource reconnects on its own
+// and resends Last-Event-ID, so missed events are replayed by the server.
+export const usePlantEvents = (
+  plantId: number,
+  onEvent: (type: PlantEventType, data: any) => void
+): void => {
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+
+  useEffect(() => {
+    const token = localStorage.getItem('access_token');
+    if (!token) return;
+
+    const source = new EventSource(
+      `/api/v1/stream/plants/${plantId}?access_token=${encodeURIComponent(token)}`
+    );
+    const listeners = EVENT_TYPES.map((type) => {
+      const listener = (e: MessageEvent) => handlerRef.current(type, JSON.parse(e.data));
+      source.addEventListener(type, listener);
+      return [type, listener] as const;
+    });
+
+    return () => {
+      listeners.forEach(([type, listener]) => source.removeEventListener(type, listener));
+      source.close();
+    };
+  }, [plantId]);
+};
+
+export default usePlantEvents;
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import api from '../services/api';
 import { Alert } from '../types';
+import usePlantEvents from '../hooks/usePlantEvents';
 
 const Alerts: React.FC = () => {
   const [alerts, setAlerts] = useState<Alert[]>([]);
@@ -20,6 +21,21 @@ const Alerts: React.FC = () => {
     fetchAlerts();
   }, []);
 
+  usePlantEvents(1, (type, data) => {
+    if (type === 'alerts.resolved') {
+      const ids = new Set<number>(data.ids);
+      setAlerts((current) => current.map((a) => (ids.has(a.id) ? { ...a, is_resolved: true } : a)));
+      return;
+    }
+    if (!type.startsWith('alert.')) return;
+    const incoming = data as Alert;
+    setAlerts((current) =>
+      current.some((a) => a.id === incoming.id)
+        ? current.map((a) => (a.id === incoming.id ? incoming : a))
+        : [incoming, ...current]
+    );
+  });
+
   const getSeverityColor = (severity: string) => {
     switch (severity) {
       case 'critical': return 'bg-red-100 text-red-700 border-red-200';
@@ -32,7 +48,7 @@ const Alerts: React.FC = () => {
   const handleResolve = async (alertId: number) => {
     try {
       await api.put(`/alerts/${alertId}/resolve`, { resolution_notes: 'Resuelto' });
-      setAlerts(alerts.map(a => a.id === alertId ? { ...a, is_resolved: 'true' } : a));
+      setAlerts(alerts.map(a => a.id === alertId ? { ...a, is_resolved: true } : a));
     } catch (error) {
       console.error('Error resolving alert:', error);
     }
@@ -67,7 +83,7 @@ const Alerts: React.FC = () => {
                   {alert.ds609_violation && (
                     <span className="px-2 py-1 bg-orange-100 text-orange-700 rounded-full text-xs">DS609</span>
                   )}
-                  {alert.is_resolved === 'true' && (
+                  {alert.is_resolved && (
                     <span className="px-2 py-1 bg-green-100 text-green-700 rounded-full text-xs">Resuelto</span>
                   )}
                 </div>
@@ -77,7 +93,7 @@ const Alerts: React.FC = () => {
                   {new Date(alert.created_at).toLocaleString('es-CL')}
                 </p>
               </div>
-              {alert.is_resolved !== 'true' && (
+              {!alert.is_resolved && (
                 <button
                   onClick={() => handleResolve(alert.id)}
                   className="btn btn-secondary text-sm"
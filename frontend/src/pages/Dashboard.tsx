@@ -2,25 +2,32 @@ import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../services/api';
 import { DashboardSummary } from '../types';
+import usePlantEvents from '../hooks/usePlantEvents';
 
 const Dashboard: React.FC = () => {
   const [summary, setSummary] = useState<DashboardSummary | null>(null);
   const [loading, setLoading] = useState(true);
 
+  const fetchSummary = async () => {
+    try {
+      const response = await api.get('/dashboard/summary?plant_id=1');
+      setSummary(response.data);
+    } catch (error) {
+      console.error('Error fetching summary:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchSummary = async () => {
-      try {
-        const response = await api.get('/dashboard/summary?plant_id=1');
-        setSummary(response.data);
-      } catch (error) {
-        console.error('Error fetching summary:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
     fetchSummary();
   }, []);
 
+  // Refresh only when the plant's data actually changes
+  usePlantEvents(1, () => {
+    fetchSummary();
+  });
+
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
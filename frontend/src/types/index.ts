@@ -81,10 +81,13 @@ export interface Alert {
   ds90_violation: boolean;
   ds609_violation: boolean;
   norm_reference?: string;
-  is_resolved: string;
+  parameter?: string;
+  is_resolved: boolean;
   resolved_by?: number;
   resolved_at?: string;
   resolution_notes?: string;
+  occurrence_count: number;
+  last_seen_at?: string;
   created_at: string;
 }
 
@@ -139,3 +142,17 @@ export interface AlertStats {
   ds90_violations: number;
   ds609_violations: number;
 }
+
+export interface PlantKpis {
+  period_days: number;
+  total_measurements: number;
+  compliance_rate: number;
+  avg_caudal?: number | null;
+  avg_ph?: number | null;
+  avg_chlorine?: number | null;
+}
+
+export interface DashboardOverview {
+  period_days: number;
+  plants: (DashboardSummary & { kpis: PlantKpis })[];
+}